@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Aggregate Attendance Benchmark - per-group lambdas vs bincount over status
+codes, scaling from 1k to 10M attendance cells
+"""
+
+import sys
+import os
+import time
+sys.path.append('src')
+
+import numpy as np
+import pandas as pd
+
+SIZES = [1000, 10000, 100000, 1000000, 10000000]
+LECTURES = 180
+
+def make_records(cells, seed=0):
+    """cells attendance records of cells // LECTURES students in two subjects"""
+    from src.core.data_processor import ATTENDANCE_STATUSES
+
+    rng = np.random.default_rng(seed)
+    students = max(1, cells // LECTURES)
+    student = rng.integers(0, students, size=cells)
+    rolls = np.array([f"2300{s:04d}" for s in range(students)], dtype=object)
+    names = np.array([f"Student {s}" for s in range(students)], dtype=object)
+    codes = rng.choice(3, size=cells, p=[0.75, 0.2, 0.05]).astype(np.int8)
+    return pd.DataFrame({
+        'roll_number': rolls[student],
+        'student_name': names[student],
+        'subject': np.array(['Maths', 'Physics'], dtype=object)[student % 2],
+        'attendance_status': pd.Categorical.from_codes(codes, categories=ATTENDANCE_STATUSES)
+    })
+
+def legacy_aggregate_attendance(df, threshold):
+    """aggregate_attendance as it was: three lambdas per group"""
+    agg_data = df.groupby(['roll_number', 'student_name', 'subject']).agg({
+        'attendance_status': [
+            ('total_lectures', 'count'),
+            ('present_count', lambda x: (x == 'Present').sum()),
+            ('absent_count', lambda x: (x == 'Absent').sum()),
+            ('unclear_count', lambda x: (x == 'Unclear').sum())
+        ]
+    }).reset_index()
+    agg_data.columns = ['roll_number', 'student_name', 'subject',
+                        'total_lectures', 'present_count', 'absent_count', 'unclear_count']
+    agg_data['valid_lectures'] = agg_data['present_count'] + agg_data['absent_count']
+    agg_data['attendance_percentage'] = (
+        agg_data['present_count'] / agg_data['valid_lectures'] * 100
+    ).fillna(0)
+    agg_data['status'] = agg_data['attendance_percentage'].apply(
+        lambda x: 'Defaulter' if x < threshold else 'Regular'
+    )
+    return agg_data
+
+def benchmark_aggregate_attendance(sizes):
+    """Time both aggregations at each size and check they agree"""
+
+    print("=== Aggregate Attendance Benchmark ===")
+
+    from src.core.data_processor import DataProcessor
+
+    processor = DataProcessor()
+    threshold = processor.config.DEFAULTER_THRESHOLD
+    print(f"{'cells':>10} {'groups':>7} | {'lambdas':>9} | {'bincount':>9} | speedup")
+    for cells in sizes:
+        df = make_records(cells)
+
+        start = time.perf_counter()
+        expected = legacy_aggregate_attendance(df, threshold)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = processor.aggregate_attendance(df)
+        new_time = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(result, expected)
+        print(f"{cells:>10} {len(result):>7} | {legacy_time * 1000:7.1f}ms | {new_time * 1000:7.1f}ms | "
+              f"{legacy_time / new_time:5.1f}x")
+        del df
+
+if __name__ == "__main__":
+    benchmark_aggregate_attendance([int(size) for size in sys.argv[1:]] or SIZES)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Anomaly Detection Benchmark - the long-format duplicate/string checks vs
+grouped anomaly records, on multi-page semester data
+"""
+
+import sys
+import os
+import time
+sys.path.append('src')
+
+import numpy as np
+import pandas as pd
+
+SIZES = [100000, 1000000, 5000000]
+LECTURES = 50
+STUDENTS_PER_PAGE = 40
+
+def make_records(cells, seed=0):
+    """Pages of STUDENTS_PER_PAGE students x LECTURES lectures, with a few planted anomalies"""
+    from src.core.data_processor import DataProcessor
+    from benchmark_data_processor import make_table
+
+    processor = DataProcessor()
+    rng = np.random.default_rng(seed)
+    students = max(STUDENTS_PER_PAGE, cells // LECTURES)
+    table = make_table(students, LECTURES, seed)
+    # A student copied onto the next row, and one with a noisy row
+    table[1] = list(table[0])
+    table[5][2:] = ['?'] * LECTURES
+
+    pages = [processor.process_table_to_dataframe(table[i:i + STUDENTS_PER_PAGE], "Maths",
+                                                  f"2024-01-01_table_{i // STUDENTS_PER_PAGE + 1}")
+             for i in range(0, len(table), STUDENTS_PER_PAGE)]
+    return processor, pd.concat(pages, ignore_index=True)
+
+def legacy_detect_anomalies(df):
+    """detect_anomalies as it was"""
+    anomalies = []
+    duplicate_rolls = df[df.duplicated(['roll_number'], keep=False)]['roll_number'].unique()
+    if len(duplicate_rolls) > 0:
+        anomalies.append(f"Duplicate roll numbers found: {', '.join(duplicate_rolls)}")
+    invalid_rolls = df[~df['valid_roll']]['roll_number'].unique()
+    if len(invalid_rolls) > 0:
+        anomalies.append(f"Invalid roll numbers: {', '.join(invalid_rolls)}")
+    missing_names = df[~df['valid_name']]['roll_number'].unique()
+    if len(missing_names) > 0:
+        anomalies.append(f"Missing/invalid names for rolls: {', '.join(missing_names)}")
+    unclear_percentage = (df['attendance_status'] == 'Unclear').sum() / len(df) * 100
+    if unclear_percentage > 20:
+        anomalies.append(f"High unclear attendance entries: {unclear_percentage:.1f}%")
+    return anomalies if anomalies else ["No anomalies detected"]
+
+def benchmark_anomaly_detection(sizes):
+    """Time both at each size; report how much each one says"""
+
+    print("=== Anomaly Detection Benchmark ===")
+    print(f"{'records':>9} | {'legacy':>8} {'report':>10} | {'grouped':>8} {'records':>7} {'report':>7}")
+    for cells in sizes:
+        processor, df = make_records(cells)
+
+        start = time.perf_counter()
+        legacy = legacy_detect_anomalies(df)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        records = processor.detect_anomaly_records(df)
+        messages = processor.detect_anomalies(df, records)
+        new_time = time.perf_counter() - start
+
+        found = set(zip(records['type'], records['roll_number']))
+        assert ('duplicate_identity', '23000000') in found and ('unclear_student', '23000005') in found
+        print(f"{len(df):>9} | {legacy_time * 1000:6.0f}ms {sum(map(len, legacy)):>9}B | "
+              f"{new_time * 1000:6.0f}ms {len(records):>7} {sum(map(len, messages)):>6}B")
+        del df
+    print("Grouped anomaly types:", ', '.join(f"{k}={v}" for k, v in records['type'].value_counts().items()))
+
+if __name__ == "__main__":
+    benchmark_anomaly_detection([int(size) for size in sys.argv[1:]] or SIZES)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Attendance Matrix Benchmark - long-format records vs the uint8
+students x lectures matrix
+"""
+
+import sys
+import os
+import time
+sys.path.append('src')
+
+import numpy as np
+
+STUDENTS = 20000
+LECTURES = 180
+PAGES = 400
+
+def benchmark_attendance_matrix():
+    """Memory and query time of both representations of one semester"""
+
+    print("=== Attendance Matrix Benchmark ===")
+
+    from src.core.data_processor import DataProcessor
+    from src.core.attendance_matrix import AttendanceMatrix
+    from benchmark_data_processor import make_table
+
+    processor = DataProcessor()
+    table = make_table(STUDENTS, LECTURES)
+    df = processor.process_table_to_dataframe(table, "Maths", "2024")
+    print(f"{STUDENTS} students x {LECTURES} lectures")
+
+    start = time.perf_counter()
+    matrix = processor.to_attendance_matrix(df)
+    print(f"to_attendance_matrix: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # OCR records hold single mark characters
+    records = [{'roll_number': row[0], 'name': row[1], 'attendance_marks': [mark[:1] for mark in row[2:]]}
+               for row in table]
+    start = time.perf_counter()
+    from_records = AttendanceMatrix.from_records(records, "Maths", "2024")
+    print(f"from_records:         {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    marks_bytes = sum(sys.getsizeof(record['attendance_marks']) for record in records)
+    print(f"memory: long frame {df.memory_usage(deep=True).sum() / 2**20:.0f} MiB | "
+          f"mark lists {marks_bytes / 2**20:.0f} MiB (pointers only) | "
+          f"matrix {matrix.codes.nbytes / 2**20:.1f} MiB")
+
+    start = time.perf_counter()
+    aggregated = processor.aggregate_attendance(df)
+    aggregate_time = time.perf_counter() - start
+    start = time.perf_counter()
+    percentage = matrix.percentages()
+    defaulters = matrix.defaulters()
+    matrix_time = time.perf_counter() - start
+
+    by_roll = dict(zip(matrix.roll_numbers, percentage))
+    assert np.allclose([by_roll[roll] for roll in aggregated['roll_number']], aggregated['attendance_percentage'])
+    assert sorted(defaulters) == sorted(aggregated.loc[aggregated['status'] == 'Defaulter', 'roll_number'])
+    print(f"percentages + defaulters: aggregate_attendance {aggregate_time * 1000:.0f} ms | "
+          f"matrix {matrix_time * 1000:.1f} ms ({aggregate_time / matrix_time:.0f}x) | identical")
+
+    # Pages of students merged back into one matrix
+    pages = [AttendanceMatrix(matrix.codes[rows], [matrix.roll_numbers[r] for r in rows],
+                              [matrix.names[r] for r in rows], matrix.lectures, matrix.subjects)
+             for rows in np.array_split(np.arange(len(matrix)), PAGES)]
+    start = time.perf_counter()
+    merged = AttendanceMatrix.merge(pages)
+    print(f"merge of {PAGES} pages: {(time.perf_counter() - start) * 1000:.0f} ms")
+    assert np.array_equal(merged.codes, matrix.codes)
+
+if __name__ == "__main__":
+    benchmark_attendance_matrix()
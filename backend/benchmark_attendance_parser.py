@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Attendance Parser Benchmark - per-processor regex parsers vs the shared
+compiled AttendanceLineParser, on synthetic OCR lines
+"""
+
+import sys
+import os
+import re
+import time
+sys.path.append('src')
+
+import numpy as np
+
+LINES = 1000000
+
+IMPROVED_ROLL_PATTERNS = [r'\b23\d{6}\b', r'\b\d{2}[A-Z]{2}\d{4}\b', r'\b[A-Z]{2}\d{6}\b', r'\b\d{8}\b']
+FAST_ROLL_PATTERNS = [r'\b23\d{6}\b', r'\b\d{8}\b', r'\b23\d{5}\b']
+
+FIRST = ['asha', 'RAVI', 'Meera', 'john', 'Priya', 'ARJUN', 'Xavier', 'Yusuf', 'Ana', 'Pooja']
+LAST = ['verma', 'KUMAR', 'Iyer', 'smith', 'Patel', 'SINGH', 'Dsouza', 'Khan', 'Rao', 'Apte']
+NOISE = ['|', '_', '[', ']', '(', ')', '{', '}', '<', '>', '.', ',', ';', ':', '-', '~', '"', "'", '  ', '\t']
+MARKS = ['P', 'A', '✓', '✗', 'X', 'Y', '1', '0', '-', 'p', 'a', 'present', 'absent', 'E']
+
+def make_lines(count, seed=0):
+    """OCR-like attendance lines: roll formats, names, marks and separator noise"""
+    rng = np.random.default_rng(seed)
+    rolls = [
+        lambda: f"23{rng.integers(0, 10**6):06d}",
+        lambda: f"{rng.integers(10, 100)}CS{rng.integers(0, 10**4):04d}",
+        lambda: f"CS{rng.integers(0, 10**6):06d}",
+        lambda: f"{rng.integers(10**7, 10**8)}",
+        lambda: f"23{rng.integers(0, 10**5):05d}",
+        lambda: "",
+    ]
+    lines = []
+    for _ in range(count):
+        parts = []
+        if rng.random() < 0.3:
+            parts.append(str(rng.integers(1, 200)))
+        parts.append(rolls[rng.integers(len(rolls))]())
+        parts.append(FIRST[rng.integers(len(FIRST))])
+        if rng.random() < 0.8:
+            parts.append(LAST[rng.integers(len(LAST))])
+        parts.extend(MARKS[i] for i in rng.integers(len(MARKS), size=rng.integers(0, 8)))
+        if rng.random() < 0.1:
+            parts.append(rolls[rng.integers(len(rolls))]())
+        line = ''
+        for part in parts:
+            line += part + (NOISE[rng.integers(len(NOISE))] if rng.random() < 0.3 else ' ')
+        lines.append(line)
+    return lines
+
+# The parsers as they were in each processor
+
+def legacy_parse_attendance_line(text):
+    text = re.sub(r'[|_\[\]()]+', ' ', text)
+    text = ' '.join(text.split())
+    roll_match = re.search(r'\b(23\d{6})\b', text)
+    if not roll_match:
+        return None
+    roll_number = roll_match.group(1)
+    name_pattern = r'23\d{6}\s+([A-Za-z\s]+?)(?:\s+[PA✓✗XY01-]|$)'
+    name_match = re.search(name_pattern, text)
+    name = name_match.group(1).strip() if name_match else ""
+    name = re.sub(r'\s+', ' ', name)
+    name = ' '.join([word.capitalize() for word in name.split() if len(word) > 1])
+    attendance_pattern = r'[PA✓✗XY01-]'
+    attendance_marks = re.findall(attendance_pattern, text)
+    present_count = 0
+    absent_count = 0
+    total_classes = len(attendance_marks)
+    for mark in attendance_marks:
+        if mark.upper() in ['P', '✓', 'Y', '1']:
+            present_count += 1
+        elif mark.upper() in ['A', '✗', 'X', '0', '-']:
+            absent_count += 1
+    attendance_percentage = (present_count / total_classes * 100) if total_classes > 0 else 0
+    return {
+        'roll_number': roll_number,
+        'name': name,
+        'present_count': present_count,
+        'absent_count': absent_count,
+        'total_classes': total_classes,
+        'attendance_percentage': round(attendance_percentage, 2),
+        'attendance_marks': attendance_marks,
+        'raw_text': text
+    }
+
+def legacy_extract_student_data_from_text(text, roll_patterns, score):
+    students = []
+    lines = text.split('\n')
+    for line_num, line in enumerate(lines):
+        line = line.strip()
+        if not line or len(line) < 5:
+            continue
+        roll_number = None
+        for pattern in roll_patterns:
+            match = re.search(pattern, line)
+            if match:
+                roll_number = match.group()
+                break
+        if roll_number:
+            name_text = line
+            name_text = re.sub(r'\b' + re.escape(roll_number) + r'\b', '', name_text)
+            name_text = re.sub(r'\b[PA]\b', '', name_text)
+            name_text = re.sub(r'\d+', '', name_text)
+            name_text = re.sub(r'[^\w\s]', ' ', name_text)
+            name_text = ' '.join(name_text.split())
+            attendance_status = "Unknown"
+            if re.search(r'\bP\b|\bpresent\b', line, re.IGNORECASE):
+                attendance_status = "Present"
+            elif re.search(r'\bA\b|\babsent\b', line, re.IGNORECASE):
+                attendance_status = "Absent"
+            if name_text and len(name_text) > 2:
+                students.append({
+                    'roll_number': roll_number,
+                    'name': name_text.title(),
+                    'attendance': attendance_status,
+                    'line_number': line_num + 1,
+                    'raw_line': line,
+                    'confidence': score(line)
+                })
+    return students
+
+def legacy_extract_students_fast(text, roll_patterns, score):
+    students = []
+    lines = text.split('\n')
+    for line_num, line in enumerate(lines):
+        line = line.strip()
+        if len(line) < 8:
+            continue
+        roll_number = None
+        for pattern in roll_patterns:
+            match = re.search(pattern, line)
+            if match:
+                roll_number = match.group()
+                break
+        if roll_number:
+            name_text = line.replace(roll_number, '').strip()
+            name_text = re.sub(r'[|_\[\]{}()<>]', ' ', name_text)
+            name_text = re.sub(r'\b[PA]\b', '', name_text)
+            name_text = re.sub(r'\d+', '', name_text)
+            name_text = ' '.join(name_text.split())
+            attendance = "Unknown"
+            if re.search(r'\bP\b|\bpresent\b', line, re.IGNORECASE):
+                attendance = "Present"
+            elif re.search(r'\bA\b|\babsent\b', line, re.IGNORECASE):
+                attendance = "Absent"
+            if name_text and len(name_text) > 1:
+                students.append({
+                    'roll_number': roll_number,
+                    'name': name_text.title(),
+                    'attendance': attendance,
+                    'line_number': line_num + 1,
+                    'raw_line': line,
+                    'confidence': score(line)
+                })
+    return students
+
+def legacy_parse_text_to_table(text):
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    table = []
+    for line in lines:
+        if len(re.sub(r'[^A-Za-z0-9]', '', line)) < 3:
+            continue
+        if re.search(r'\b23\d{6}\b', line):
+            columns = re.split(r'\s{2,}|\t|[|_\[\]]+', line)
+            clean_columns = []
+            for col in columns:
+                col = col.strip('|_[]() ').strip()
+                if col and len(col) > 0:
+                    clean_columns.append(col)
+            if len(clean_columns) >= 2:
+                table.append(clean_columns)
+        elif re.search(r'^\s*23\d{6}\s*$', line):
+            roll_num = re.search(r'23\d{6}', line).group()
+            table.append([roll_num, ""])
+        elif re.search(r'\b[A-Z]{2,}[A-Z\s]*\b', line) and not re.search(r'^[E\s]+$', line):
+            columns = re.split(r'\s{2,}|\t|[|_\[\]]+', line)
+            clean_columns = []
+            for col in columns:
+                col = col.strip('|_[]() ').strip()
+                if col and len(col) > 1 and not re.match(r'^[E\s]+$', col):
+                    clean_columns.append(col)
+            if len(clean_columns) >= 2:
+                table.append(clean_columns)
+    return table
+
+def legacy_convert_row(row):
+    roll_number = None
+    name = ""
+    attendance_marks = []
+    for cell in row:
+        roll_match = re.search(r'\b(23\d{6})\b', cell)
+        if roll_match:
+            roll_number = roll_match.group(1)
+            continue
+        if re.search(r'^[A-Za-z\s]+$', cell.strip()) and len(cell.strip()) > 2:
+            if not name:
+                name = cell.strip()
+            continue
+        if re.search(r'^[PA✓✗XY01-]+$', cell.strip()):
+            attendance_marks.extend(list(cell.strip()))
+    if not roll_number:
+        return None
+    present_count = sum(1 for mark in attendance_marks if mark.upper() in ['P', '✓', 'Y', '1'])
+    absent_count = sum(1 for mark in attendance_marks if mark.upper() in ['A', '✗', 'X', '0', '-'])
+    total_classes = len(attendance_marks)
+    attendance_percentage = (present_count / total_classes * 100) if total_classes > 0 else 0
+    return {
+        'roll_number': roll_number,
+        'name': name.title() if name else "",
+        'present_count': present_count,
+        'absent_count': absent_count,
+        'total_classes': total_classes,
+        'attendance_percentage': round(attendance_percentage, 2),
+        'attendance_marks': attendance_marks,
+        'raw_row': row
+    }
+
+def timed(label, legacy, compiled):
+    """Run both, check they agree, print the timings"""
+    start = time.perf_counter()
+    expected = legacy()
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = compiled()
+    compiled_time = time.perf_counter() - start
+
+    assert result == expected, f"{label}: outputs differ"
+    print(f"{label:<34} legacy {legacy_time:6.2f}s | compiled {compiled_time:6.2f}s "
+          f"({legacy_time / compiled_time:.1f}x) | identical")
+
+def benchmark_attendance_parser():
+    """Time every legacy parser against the shared parser on the same lines"""
+
+    print("=== Attendance Parser Benchmark ===")
+
+    from src.core.attendance_parser import AttendanceLineParser
+
+    lines = make_lines(LINES)
+    text = '\n'.join(lines)
+    rows = [re.split(r'\s{2,}|\t|[|_\[\]]+| ', line) for line in lines]
+    print(f"{len(lines)} synthetic lines, {len(text) / 2**20:.0f} MiB of text")
+
+    parser = AttendanceLineParser()
+    improved = AttendanceLineParser(IMPROVED_ROLL_PATTERNS)
+    fast = AttendanceLineParser(FAST_ROLL_PATTERNS)
+    score = len
+
+    timed("parse_attendance_line",
+          lambda: [legacy_parse_attendance_line(line) for line in lines],
+          lambda: parser.parse_lines(lines))
+    timed("extract_student_data_from_text",
+          lambda: legacy_extract_student_data_from_text(text, IMPROVED_ROLL_PATTERNS, score),
+          lambda: improved.extract_students(text, score))
+    timed("extract_students_fast",
+          lambda: legacy_extract_students_fast(text, FAST_ROLL_PATTERNS, score),
+          lambda: fast.extract_students(text, score, min_line_length=8, min_name_length=2, fast=True))
+    timed("parse_text_to_table",
+          lambda: legacy_parse_text_to_table(text),
+          lambda: parser.split_table_lines(text))
+    timed("_convert_table_to_attendance_data",
+          lambda: [legacy_convert_row(row) for row in rows],
+          lambda: [parser.parse_row(row) for row in rows])
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        LINES = int(sys.argv[1])
+    benchmark_attendance_parser()
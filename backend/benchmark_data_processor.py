@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Data Processor Benchmark - per-cell attendance normalization and validation
+vs the column-wise versions, on a semester-sized sheet
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+sys.path.append('src')
+
+import numpy as np
+import pandas as pd
+
+STUDENTS = 3000
+LECTURES = 180
+
+RAW_MARKS = ['P', 'P', 'P', 'A', 'p', 'a', '✓', '✗', 'X', '-', '0', '1', '', 'P.', '|A', 'Present', '?', 'E']
+
+def make_table(students, lectures, seed=0):
+    """Rows of roll number, name and one OCR'd mark per lecture"""
+    rng = np.random.default_rng(seed)
+    marks = np.array(RAW_MARKS, dtype=object)[rng.integers(len(RAW_MARKS), size=(students, lectures))]
+    return [[f"2300{s:04d}", f"Student {s}"] + marks[s].tolist() for s in range(students)]
+
+def legacy_process_table_to_dataframe(processor, table, subject, date):
+    """process_table_to_dataframe as it was: normalized and validated per cell"""
+    processed_data = []
+    for row in table:
+        if len(row) < 2:
+            continue
+        roll_no = row[0] if len(row) > 0 else ""
+        name = row[1] if len(row) > 1 else ""
+        attendance_data = row[2:] if len(row) > 2 else [""]
+        for i, attendance in enumerate(attendance_data):
+            processed_data.append({
+                'roll_number': roll_no,
+                'student_name': name,
+                'subject': subject,
+                'date': f"{date}_lecture_{i+1}",
+                'attendance_raw': attendance,
+                'attendance_status': processor.normalize_attendance_status(attendance)
+            })
+    df = pd.DataFrame(processed_data)
+    if not df.empty:
+        df['valid_roll'] = df['roll_number'].apply(processor.validate_roll_number)
+        df['valid_name'] = df['student_name'].apply(processor.validate_name)
+    return df
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def traced(func):
+    """timed, plus the traced peak of Python allocations from a second traced run"""
+    result, elapsed = timed(func)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def benchmark_data_processor():
+    """Time the normalization/validation step and the whole table conversion"""
+
+    print("=== Data Processor Benchmark ===")
+
+    from src.core.data_processor import DataProcessor
+
+    processor = DataProcessor()
+    table = make_table(STUDENTS, LECTURES)
+    print(f"{STUDENTS} students x {LECTURES} lectures = {STUDENTS * LECTURES} cells")
+
+    expected, legacy_time, legacy_peak = traced(lambda: legacy_process_table_to_dataframe(processor, table, "Maths", "2024"))
+    result, new_time, new_peak = traced(lambda: processor.process_table_to_dataframe(table, "Maths", "2024"))
+    # Same records; the columnar frame has categorical columns and the lecture number
+    as_objects = result.drop(columns='lecture').astype(
+        {'subject': object, 'date': object, 'attendance_status': object})
+    assert as_objects.equals(expected)
+    print(f"process_table_to_dataframe  dict per cell {legacy_time:6.2f}s, peak {legacy_peak / 2**20:5.0f} MiB, "
+          f"frame {expected.memory_usage(deep=True).sum() / 2**20:4.0f} MiB")
+    print(f"{'':<27} columnar      {new_time:6.2f}s, peak {new_peak / 2**20:5.0f} MiB, "
+          f"frame {result.memory_usage(deep=True).sum() / 2**20:4.0f} MiB "
+          f"({legacy_time / new_time:.1f}x faster) | identical")
+
+    raw = expected['attendance_raw']
+    steps = [
+        ("normalize attendance", lambda: raw.apply(processor.normalize_attendance_status),
+         lambda: processor.normalize_attendance_column(raw)),
+        ("validate roll numbers", lambda: expected['roll_number'].apply(processor.validate_roll_number),
+         lambda: processor.validate_roll_column(expected['roll_number'])),
+        ("validate names", lambda: expected['student_name'].apply(processor.validate_name),
+         lambda: processor.validate_name_column(expected['student_name'])),
+    ]
+    for label, per_cell, column in steps:
+        reference, per_cell_time = timed(per_cell)
+        values, column_time = timed(column)
+        assert list(values) == reference.tolist(), label
+        print(f"{label:<27} per cell {per_cell_time * 1000:7.1f} ms | column {column_time * 1000:6.1f} ms "
+              f"({per_cell_time / column_time:.0f}x) | identical")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        STUDENTS, LECTURES = int(sys.argv[1]), int(sys.argv[2])
+    benchmark_data_processor()
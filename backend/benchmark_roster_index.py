@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Roster Index Benchmark - snapping OCR roll numbers with the roster index vs
+a nearest-entry scan of the whole roster, on synthetic misreadings
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+sys.path.append('src')
+
+import numpy as np
+
+QUERIES = 100000
+
+# One reading per lookup path of a roll number
+PATHS = [
+    ("exact", lambda roll: roll),
+    ("misread", lambda roll: roll[:5] + str((int(roll[5]) + 1) % 10) + roll[6:]),
+    ("dropped", lambda roll: roll[:4] + roll[5:]),
+    ("extra", lambda roll: roll[:4] + '7' + roll[4:]),
+    ("two misreads", lambda roll: roll[:2] + str((int(roll[2]) + 1) % 10) + roll[3:7] + str((int(roll[7]) + 1) % 10)),
+]
+
+def make_queries(rolls, count, seed=0):
+    """Readings of roster roll numbers: 80% exact, 15% one misread digit, 5% a dropped digit"""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for _ in range(count):
+        roll = rolls[rng.integers(len(rolls))]
+        kind = rng.random()
+        if kind < 0.8:
+            queries.append(roll)
+            continue
+        position = rng.integers(2, len(roll))
+        if kind < 0.95:
+            queries.append(roll[:position] + str(rng.integers(10)) + roll[position + 1:])
+        else:
+            queries.append(roll[:position] + roll[position + 1:])
+    return queries
+
+def scan_snap(candidate, rolls, edit_distance, max_distance=2):
+    """Unique nearest roll number by comparing the reading with every entry"""
+    if candidate in rolls:
+        return candidate, 0
+    matches = sorted((distance, roll) for roll in rolls
+                     for distance in [edit_distance(candidate, roll)] if distance <= max_distance)
+    if not matches or (len(matches) > 1 and matches[1][0] == matches[0][0]):
+        return None
+    return matches[0][1], matches[0][0]
+
+def benchmark_roster_index():
+    """Build the index for growing rosters and time lookups against a full scan"""
+
+    print("=== Roster Index Benchmark ===")
+
+    from src.core.roster_index import RosterIndex, edit_distance
+
+    for size in (60, 1000, 10000):
+        rng = np.random.default_rng(size)
+        rolls = [f"23{value:06d}" for value in rng.choice(10**6, size=size, replace=False)]
+        queries = make_queries(rolls, QUERIES)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        roster = RosterIndex(rolls)
+        build_time = time.perf_counter() - start
+        index_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        snap = roster.snap
+        start = time.perf_counter()
+        snapped = [snap(query) for query in queries]
+        index_time = time.perf_counter() - start
+
+        # The scan is timed on a sample; it gets slow with the roster size
+        sample = queries[:max(200, QUERIES * 60 // size // 10)]
+        roster_set = set(rolls)
+        start = time.perf_counter()
+        expected = [scan_snap(query, roster_set, edit_distance) for query in sample]
+        scan_time = (time.perf_counter() - start) / len(sample) * len(queries)
+
+        assert snapped[:len(sample)] == expected, "roster index and scan disagree"
+        exact = sum(1 for query in queries if query in roster)
+        corrected = sum(1 for query, match in zip(queries, snapped) if match and match[1] > 0)
+        print(f"{size:>6} students: built in {build_time * 1000:6.0f} ms ({index_bytes / 2**20:5.1f} MiB) | "
+              f"{index_time / len(queries) * 1e9:5.0f} ns/lookup vs scan {scan_time / len(queries) * 1e6:8.1f} us "
+              f"| {exact} exact, {corrected} corrected, {len(queries) - exact - corrected} unsnapped")
+
+        # Cost of each lookup path
+        timings = []
+        for label, kind in PATHS:
+            batch = [kind(roll) for roll in rolls[:1000]] * max(1, 20000 // len(rolls[:1000]))
+            start = time.perf_counter()
+            for query in batch:
+                snap(query)
+            timings.append(f"{label} {(time.perf_counter() - start) / len(batch) * 1e9:.0f} ns")
+        print("                " + ', '.join(timings))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        QUERIES = int(sys.argv[1])
+    benchmark_roster_index()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Table Projection Benchmark - loop vs run-length row/column detection
+"""
+
+import sys
+import os
+import time
+sys.path.append('src')
+
+import cv2
+import numpy as np
+
+def make_table(rows, columns, row_height=60, column_width=140):
+    """Render a ruled synthetic attendance table with text in every cell"""
+    height, width = rows * row_height + 40, columns * column_width + 40
+    image = np.full((height, width), 245, dtype=np.uint8)
+
+    for r in range(rows + 1):
+        y = 20 + r * row_height
+        cv2.line(image, (20, y), (width - 20, y), 0, 2)
+    for c in range(columns + 1):
+        x = 20 + c * column_width
+        cv2.line(image, (x, 20), (x, height - 20), 0, 2)
+    for r in range(rows):
+        for c in range(columns):
+            text = f"2300{r:04d}" if c == 0 else ("P" if (r + c) % 3 else "A")
+            cv2.putText(image, text, (30 + c * column_width, 10 + (r + 1) * row_height),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, 30, 2)
+    return image
+
+def loop_spans(projection, factor):
+    """The original per-pixel loop, mean recomputed on every iteration"""
+    spans = []
+    inside = False
+    start = 0
+    for i, intensity in enumerate(projection):
+        if intensity > np.mean(projection) * factor:
+            if not inside:
+                start = i
+                inside = True
+        else:
+            if inside:
+                spans.append((start, i))
+                inside = False
+    if inside:
+        spans.append((start, len(projection)))
+    return spans
+
+def benchmark_table_projection():
+    """Time both implementations on large tables and check the spans match"""
+
+    print("=== Table Projection Benchmark ===")
+
+    from src.core.tabular_ocr_integration import TabularOCRIntegration
+    tabular = TabularOCRIntegration()
+
+    for rows, columns in [(40, 12), (80, 24), (160, 32)]:
+        table = make_table(rows, columns)
+        _, thresh = cv2.threshold(table, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        horizontal, vertical = np.sum(thresh, axis=1), np.sum(thresh, axis=0)
+
+        start = time.perf_counter()
+        expected_rows = loop_spans(horizontal, 0.5)
+        expected_columns = loop_spans(vertical, 0.3)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        spans_rows = tabular._projection_spans(horizontal, np.mean(horizontal) * 0.5)
+        spans_columns = tabular._projection_spans(vertical, np.mean(vertical) * 0.3)
+        vector_time = time.perf_counter() - start
+
+        # End to end through the detectors (threshold + projection + spans)
+        start = time.perf_counter()
+        detected_rows = tabular._detect_rows(table)
+        detected_columns = tabular._detect_columns(table)
+        detect_time = time.perf_counter() - start
+
+        assert spans_rows == detected_rows == expected_rows, "row spans differ"
+        assert spans_columns == detected_columns == expected_columns, "column spans differ"
+
+        print(f"{table.shape[1]}x{table.shape[0]} table: {len(detected_rows)} rows, {len(detected_columns)} columns | "
+              f"spans: loop {loop_time * 1000:.2f} ms, run-length {vector_time * 1000:.2f} ms "
+              f"({loop_time / vector_time:.0f}x) | full detection {detect_time * 1000:.1f} ms")
+
+    print("✅ Spans identical for every table")
+
+if __name__ == "__main__":
+    benchmark_table_projection()
@@ -49,7 +49,8 @@ def main():
         # Generate report
         report_file = system.generate_reports(
             agg_data, raw_data, results['anomalies'],
-            f"attendance_{os.path.basename(file_path).split('.')[0]}"
+            f"attendance_{os.path.basename(file_path).split('.')[0]}",
+            results['anomaly_records']
         )
         print(f"\n📋 Excel report generated: {report_file}")
         
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any, Optional, Sequence, Iterable
+import logging
+from ..config import Config
+from .attendance_parser import PRESENT_MARKS, ABSENT_MARKS
+
+logger = logging.getLogger(__name__)
+
+
+class AttendanceMatrix:
+    """
+    Compact students x lectures attendance matrix of uint8 status codes.
+
+    Rows are indexed by roll number and columns by (subject, lecture)
+    label, with each subject's lectures kept in one contiguous block so a
+    subject is a column slice (a view, not a copy). One byte per mark
+    replaces the long-format DataFrame row or the single-character string
+    per mark, and counts, percentages and defaulter queries are whole-matrix
+    operations.
+
+    Codes follow the categories of DataProcessor's attendance_status
+    column; MISSING marks a lecture with no record for that student.
+    """
+
+    PRESENT = 0
+    ABSENT = 1
+    UNCLEAR = 2
+    MISSING = 255
+
+    def __init__(self, codes: np.ndarray, roll_numbers: Sequence[str],
+                 names: Optional[Sequence[str]] = None,
+                 lectures: Optional[Sequence[str]] = None,
+                 subjects: Optional[Sequence[str]] = None):
+        codes = np.asarray(codes, dtype=np.uint8)
+        if codes.ndim != 2:
+            raise ValueError("Attendance codes must be a students x lectures matrix")
+        students, width = codes.shape
+
+        self.roll_numbers = list(roll_numbers)
+        self.names = list(names) if names is not None else [''] * students
+        lectures = list(lectures) if lectures is not None else [f"lecture_{i+1}" for i in range(width)]
+        subjects = list(subjects) if subjects is not None else ['Unknown'] * width
+        if len(self.roll_numbers) != students or len(self.names) != students:
+            raise ValueError("One roll number and name is needed per matrix row")
+        if len(lectures) != width or len(subjects) != width:
+            raise ValueError("One lecture label and subject is needed per matrix column")
+
+        # Group each subject's lectures into one block (first-appearance order)
+        block_of = {subject: block for block, subject in enumerate(dict.fromkeys(subjects))}
+        order = np.argsort([block_of[subject] for subject in subjects], kind='stable')
+        if np.any(order != np.arange(width)):
+            codes = codes[:, order]
+            lectures = [lectures[i] for i in order]
+            subjects = [subjects[i] for i in order]
+
+        self.codes = codes
+        self.lectures = lectures
+        self.subjects = subjects
+        self.student_index = {roll: row for row, roll in enumerate(self.roll_numbers)}
+
+        self.blocks: Dict[str, slice] = {}
+        for column, subject in enumerate(subjects):
+            start = self.blocks[subject].start if subject in self.blocks else column
+            self.blocks[subject] = slice(start, column + 1)
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    def __len__(self) -> int:
+        return len(self.roll_numbers)
+
+    # Construction
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], subject: str = "Unknown",
+                     date: str = "Unknown") -> 'AttendanceMatrix':
+        """
+        Matrix from OCR student records (roll_number, name, attendance_marks),
+        one column per mark position; records sharing a roll number are merged
+        """
+        # Mark characters as counted by the line parser; anything else is unclear
+        code_of = {mark: cls.PRESENT for mark in PRESENT_MARKS}
+        code_of.update({mark: cls.ABSENT for mark in ABSENT_MARKS})
+
+        matrices = []
+        by_roll = {}
+        for record in records:
+            roll_number = record.get('roll_number')
+            if not roll_number:
+                continue
+            if roll_number in by_roll:
+                # A second record of the same student (another page or method)
+                matrices.append(by_roll)
+                by_roll = {}
+            by_roll[roll_number] = (record.get('name', ''),
+                                    [code_of.get(mark.upper(), cls.UNCLEAR) for mark in record.get('attendance_marks', [])])
+        matrices.append(by_roll)
+
+        return cls.merge([cls._from_rows(rows, subject, date) for rows in matrices if rows]
+                         or [cls._from_rows({}, subject, date)])
+
+    @classmethod
+    def _from_rows(cls, rows: Dict[str, Any], subject: str, date: str) -> 'AttendanceMatrix':
+        width = max((len(marks) for _, marks in rows.values()), default=0)
+        codes = np.full((len(rows), width), cls.MISSING, dtype=np.uint8)
+        for row, (_, marks) in enumerate(rows.values()):
+            codes[row, :len(marks)] = marks
+        return cls(codes, list(rows), [name for name, _ in rows.values()],
+                   [f"{date}_lecture_{i+1}" for i in range(width)], [subject] * width)
+
+    @classmethod
+    def merge(cls, matrices: Sequence['AttendanceMatrix']) -> 'AttendanceMatrix':
+        """
+        Union of several matrices (pages, tables or documents): students are
+        matched by roll number and lectures by (subject, lecture); a recorded
+        mark overrides MISSING, and later matrices win where both are recorded
+        """
+        if len(matrices) == 1:
+            return matrices[0]
+
+        students: Dict[str, int] = {}
+        names: List[str] = []
+        columns: Dict[tuple, int] = {}
+        for matrix in matrices:
+            for roll, name in zip(matrix.roll_numbers, matrix.names):
+                if roll not in students:
+                    students[roll] = len(names)
+                    names.append(name)
+                elif name and not names[students[roll]]:
+                    names[students[roll]] = name
+            for key in zip(matrix.subjects, matrix.lectures):
+                columns.setdefault(key, len(columns))
+
+        codes = np.full((len(students), len(columns)), cls.MISSING, dtype=np.uint8)
+        for matrix in matrices:
+            rows = np.array([students[roll] for roll in matrix.roll_numbers], dtype=np.intp)
+            cols = np.array([columns[key] for key in zip(matrix.subjects, matrix.lectures)], dtype=np.intp)
+            target = np.ix_(rows, cols)
+            codes[target] = np.where(matrix.codes != cls.MISSING, matrix.codes, codes[target])
+
+        return cls(codes, list(students), names,
+                   [lecture for _, lecture in columns], [subject for subject, _ in columns])
+
+    # Queries
+
+    def subject(self, name: str) -> 'AttendanceMatrix':
+        """The lectures of one subject; the codes are a view of this matrix"""
+        block = self.blocks[name]
+        return AttendanceMatrix(self.codes[:, block], self.roll_numbers, self.names,
+                                self.lectures[block], self.subjects[block])
+
+    def counts(self) -> np.ndarray:
+        """Present, absent and unclear counts per student (students x 3)"""
+        return np.stack([np.count_nonzero(self.codes == code, axis=1)
+                         for code in (self.PRESENT, self.ABSENT, self.UNCLEAR)], axis=1)
+
+    def percentages(self) -> np.ndarray:
+        """Attendance percentage per student, unclear marks excluded (0 with no clear marks)"""
+        counts = self.counts()
+        valid = counts[:, 0] + counts[:, 1]
+        return np.divide(counts[:, 0] * 100.0, valid, out=np.zeros(len(valid)), where=valid > 0)
+
+    def defaulters(self, threshold: Optional[float] = None) -> List[str]:
+        """Roll numbers of students below the defaulter threshold"""
+        threshold = Config.DEFAULTER_THRESHOLD if threshold is None else threshold
+        below = np.flatnonzero(self.percentages() < threshold)
+        return [self.roll_numbers[row] for row in below]
+
+    def student(self, roll_number: str) -> np.ndarray:
+        """Codes of one student's lectures (a view)"""
+        return self.codes[self.student_index[roll_number]]
+
+    # Conversion
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Codes as a DataFrame indexed by roll number with (subject, lecture)
+        columns, sharing this matrix's memory
+        """
+        columns = pd.MultiIndex.from_arrays([self.subjects, self.lectures], names=['subject', 'lecture'])
+        return pd.DataFrame(self.codes, index=pd.Index(self.roll_numbers, name='roll_number'),
+                            columns=columns, copy=False)
+
+    def summary(self, threshold: Optional[float] = None) -> pd.DataFrame:
+        """Per-student counts, percentage and Defaulter/Regular status"""
+        threshold = Config.DEFAULTER_THRESHOLD if threshold is None else threshold
+        counts = self.counts()
+        percentage = self.percentages()
+        return pd.DataFrame({
+            'roll_number': self.roll_numbers,
+            'student_name': self.names,
+            'total_lectures': np.count_nonzero(self.codes != self.MISSING, axis=1),
+            'present_count': counts[:, 0],
+            'absent_count': counts[:, 1],
+            'unclear_count': counts[:, 2],
+            'attendance_percentage': percentage,
+            'status': np.where(percentage < threshold, 'Defaulter', 'Regular').astype(object)
+        })
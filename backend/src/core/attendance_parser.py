@@ -0,0 +1,282 @@
+import re
+from typing import List, Dict, Any, Optional, Sequence, Iterable, Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How attendance mark characters count
+PRESENT_MARKS = frozenset('P✓Y1')
+ABSENT_MARKS = frozenset('A✗X0-')
+
+DEFAULT_ROLL_PATTERNS = [r'\b23\d{6}\b']
+
+# Compiled once for every processor
+_SEPARATORS = re.compile(r'[|_\[\]()]+')
+_ROLL = re.compile(r'\b(23\d{6})\b')
+# The same roll number in a line before separators are blanked ('_' is a word character)
+_RAW_ROLL = re.compile(r'(?<![^\W_])23\d{6}(?![^\W_])')
+_NAME_AFTER_ROLL = re.compile(r'23\d{6}\s+([A-Za-z\s]+?)(?:\s+[PA✓✗XY01-]|$)')
+_MARK = re.compile(r'[PA✓✗XY01-]')
+_PA_OR_DIGITS = re.compile(r'\b[PA]\b|\d+')
+_NON_WORD = re.compile(r'[^\w\s]')
+_PRESENT_WORD = re.compile(r'\bP\b|\bpresent\b', re.IGNORECASE)
+_ABSENT_WORD = re.compile(r'\bA\b|\babsent\b', re.IGNORECASE)
+_NAME_CELL = re.compile(r'[A-Za-z\s]+')
+_MARK_CELL = re.compile(r'[PA✓✗XY01-]+')
+_NON_ALNUM = re.compile(r'[^A-Za-z0-9]')
+_COLUMN_SPLIT = re.compile(r'\s{2,}|\t|[|_\[\]]+')
+_ROLL_ONLY = re.compile(r'\s*(23\d{6})\s*')
+_CAPS_WORD = re.compile(r'\b[A-Z]{2,}[A-Z\s]*\b')
+_E_NOISE = re.compile(r'[E\s]+')
+
+# Bracket characters blanked by the fast name cleaner, as a str.translate table
+_FAST_BRACKETS = str.maketrans({c: ' ' for c in '|_[]{}()<>'})
+
+
+def _is_word_char(char: str) -> bool:
+    """True for regex word characters (an empty string is a boundary)"""
+    return char.isalnum() or char == '_'
+
+
+def _remove_word(text: str, word: str) -> str:
+    """
+    Remove the whole-word occurrences of a word made of word characters,
+    as a word-boundary regex would, without compiling a pattern per word
+    """
+    parts = text.split(word)
+    if len(parts) == 1:
+        return text
+
+    kept = [parts[0]]
+    last = len(parts) - 1
+    for i in range(1, len(parts)):
+        before, after = parts[i - 1], parts[i]
+        # An empty part between two occurrences means they touch
+        left_open = not (_is_word_char(before[-1:]) or (not before and i > 1))
+        right_open = not (_is_word_char(after[:1]) or (not after and i < last))
+        if not (left_open and right_open):
+            kept.append(word)
+        kept.append(after)
+    return ''.join(kept)
+
+
+def count_marks(marks: Sequence[str]) -> Dict[str, Any]:
+    """Present/absent counts and percentage of a sequence of mark characters"""
+    present = sum(1 for mark in marks if mark.upper() in PRESENT_MARKS)
+    absent = sum(1 for mark in marks if mark.upper() in ABSENT_MARKS)
+    total = len(marks)
+    percentage = (present / total * 100) if total > 0 else 0
+    return {
+        'present_count': present,
+        'absent_count': absent,
+        'total_classes': total,
+        'attendance_percentage': round(percentage, 2)
+    }
+
+
+class AttendanceLineParser:
+    """
+    Compiled attendance line parser shared by every processor.
+
+    All patterns are compiled once (the processor's roll patterns when the
+    parser is built). Lines without a roll number are rejected by a single
+    search before any cleanup, the name cleanup folds the removal passes
+    that do not interact into one substitution, and marks are counted with
+    C-level string scans.
+
+    The outputs are the same as the per-processor parsers this replaces.
+    parse_lines, extract_students and split_table_lines work on many lines
+    at once.
+    """
+
+    def __init__(self, roll_patterns: Optional[Sequence[str]] = None):
+        # Highest priority first
+        self.roll_patterns = list(roll_patterns or DEFAULT_ROLL_PATTERNS)
+        self._roll_searches = [re.compile(pattern).search for pattern in self.roll_patterns]
+
+    # Structured line records (OCR of one table line)
+
+    def parse_line(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse one attendance line (roll number, name, marks) into a record,
+        or None if it holds no roll number
+        """
+        # Most OCR lines hold no roll number and are rejected before any cleanup
+        if not _RAW_ROLL.search(text):
+            return None
+
+        # Blank table separators and collapse whitespace
+        text = ' '.join(_SEPARATORS.sub(' ', text).split())
+
+        roll_match = _ROLL.search(text)
+        if not roll_match:
+            return None
+
+        # Name: words after the roll number, before the attendance markers
+        name_match = _NAME_AFTER_ROLL.search(text)
+        name = ' '.join(word.capitalize() for word in name_match.group(1).split() if len(word) > 1) if name_match else ""
+
+        # Every mark character counts either way, so absences are the rest
+        marks = _MARK.findall(text)
+        total = len(marks)
+        present = text.count('P') + text.count('✓') + text.count('Y') + text.count('1')
+        return {
+            'roll_number': roll_match.group(1),
+            'name': name,
+            'present_count': present,
+            'absent_count': total - present,
+            'total_classes': total,
+            'attendance_percentage': round(present / total * 100, 2) if total > 0 else 0,
+            'attendance_marks': marks,
+            'raw_text': text
+        }
+
+    def parse_lines(self, lines: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """parse_line over many lines"""
+        return [self.parse_line(line) for line in lines]
+
+    # Student records from free OCR text
+
+    def find_roll(self, line: str) -> Optional[str]:
+        """
+        The first match of the highest-priority roll pattern that matches
+        anywhere in the line
+        """
+        # Precompiled searches in priority order; the first pattern settles
+        # almost every line
+        for search in self._roll_searches:
+            match = search(line)
+            if match:
+                return match.group()
+        return None
+
+    @staticmethod
+    def clean_name(line: str, roll_number: str) -> str:
+        """
+        Name left in a line once the roll number, P/A markers, digits and
+        punctuation are removed
+        """
+        # The roll number is a whole word, so removing it first does not change
+        # which markers are whole words; an all-digit roll goes with the digits
+        if not roll_number.isdigit():
+            line = _remove_word(line, roll_number)
+        name = _PA_OR_DIGITS.sub('', line)
+        return ' '.join(_NON_WORD.sub(' ', name).split())
+
+    @staticmethod
+    def clean_name_fast(line: str, roll_number: str) -> str:
+        """
+        Quicker name cleanup: every occurrence of the roll number and the
+        brackets are dropped, then P/A markers and digits
+        """
+        name = line.replace(roll_number, '').strip().translate(_FAST_BRACKETS)
+        return ' '.join(_PA_OR_DIGITS.sub('', name).split())
+
+    @staticmethod
+    def attendance_status(line: str) -> str:
+        """Present / Absent / Unknown from P, A, present or absent words"""
+        if _PRESENT_WORD.search(line):
+            return "Present"
+        if _ABSENT_WORD.search(line):
+            return "Absent"
+        return "Unknown"
+
+    def extract_students(self, text: str, score: Callable[[str], float],
+                         min_line_length: int = 5, min_name_length: int = 3,
+                         fast: bool = False) -> List[Dict[str, Any]]:
+        """
+        Student records from multi-line OCR text, one per line holding a
+        roll number and a name of at least min_name_length characters;
+        `fast` selects clean_name_fast
+        """
+        clean = self.clean_name_fast if fast else self.clean_name
+        students = []
+        for line_num, line in enumerate(text.split('\n')):
+            line = line.strip()
+            if len(line) < min_line_length:
+                continue
+
+            roll_number = self.find_roll(line)
+            if not roll_number:
+                continue
+
+            name = clean(line, roll_number)
+            if name and len(name) >= min_name_length:
+                students.append({
+                    'roll_number': roll_number,
+                    'name': name.title(),
+                    'attendance': self.attendance_status(line),
+                    'line_number': line_num + 1,
+                    'raw_line': line,
+                    'confidence': score(line)
+                })
+        return students
+
+    # Table rows (cells already split)
+
+    def parse_row(self, row: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """
+        Attendance record from the cells of one table row: the roll number
+        cell, the first name-like cell and all mark cells, in column order
+        """
+        roll_number = None
+        name = ""
+        marks = []
+
+        for cell in row:
+            roll_match = _ROLL.search(cell)
+            if roll_match:
+                roll_number = roll_match.group(1)
+                continue
+
+            stripped = cell.strip()
+            if _NAME_CELL.fullmatch(stripped) and len(stripped) > 2:
+                if not name:
+                    name = stripped
+                continue
+
+            if _MARK_CELL.fullmatch(stripped):
+                marks.extend(stripped)
+
+        if not roll_number:
+            return None
+
+        record = {'roll_number': roll_number, 'name': name.title() if name else ""}
+        record.update(count_marks(marks))
+        record['attendance_marks'] = marks
+        record['raw_row'] = row
+        return record
+
+    @staticmethod
+    def _split_columns(line: str, min_length: int) -> List[str]:
+        columns = []
+        for column in _COLUMN_SPLIT.split(line):
+            column = column.strip('|_[]() ').strip()
+            if len(column) >= min_length and (min_length < 2 or not _E_NOISE.fullmatch(column)):
+                columns.append(column)
+        return columns
+
+    def split_table_lines(self, text: str) -> List[List[str]]:
+        """
+        Column-split rows from OCR text: lines with a roll number, lines with
+        only a roll number, and lines of capitalized names
+        """
+        table = []
+        for line in text.split('\n'):
+            line = line.strip()
+            # Skip empty lines and lines that are mostly noise
+            if len(_NON_ALNUM.sub('', line)) < 3:
+                continue
+
+            if _ROLL.search(line):
+                columns = self._split_columns(line, 1)
+                if len(columns) >= 2:
+                    table.append(columns)
+            elif _ROLL_ONLY.fullmatch(line):
+                table.append([_ROLL_ONLY.fullmatch(line).group(1), ""])
+            elif _CAPS_WORD.search(line) and not _E_NOISE.fullmatch(line):
+                columns = self._split_columns(line, 2)
+                if len(columns) >= 2:
+                    table.append(columns)
+        return table
+
@@ -1,5 +1,6 @@
 import os
 import pandas as pd
+import numpy as np
 from datetime import datetime
 from typing import List, Dict, Any
 from ..config import Config
@@ -26,6 +27,7 @@ class AttendanceDigitizationSystem:
             'raw_data': pd.DataFrame(),
             'aggregated_data': pd.DataFrame(),
             'anomalies': [],
+            'anomaly_records': pd.DataFrame(),
             'message': ''
         }
         
@@ -76,9 +78,12 @@ class AttendanceDigitizationSystem:
                 results['aggregated_data'] = self.data_processor.aggregate_attendance(
                     results['raw_data']
                 )
-                results['anomalies'] = self.data_processor.detect_anomalies(
+                results['anomaly_records'] = self.data_processor.detect_anomaly_records(
                     results['raw_data']
                 )
+                results['anomalies'] = self.data_processor.detect_anomalies(
+                    results['raw_data'], results['anomaly_records']
+                )
                 results['success'] = True
                 results['message'] = f"Successfully processed {len(results['raw_data'])} records"
             else:
@@ -91,7 +96,8 @@ class AttendanceDigitizationSystem:
     
     def generate_reports(self, aggregated_data: pd.DataFrame, 
                         raw_data: pd.DataFrame, anomalies: List[str],
-                        output_prefix: str = "attendance_report") -> str:
+                        output_prefix: str = "attendance_report",
+                        anomaly_records: pd.DataFrame = None) -> str:
         """
         Generate Excel reports
         """
@@ -126,6 +132,10 @@ class AttendanceDigitizationSystem:
             # Anomalies
             anomaly_df = pd.DataFrame({'Anomaly': anomalies})
             anomaly_df.to_excel(writer, sheet_name='Anomalies', index=False)
+            
+            # One row per anomalous student, subject or page
+            if anomaly_records is not None and not anomaly_records.empty:
+                anomaly_records.to_excel(writer, sheet_name='Anomaly_Details', index=False)
         
         return output_file
     
@@ -136,18 +146,20 @@ class AttendanceDigitizationSystem:
         if aggregated_data.empty:
             return {}
             
+        # One pass over the percentages instead of a filtered copy per bucket
+        percentage = aggregated_data['attendance_percentage'].to_numpy()
+        excellent = int(np.count_nonzero(percentage >= 90))
+        at_least_regular = int(np.count_nonzero(percentage >= 75))
+        
         stats = {
             'total_students': len(aggregated_data),
             'average_attendance': aggregated_data['attendance_percentage'].mean(),
-            'defaulters_count': len(aggregated_data[aggregated_data['status'] == 'Defaulter']),
+            'defaulters_count': int(np.count_nonzero(aggregated_data['status'].to_numpy() == 'Defaulter')),
             'subjects': aggregated_data['subject'].unique().tolist(),
             'attendance_distribution': {
-                'excellent': len(aggregated_data[aggregated_data['attendance_percentage'] >= 90]),
-                'good': len(aggregated_data[
-                    (aggregated_data['attendance_percentage'] >= 75) & 
-                    (aggregated_data['attendance_percentage'] < 90)
-                ]),
-                'defaulter': len(aggregated_data[aggregated_data['attendance_percentage'] < 75])
+                'excellent': excellent,
+                'good': at_least_regular - excellent,
+                'defaulter': int(np.count_nonzero(percentage < 75))
             }
         }
         
@@ -0,0 +1,70 @@
+import numpy as np
+import threading
+from typing import Dict, List, Tuple, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BufferPool:
+    """
+    Free lists of preallocated image buffers keyed by shape and dtype.
+
+    Pages of a document are almost always the same size, so the full-page
+    arrays of one page (grayscale, blur, thresholds, edges, ...) can be
+    handed to the next page instead of going back to the allocator. OpenCV
+    writes into a supplied dst array in place when its shape and type
+    match, so a warm pool serves a whole document with no new page-sized
+    allocations.
+
+    Buffers are handed out uninitialized; acquire/release are thread safe
+    so strip-tiled bands can share one pool.
+    """
+
+    def __init__(self, max_per_shape: int = 16):
+        # Free buffers kept per (shape, dtype); extra releases are dropped
+        self.max_per_shape = max_per_shape
+        self._free: Dict[Tuple[Any, ...], List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.reuses = 0
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """A buffer of the given shape and dtype, reused when one is free"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+            self.allocated_bytes += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, *buffers: np.ndarray):
+        """Return buffers to the pool; callers must not use them afterwards"""
+        with self._lock:
+            for buffer in buffers:
+                free = self._free.setdefault((buffer.shape, buffer.dtype.str), [])
+                if len(free) < self.max_per_shape:
+                    free.append(buffer)
+
+    def clear(self):
+        """Drop all free buffers"""
+        with self._lock:
+            self._free.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Allocation statistics"""
+        with self._lock:
+            free = sum(len(buffers) for buffers in self._free.values())
+            free_bytes = sum(b.nbytes for buffers in self._free.values() for b in buffers)
+        return {
+            'allocations': self.allocations,
+            'allocated_bytes': self.allocated_bytes,
+            'reuses': self.reuses,
+            'free_buffers': free,
+            'free_bytes': free_bytes
+        }
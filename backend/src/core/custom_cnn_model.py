@@ -3,14 +3,163 @@ import cv2
 import tensorflow as tf
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from sklearn.preprocessing import LabelBinarizer
 import os
+import time
 import logging
-from typing import List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Dict, Any, Optional
+from .glyph_normalizer import GlyphBatchNormalizer
+from .preprocessed_page import PreprocessedPage
+from .synthetic_glyphs import (
+    SyntheticGlyphGenerator, write_glyph_shard, read_glyph_shard, list_glyph_shards,
+    TICK, CROSS, BLANK, SIGNATURE
+)
 
 logger = logging.getLogger(__name__)
 
+class SyntheticGlyphSequence(tf.keras.utils.Sequence):
+    """
+    Keras input pipeline over synthetic glyphs.
+
+    Each item is one training batch. Batches are either rendered on the fly,
+    seeded by (seed, epoch, index) so parallel workers produce reproducible,
+    non-overlapping data, or read back from on-disk shards of one batch each.
+    """
+    
+    def __init__(self, generator: SyntheticGlyphGenerator, normalizer: GlyphBatchNormalizer,
+                 batch_size: int = 128, steps: int = 200, seed: int = 0,
+                 shard_paths: Optional[List[str]] = None):
+        self.generator = generator
+        self.normalizer = normalizer
+        self.batch_size = batch_size
+        self.steps = steps
+        self.seed = seed
+        self.shard_paths = shard_paths or []
+        self.epoch = 0
+        self._one_hot = np.eye(len(generator.labels), dtype=np.float32)
+    
+    def __len__(self) -> int:
+        return len(self.shard_paths) if self.shard_paths else self.steps
+    
+    def render_batch(self, idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Render batch `idx` of the current epoch as (uint8 glyphs, label indices)"""
+        rng = np.random.default_rng([self.seed, self.epoch, idx])
+        glyphs, labels = self.generator.generate(self.batch_size, rng)
+        return self.normalizer.binarize(glyphs), labels
+    
+    def __getitem__(self, idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.shard_paths:
+            binary, labels = read_glyph_shard(self.shard_paths[idx])
+        else:
+            binary, labels = self.render_batch(idx)
+        
+        return self.normalizer.to_tensor(binary), self._one_hot[labels]
+    
+    def on_epoch_end(self):
+        self.epoch += 1
+        if self.shard_paths:
+            # Visit shards in a different order every epoch
+            order = np.random.default_rng([self.seed, self.epoch]).permutation(len(self.shard_paths))
+            self.shard_paths = [self.shard_paths[i] for i in order]
+
+def _write_shard_worker(args: Tuple[SyntheticGlyphSequence, int, str]) -> str:
+    """Render one batch and write it as a shard (runs in a worker process)"""
+    sequence, idx, path = args
+    binary, labels = sequence.render_batch(idx)
+    write_glyph_shard(path, binary, labels)
+    return path
+
+def write_synthetic_shards(generator: SyntheticGlyphGenerator, normalizer: GlyphBatchNormalizer,
+                           shard_dir: str, num_shards: int, batch_size: int = 128,
+                           seed: int = 0, workers: Optional[int] = None) -> List[str]:
+    """
+    Render synthetic glyph batches once and store them as on-disk shards
+    """
+    sequence = SyntheticGlyphSequence(generator, normalizer, batch_size, num_shards, seed)
+    jobs = [(sequence, i, os.path.join(shard_dir, f"shard_{i:05d}.npz")) for i in range(num_shards)]
+    
+    os.makedirs(shard_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        paths = list(executor.map(_write_shard_worker, jobs))
+    
+    logger.info(f"Wrote {len(paths)} shards of {batch_size} glyphs to {shard_dir}")
+    return paths
+
+class ThroughputCallback(tf.keras.callbacks.Callback):
+    """Measure training throughput in samples per second for every epoch"""
+    
+    def __init__(self, batch_size: int):
+        super().__init__()
+        self.batch_size = batch_size
+        self.samples_per_second = []
+        self._start = 0.0
+        self._last = 0.0
+        self._samples = 0
+    
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = self._last = time.perf_counter()
+        self._samples = 0
+    
+    def on_train_batch_end(self, batch, logs=None):
+        self._samples += self.batch_size
+        self._last = time.perf_counter()
+    
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = self._last - self._start
+        rate = self._samples / elapsed if elapsed > 0 else 0.0
+        self.samples_per_second.append(rate)
+        if logs is not None:
+            logs['samples_per_second'] = rate
+        logger.info(f"Epoch {epoch + 1}: {self._samples} samples in {elapsed:.2f}s ({rate:.0f} samples/s)")
+
+def fit_on_synthetic_glyphs(model, generator: SyntheticGlyphGenerator, normalizer: GlyphBatchNormalizer,
+                            epochs: int = 10, steps_per_epoch: int = 200, batch_size: int = 128,
+                            workers: Optional[int] = None, shard_dir: Optional[str] = None,
+                            num_shards: int = 0, validation_steps: int = 10, seed: int = 0) -> Dict[str, Any]:
+    """
+    Fit a compiled Keras model on synthetic glyphs through the parallel,
+    prefetching Sequence pipeline and report samples/second per epoch
+    """
+    workers = workers or os.cpu_count() or 1
+    
+    shard_paths = []
+    if shard_dir:
+        shard_paths = list_glyph_shards(shard_dir)
+        if not shard_paths:
+            shard_paths = write_synthetic_shards(
+                generator, normalizer, shard_dir, num_shards or steps_per_epoch, batch_size, seed, workers
+            )
+    
+    train_data = SyntheticGlyphSequence(generator, normalizer, batch_size, steps_per_epoch, seed, shard_paths)
+    validation_data = None
+    if validation_steps:
+        validation_data = SyntheticGlyphSequence(generator, normalizer, batch_size, validation_steps, seed + 1)
+    
+    throughput = ThroughputCallback(batch_size)
+    logger.info(f"Training on synthetic data: {epochs} epochs x {len(train_data)} batches of {batch_size}, "
+                f"{workers} workers{' from shards' if shard_paths else ''}")
+    
+    history = model.fit(
+        train_data,
+        epochs=epochs,
+        validation_data=validation_data,
+        callbacks=[throughput],
+        workers=workers,
+        use_multiprocessing=workers > 1,
+        max_queue_size=max(2 * workers, 10),
+        verbose=0
+    )
+    
+    mean_rate = float(np.mean(throughput.samples_per_second)) if throughput.samples_per_second else 0.0
+    logger.info(f"Training finished: {mean_rate:.0f} samples/s on average")
+    
+    return {
+        'history': history.history,
+        'samples_per_second': throughput.samples_per_second,
+        'mean_samples_per_second': mean_rate
+    }
+
 class CustomCNNModel:
     """
     Custom CNN model for character recognition in attendance sheets
@@ -20,6 +169,7 @@ class CustomCNNModel:
         self.model = None
         self.characters_list = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
         self.label_binarizer = LabelBinarizer()
+        self.normalizer = GlyphBatchNormalizer((28, 28))
         self.model_path = model_path or 'models/custom_ocr_model.h5'
         
         # Initialize label binarizer
@@ -72,31 +222,22 @@ class CustomCNNModel:
         )
         
         logger.info("Created new CNN model")
-        logger.info(f"Model summary:\n{self.model.summary()}")
+        
+        # model.summary() prints the whole architecture; only pay for it when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            self.model.summary(print_fn=logger.debug)
     
     def preprocess_character_image(self, image: np.ndarray) -> np.ndarray:
         """
         Preprocess a character image for the CNN model
         """
-        # Ensure grayscale
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
-        
-        # Apply threshold
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
-        
-        # Resize to 28x28
-        resized = cv2.resize(thresh, (28, 28))
-        
-        # Normalize
-        normalized = resized.astype('float32') / 255.0
-        
-        # Add channel dimension
-        normalized = np.expand_dims(normalized, axis=-1)
-        
-        return normalized
+        return self.normalizer.normalize([image])[0]
+    
+    def preprocess_character_batch(self, images: List[np.ndarray]) -> np.ndarray:
+        """
+        Preprocess many character images into a single (N, 28, 28, 1) tensor
+        """
+        return self.normalizer.normalize(images)
     
     def predict_character(self, character_image: np.ndarray) -> Tuple[str, float]:
         """
@@ -105,11 +246,8 @@ class CustomCNNModel:
         if self.model is None:
             return "", 0.0
         
-        # Preprocess the image
-        processed = self.preprocess_character_image(character_image)
-        
-        # Add batch dimension
-        batch_input = np.expand_dims(processed, axis=0)
+        # Preprocess the image (already batched)
+        batch_input = self.preprocess_character_batch([character_image])
         
         # Make prediction
         prediction = self.model.predict(batch_input, verbose=0)
@@ -128,27 +266,26 @@ class CustomCNNModel:
         if self.model is None or not character_images:
             return []
         
-        # Preprocess all images
-        processed_images = []
-        for img in character_images:
-            processed = self.preprocess_character_image(img)
-            processed_images.append(processed)
+        # Preprocess all images into one batch tensor
+        batch_input = self.preprocess_character_batch(character_images)
         
-        # Stack into batch
-        batch_input = np.stack(processed_images)
+        return self.predict_tensor(batch_input)
+    
+    def predict_tensor(self, batch_input: np.ndarray) -> List[Tuple[str, float]]:
+        """
+        Predict characters for an already normalized (N, 28, 28, 1) batch
+        """
+        if self.model is None or len(batch_input) == 0:
+            return []
         
         # Make predictions
         predictions = self.model.predict(batch_input, verbose=0)
         
         # Extract results
-        results = []
-        for prediction in predictions:
-            char_index = np.argmax(prediction)
-            confidence = prediction[char_index]
-            character = self.characters_list[char_index]
-            results.append((character, float(confidence)))
+        char_indices = np.argmax(predictions, axis=1)
+        confidences = predictions[np.arange(len(predictions)), char_indices]
         
-        return results
+        return [(self.characters_list[idx], float(conf)) for idx, conf in zip(char_indices, confidences)]
     
     def extract_text_from_contours(self, image: np.ndarray, contours: List) -> str:
         """
@@ -161,8 +298,7 @@ class CustomCNNModel:
         from imutils.contours import sort_contours
         sorted_contours = sort_contours(contours, method='left-to-right')[0]
         
-        # Extract character images
-        character_images = []
+        # Collect character boxes
         character_boxes = []
         
         for contour in sorted_contours:
@@ -172,16 +308,14 @@ class CustomCNNModel:
             if w < 10 or h < 15 or w > 100 or h > 100:
                 continue
             
-            # Extract character ROI
-            char_roi = image[y:y+h, x:x+w]
-            character_images.append(char_roi)
             character_boxes.append((x, y, w, h))
         
-        if not character_images:
+        if not character_boxes:
             return ""
         
-        # Predict characters
-        predictions = self.predict_characters_batch(character_images)
+        # Normalize all characters straight from the page and predict in one batch
+        batch_input = self.normalizer.normalize_boxes(image, character_boxes)
+        predictions = self.predict_tensor(batch_input)
         
         # Construct text with spacing logic
         text = ""
@@ -204,13 +338,10 @@ class CustomCNNModel:
         """
         Complete pipeline: detect characters and recognize them
         """
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-        
-        # Preprocess for contour detection
-        blur = cv2.GaussianBlur(gray, (3, 3), 0)
-        adaptive = cv2.adaptiveThreshold(blur, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 9)
-        inverted = 255 - adaptive
+        # Grayscale and inverted adaptive threshold (shared when given a page or region)
+        page = PreprocessedPage.wrap(image)
+        gray = page.gray
+        inverted = page.adaptive(3, 11, 9, True)
         
         # Morphological operations
         kernel = np.ones((2, 2), np.uint8)
@@ -222,6 +353,15 @@ class CustomCNNModel:
         # Extract text
         return self.extract_text_from_contours(gray, contours)
     
+    def warm_up(self, batch_size: int = 8):
+        """
+        Run a dummy batch through the model so the first real request does
+        not pay for building the predict function and tracing the graph
+        """
+        if self.model is None:
+            return
+        self.predict_tensor(np.zeros((batch_size, 28, 28, 1), dtype=np.float32))
+    
     def save_model(self, path: Optional[str] = None):
         """Save the trained model"""
         if self.model is None:
@@ -239,23 +379,40 @@ class CustomCNNModel:
         except Exception as e:
             logger.error(f"Failed to save model: {e}")
     
-    def train_on_synthetic_data(self, epochs: int = 10):
+    def write_synthetic_shards(self, shard_dir: str, num_shards: int, batch_size: int = 128,
+                               seed: int = 0, workers: Optional[int] = None) -> List[str]:
         """
-        Train the model on synthetic data (placeholder for actual training)
-        This would be used if you have training data available
+        Render synthetic character batches once and store them as on-disk shards
         """
-        logger.info("Training on synthetic data would be implemented here")
-        logger.info("This requires a dataset of character images with labels")
+        generator = SyntheticGlyphGenerator(self.characters_list)
+        return write_synthetic_shards(generator, self.normalizer, shard_dir, num_shards, batch_size, seed, workers)
+    
+    def train_on_synthetic_data(self, epochs: int = 10, steps_per_epoch: int = 200, batch_size: int = 128,
+                                workers: Optional[int] = None, shard_dir: Optional[str] = None,
+                                num_shards: int = 0, validation_steps: int = 10, seed: int = 0,
+                                save: bool = True) -> Dict[str, Any]:
+        """
+        Train the model on synthetic attendance glyphs.
+        
+        Batches are rendered on the fly by `workers` processes and prefetched
+        into a queue while the model trains. With `shard_dir`, training reads
+        pre-rendered shards instead; if the directory has none yet,
+        `num_shards` (default `steps_per_epoch`) are generated first.
+        Returns the Keras history and the throughput of every epoch.
+        """
+        if self.model is None:
+            self._create_model()
+        
+        generator = SyntheticGlyphGenerator(self.characters_list)
+        results = fit_on_synthetic_glyphs(
+            self.model, generator, self.normalizer, epochs, steps_per_epoch, batch_size,
+            workers, shard_dir, num_shards, validation_steps, seed
+        )
         
-        # Placeholder for training logic
-        # In a real implementation, you would:
-        # 1. Load training data (character images and labels)
-        # 2. Preprocess the data
-        # 3. Create data generators for augmentation
-        # 4. Train the model
-        # 5. Save the trained model
+        if save:
+            self.save_model()
         
-        pass
+        return results
     
     def evaluate_on_test_data(self, test_images: List[np.ndarray], test_labels: List[str]) -> Dict[str, float]:
         """
@@ -265,8 +422,7 @@ class CustomCNNModel:
             return {}
         
         # Preprocess test images
-        processed_images = [self.preprocess_character_image(img) for img in test_images]
-        batch_input = np.stack(processed_images)
+        batch_input = self.preprocess_character_batch(test_images)
         
         # Convert labels to indices
         label_indices = [self.characters_list.index(label) for label in test_labels if label in self.characters_list]
@@ -284,4 +440,133 @@ class CustomCNNModel:
         return {
             'loss': float(loss),
             'accuracy': float(accuracy)
-        }
\ No newline at end of file
+        }
+
+class AttendanceMarkClassifier:
+    """
+    Tiny CNN that classifies single attendance cells (present, absent,
+    blank, tick, cross, signature) without general-purpose OCR.
+
+    All mark cells of a table are normalized into one tensor and classified
+    with a single inference call.
+    """
+    
+    # Class names and the glyph rendered for each class during training
+    MARK_CLASSES = ['present', 'absent', 'blank', 'tick', 'cross', 'signature']
+    MARK_GLYPHS = ['P', 'A', BLANK, TICK, CROSS, SIGNATURE]
+    
+    # Attendance symbol emitted for each class (None for an empty cell)
+    MARK_SYMBOLS = {
+        'present': 'P',
+        'absent': 'A',
+        'blank': None,
+        'tick': '✓',
+        'cross': '✗',
+        'signature': 'P',
+    }
+    
+    def __init__(self, model_path: Optional[str] = None, input_size: int = 24):
+        self.model = None
+        self.is_trained = False
+        self.model_path = model_path or 'models/attendance_mark_model.h5'
+        self.normalizer = GlyphBatchNormalizer((input_size, input_size))
+        self.input_size = input_size
+        
+        # Fraction of the cell trimmed on every side to keep ruling lines out of the crop
+        self.cell_inset = 0.12
+        
+        self._load_model()
+    
+    def _load_model(self):
+        """Load a trained mark model if available, otherwise build an untrained one"""
+        if os.path.exists(self.model_path):
+            try:
+                self.model = load_model(self.model_path)
+                self.is_trained = True
+                logger.info(f"Loaded mark classifier from {self.model_path}")
+                return
+            except Exception as e:
+                logger.warning(f"Failed to load mark classifier: {e}")
+        
+        self._create_model()
+    
+    def _create_model(self):
+        """Create the mark classifier architecture"""
+        self.model = Sequential([
+            Conv2D(filters=8, kernel_size=(3, 3), activation='relu', input_shape=(self.input_size, self.input_size, 1)),
+            MaxPooling2D(pool_size=(2, 2)),
+            Conv2D(filters=16, kernel_size=(3, 3), activation='relu'),
+            MaxPooling2D(pool_size=(2, 2)),
+            Flatten(),
+            Dense(32, activation='relu'),
+            Dense(len(self.MARK_CLASSES), activation='softmax')
+        ])
+        
+        self.model.compile(
+            loss='categorical_crossentropy',
+            optimizer='adam',
+            metrics=['accuracy']
+        )
+        
+        self.is_trained = False
+        logger.info("Created new mark classifier")
+    
+    def _inset_boxes(self, cells: List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int]]:
+        """Convert (x1, y1, x2, y2) cells to inset (x, y, w, h) boxes"""
+        boxes = []
+        for x1, y1, x2, y2 in cells:
+            dx = int((x2 - x1) * self.cell_inset)
+            dy = int((y2 - y1) * self.cell_inset)
+            boxes.append((x1 + dx, y1 + dy, max(1, x2 - x1 - 2 * dx), max(1, y2 - y1 - 2 * dy)))
+        return boxes
+    
+    def classify_cells(self, image: np.ndarray, cells: List[Tuple[int, int, int, int]]) -> List[Tuple[str, float]]:
+        """
+        Classify every (x1, y1, x2, y2) cell of a page in one batched inference call
+        """
+        if self.model is None or not cells:
+            return []
+        
+        batch_input = self.normalizer.normalize_boxes(image, self._inset_boxes(cells))
+        predictions = np.asarray(self.model.predict_on_batch(batch_input))
+        
+        class_indices = np.argmax(predictions, axis=1)
+        confidences = predictions[np.arange(len(predictions)), class_indices]
+        
+        return [(self.MARK_CLASSES[idx], float(conf)) for idx, conf in zip(class_indices, confidences)]
+    
+    def warm_up(self, batch_size: int = 8):
+        """Run a dummy batch through the classifier to trace its graph ahead of time"""
+        if self.model is None:
+            return
+        self.model.predict_on_batch(np.zeros((batch_size, self.input_size, self.input_size, 1), dtype=np.float32))
+    
+    def save_model(self, path: Optional[str] = None):
+        """Save the trained mark classifier"""
+        save_path = path or self.model_path
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        
+        try:
+            self.model.save(save_path)
+            logger.info(f"Mark classifier saved to {save_path}")
+        except Exception as e:
+            logger.error(f"Failed to save mark classifier: {e}")
+    
+    def train_on_synthetic_data(self, epochs: int = 10, steps_per_epoch: int = 200, batch_size: int = 256,
+                                workers: Optional[int] = None, shard_dir: Optional[str] = None,
+                                num_shards: int = 0, validation_steps: int = 10, seed: int = 0,
+                                save: bool = True) -> Dict[str, Any]:
+        """
+        Train the mark classifier on synthetic cells (see CustomCNNModel.train_on_synthetic_data)
+        """
+        generator = SyntheticGlyphGenerator(self.MARK_GLYPHS, crop_to_ink=False)
+        results = fit_on_synthetic_glyphs(
+            self.model, generator, self.normalizer, epochs, steps_per_epoch, batch_size,
+            workers, shard_dir, num_shards, validation_steps, seed
+        )
+        self.is_trained = True
+        
+        if save:
+            self.save_model()
+        
+        return results
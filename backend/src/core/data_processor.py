@@ -1,7 +1,65 @@
 import pandas as pd
+import numpy as np
 import re
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Callable
 from ..config import Config
+from .attendance_matrix import AttendanceMatrix
+
+# Categories of the normalized attendance_status column
+ATTENDANCE_STATUSES = ['Present', 'Absent', 'Unclear']
+
+# One aggregated row per student and subject
+GROUP_KEYS = ['roll_number', 'student_name', 'subject']
+
+# Anomaly records
+ANOMALY_COLUMNS = ['type', 'roll_number', 'subject', 'source', 'value', 'detail']
+ANOMALY_TITLES = {
+    'duplicate_identity': "Roll numbers repeated on a page",
+    'impossible_count': "More records than lectures on a page",
+    'conflicting_name': "Roll numbers with conflicting names",
+    'unclear_student': "Students with many unclear entries",
+    'unclear_page': "Pages with many unclear entries",
+    'attendance_jump': "Sudden attendance changes",
+    'invalid_roll': "Invalid roll numbers",
+    'missing_name': "Missing/invalid names for rolls",
+}
+ANOMALY_EXAMPLES = 5
+
+# Lecture labels are "<page>_lecture_<n>"
+_LECTURE_SUFFIX = re.compile(r'_lecture_\d+$')
+
+def _combine_codes(codes: List[np.ndarray], sizes: List[int]) -> np.ndarray:
+    """One int64 key per row from several factorized code arrays"""
+    key = np.zeros(len(codes[0]), dtype=np.int64)
+    for code, size in zip(codes, sizes):
+        key = key * size + code
+    return key
+
+def _split_codes(keys: np.ndarray, sizes: List[int]) -> List[np.ndarray]:
+    """The code arrays _combine_codes combined"""
+    codes = []
+    for size in reversed(sizes):
+        keys, code = np.divmod(keys, size)
+        codes.append(code)
+    return codes[::-1]
+
+def _outlier_limit(values: np.ndarray, floor: float) -> float:
+    """floor, raised to median + 3 scaled MADs once there are enough peers to estimate them"""
+    if len(values) < 3:
+        return floor
+    median = np.median(values)
+    mad = 1.4826 * np.median(np.abs(values - median))
+    return max(floor, median + 3 * mad)
+
+def _map_distinct(values, func: Callable[[Any], Any], missing: Any) -> np.ndarray:
+    """
+    func applied once per distinct value and broadcast back over all values;
+    missing values (NaN/None) get `missing`
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    lookup = np.array([func(value) for value in uniques] + [missing])
+    # factorize codes missing values as -1, the last lookup entry
+    return lookup[codes]
 
 class DataProcessor:
     def __init__(self):
@@ -27,6 +85,22 @@ class DataProcessor:
                 
         return 'Unclear'
     
+    def normalize_attendance_column(self, values) -> pd.Series:
+        """
+        Normalize a whole column of raw attendance values into a categorical
+        Present/Absent/Unclear column, same results as normalize_attendance_status
+        """
+        # A sheet has only a handful of distinct marks, so each one is looked up once
+        status_codes = {status: code for code, status in enumerate(ATTENDANCE_STATUSES)}
+        codes = _map_distinct(
+            values,
+            lambda value: status_codes[self.normalize_attendance_status(value)],
+            status_codes['Unclear']
+        )
+        statuses = pd.Categorical.from_codes(codes, categories=ATTENDANCE_STATUSES)
+        index = values.index if isinstance(values, pd.Series) else None
+        return pd.Series(statuses, index=index, name='attendance_status')
+    
     def validate_roll_number(self, roll_no: str) -> bool:
         """
         Validate roll number format
@@ -46,6 +120,14 @@ class DataProcessor:
             return False
         return len(str(name).strip()) > 1
     
+    def validate_roll_column(self, values) -> np.ndarray:
+        """validate_roll_number over a column, once per distinct roll number"""
+        return _map_distinct(values, self.validate_roll_number, False).astype(bool)
+    
+    def validate_name_column(self, values) -> np.ndarray:
+        """validate_name over a column, once per distinct name"""
+        return _map_distinct(values, self.validate_name, False).astype(bool)
+    
     def process_table_to_dataframe(self, table: List[List[str]], 
                                  subject: str = "Unknown", 
                                  date: str = "Unknown") -> pd.DataFrame:
@@ -55,37 +137,38 @@ class DataProcessor:
         if not table or len(table) < 1:
             return pd.DataFrame()
             
-        # Process all rows as data rows
-        processed_data = []
-        
-        for row in table:
-            if len(row) < 2:  # Need at least roll and name
-                continue
-                
-            # Extract roll number and name (usually first two columns)
-            roll_no = row[0] if len(row) > 0 else ""
-            name = row[1] if len(row) > 1 else ""
-            
-            # Remaining columns are attendance data
-            attendance_data = row[2:] if len(row) > 2 else [""]
+        # Need at least roll and name (usually the first two columns)
+        rows = [row for row in table if len(row) >= 2]
+        if not rows:
+            return pd.DataFrame()
             
-            # Create a row for each attendance entry
-            for i, attendance in enumerate(attendance_data):
-                processed_data.append({
-                    'roll_number': roll_no,
-                    'student_name': name,
-                    'subject': subject,
-                    'date': f"{date}_lecture_{i+1}",
-                    'attendance_raw': attendance,
-                    'attendance_status': self.normalize_attendance_status(attendance)
-                })
-        
-        df = pd.DataFrame(processed_data)
-        
-        if not df.empty:
-            # Add validation columns
-            df['valid_roll'] = df['roll_number'].apply(self.validate_roll_number)
-            df['valid_name'] = df['student_name'].apply(self.validate_name)
+        # Remaining columns are attendance data, one record per lecture;
+        # a row without any still gives one empty record
+        lectures = np.array([max(len(row) - 2, 1) for row in rows])
+        row_of_record = np.repeat(np.arange(len(rows)), lectures)
+        lecture = np.arange(len(row_of_record)) - np.repeat(np.cumsum(lectures) - lectures, lectures)
+        
+        # Per-row values are repeated by reference, never rebuilt per record
+        roll_numbers = np.array([row[0] for row in rows], dtype=object)
+        names = np.array([row[1] for row in rows], dtype=object)
+        attendance_raw = np.empty(len(row_of_record), dtype=object)
+        attendance_raw[:] = [cell for row in rows for cell in (row[2:] if len(row) > 2 else [""])]
+        
+        df = pd.DataFrame({
+            'roll_number': roll_numbers[row_of_record],
+            'student_name': names[row_of_record],
+            'subject': pd.Categorical.from_codes(np.zeros(len(lecture), dtype=np.int8), categories=[subject]),
+            'date': pd.Categorical.from_codes(
+                lecture, categories=[f"{date}_lecture_{i+1}" for i in range(lectures.max())]
+            ),
+            'lecture': (lecture + 1).astype(np.int32),
+            'attendance_raw': attendance_raw
+        })
+        df['attendance_status'] = self.normalize_attendance_column(df['attendance_raw'])
+        
+        # Add validation columns, checked once per row
+        df['valid_roll'] = self.validate_roll_column(roll_numbers)[row_of_record]
+        df['valid_name'] = self.validate_name_column(names)[row_of_record]
             
         return df
     
@@ -96,19 +179,28 @@ class DataProcessor:
         if df.empty:
             return pd.DataFrame()
             
-        # Group by student and subject
-        agg_data = df.groupby(['roll_number', 'student_name', 'subject']).agg({
-            'attendance_status': [
-                ('total_lectures', 'count'),
-                ('present_count', lambda x: (x == 'Present').sum()),
-                ('absent_count', lambda x: (x == 'Absent').sum()),
-                ('unclear_count', lambda x: (x == 'Unclear').sum())
-            ]
-        }).reset_index()
-        
-        # Flatten column names
-        agg_data.columns = ['roll_number', 'student_name', 'subject', 
-                           'total_lectures', 'present_count', 'absent_count', 'unclear_count']
+        # Group number of every record (NaN for records with a missing key)
+        # observed=True: categorical keys (subject) group like plain strings
+        grouped = df.groupby(GROUP_KEYS, sort=True, observed=True)
+        group_ids = grouped.ngroup().to_numpy()
+        agg_data = grouped.size().index.to_frame(index=False).astype(object)
+        
+        # Status counts of all groups in one pass over the category codes
+        status_codes = self._status_codes(df['attendance_status'])
+        keep = ~np.isnan(group_ids)
+        groups = group_ids[keep].astype(np.int64)
+        codes = status_codes[keep]
+        counts = np.bincount(
+            groups[codes >= 0] * len(ATTENDANCE_STATUSES) + codes[codes >= 0],
+            minlength=len(agg_data) * len(ATTENDANCE_STATUSES)
+        ).reshape(-1, len(ATTENDANCE_STATUSES))
+        
+        # Lectures with any status, including ones outside the three categories
+        agg_data['total_lectures'] = np.bincount(groups[df['attendance_status'].notna().to_numpy()[keep]],
+                                                 minlength=len(agg_data))
+        agg_data['present_count'] = counts[:, 0]
+        agg_data['absent_count'] = counts[:, 1]
+        agg_data['unclear_count'] = counts[:, 2]
         
         # Calculate percentage (excluding unclear entries from total)
         agg_data['valid_lectures'] = agg_data['present_count'] + agg_data['absent_count']
@@ -117,39 +209,216 @@ class DataProcessor:
         ).fillna(0)
         
         # Determine status
-        agg_data['status'] = agg_data['attendance_percentage'].apply(
-            lambda x: 'Defaulter' if x < self.config.DEFAULTER_THRESHOLD else 'Regular'
-        )
+        agg_data['status'] = np.where(
+            agg_data['attendance_percentage'] < self.config.DEFAULTER_THRESHOLD, 'Defaulter', 'Regular'
+        ).astype(object)
         
         return agg_data
     
-    def detect_anomalies(self, df: pd.DataFrame) -> List[str]:
+    @staticmethod
+    def _status_codes(statuses: pd.Series) -> np.ndarray:
+        """Present/Absent/Unclear codes 0/1/2 of a status column, -1 for anything else"""
+        if isinstance(statuses.dtype, pd.CategoricalDtype) and list(statuses.cat.categories) == ATTENDANCE_STATUSES:
+            return statuses.cat.codes.to_numpy()
+        # Plain string columns, e.g. frames concatenated or loaded from a report
+        return pd.Categorical(statuses, categories=ATTENDANCE_STATUSES).codes
+    
+    def to_attendance_matrix(self, df: pd.DataFrame) -> AttendanceMatrix:
         """
-        Detect anomalies in the attendance data
+        Students x lectures matrix of the records, one column per
+        (subject, date) lecture label
         """
-        anomalies = []
+        if df.empty:
+            return AttendanceMatrix(np.empty((0, 0), dtype=np.uint8), [])
+        
+        # Records without a roll number, subject or date have no cell
+        rows, roll_numbers = pd.factorize(df['roll_number'])
+        subject_codes, subjects = pd.factorize(df['subject'])
+        date_codes, dates = pd.factorize(df['date'])
+        keep = (rows >= 0) & (subject_codes >= 0) & (date_codes >= 0)
         
+        # One column per (subject, date) pair, numbered in order of appearance
+        columns, pairs = pd.factorize(subject_codes.astype(np.int64) * len(dates) + date_codes)
+        
+        # Status codes match the matrix codes; unknown statuses are unclear, missing ones missing
+        codes = self._status_codes(df['attendance_status']).astype(np.int16)
+        codes[codes < 0] = AttendanceMatrix.UNCLEAR
+        codes[df['attendance_status'].isna().to_numpy()] = AttendanceMatrix.MISSING
+        
+        matrix = np.full((len(roll_numbers), len(pairs)), AttendanceMatrix.MISSING, dtype=np.uint8)
+        matrix[rows[keep], columns[keep]] = codes[keep]
+        
+        # Name from each student's first record
+        first = np.unique(rows[keep], return_index=True)[1]
+        names = df['student_name'].to_numpy()[np.flatnonzero(keep)[first]]
+        return AttendanceMatrix(matrix, list(roll_numbers), list(names),
+                                [str(dates[pair % len(dates)]) for pair in pairs],
+                                [str(subjects[pair // len(dates)]) for pair in pairs])
+    
+    def detect_anomaly_records(self, df: pd.DataFrame, unclear_ratio_limit: float = 0.2,
+                               jump_threshold: float = 50.0, min_lectures: int = 3) -> pd.DataFrame:
+        """
+        Structured anomaly records (type, roll_number, subject, source, value,
+        detail) at student, subject and page level.
+        
+        Pages come from the lecture labels that process_file builds
+        ("<document>_table_<n>_lecture_<m>"). The checks are:
+        - duplicate_identity: a roll number on more than one row of a page (a
+          register spanning several pages lists its students on every page,
+          so pages are not compared with each other)
+        - conflicting_name: a roll number recorded under different names
+        - impossible_count: more records on a page than the page has lectures
+        - unclear_student / unclear_page: unclear ratio above
+          unclear_ratio_limit and, with at least three peers, above the
+          robust median + 3 MAD of its peers
+        - attendance_jump: percentage change of at least jump_threshold
+          points between consecutive pages of a student's subject
+        - invalid_roll / missing_name / unclear_overall: the record-level checks
+        
+        Every check is a pass of bincounts over integer group codes.
+        """
         if df.empty:
-            return ["No data to analyze"]
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        
+        student, rolls = pd.factorize(df['roll_number'])
+        subject, subjects = pd.factorize(df['subject'])
+        label, labels = pd.factorize(df['date'])
+        keep = (student >= 0) & (subject >= 0) & (label >= 0)
+        # No roll number was read: there is no student to check
+        if not keep.any():
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        status = self._status_codes(df['attendance_status'])
+        rolls, subjects = np.asarray(rolls, dtype=object), np.asarray(subjects, dtype=object)
+        
+        # Page of every lecture label (a handful of strings); every table row
+        # has exactly one record of its page's first lecture
+        page_of_label, pages = pd.factorize(np.array([_LECTURE_SUFFIX.sub('', str(l)) for l in labels], dtype=object))
+        first_lecture = np.array([str(l).endswith('_lecture_1') or not _LECTURE_SUFFIX.search(str(l))
+                                  for l in labels])
+        lectures_per_page = np.bincount(page_of_label, minlength=len(pages))
+        
+        student, subject, label, status = student[keep], subject[keep], label[keep], status[keep]
+        page = page_of_label[label]
+        unclear = status == ATTENDANCE_STATUSES.index('Unclear')
+        present = status == ATTENDANCE_STATUSES.index('Present')
+        absent = status == ATTENDANCE_STATUSES.index('Absent')
+        
+        found = []
+        
+        def record(kind, student_ids, subject_ids, sources, values, details):
+            count = len(student_ids) if isinstance(details, str) else len(details)
+            none = np.full(count, None, dtype=object)
+            found.append(pd.DataFrame({
+                'type': kind,
+                'roll_number': rolls[student_ids] if student_ids is not None else none,
+                'subject': subjects[subject_ids] if subject_ids is not None else none,
+                'source': sources if sources is not None else none,
+                'value': np.asarray(values, dtype=float) if values is not None else np.full(count, np.nan),
+                'detail': details
+            }))
+        
+        # Student x subject x page cells: records and attendance per page
+        cell, cell_keys = pd.factorize(_combine_codes([student, subject, page], [len(rolls), len(subjects), len(pages)]))
+        cell_student, cell_subject, cell_page = _split_codes(cell_keys, [len(rolls), len(subjects), len(pages)])
+        cell_records = np.bincount(cell, minlength=len(cell_keys))
         
-        # Check for duplicate roll numbers
-        duplicate_rolls = df[df.duplicated(['roll_number'], keep=False)]['roll_number'].unique()
-        if len(duplicate_rolls) > 0:
-            anomalies.append(f"Duplicate roll numbers found: {', '.join(duplicate_rolls)}")
+        # Same student on several rows of one page
+        cell_rows = np.bincount(cell, weights=first_lecture[label], minlength=len(cell_keys)).astype(np.int64)
+        hits = np.flatnonzero(cell_rows > 1)
+        if len(hits):
+            record('duplicate_identity', cell_student[hits], cell_subject[hits], pages[cell_page[hits]], cell_rows[hits],
+                   [f"on {n} rows" for n in cell_rows[hits]])
         
-        # Check for invalid roll numbers
-        invalid_rolls = df[~df['valid_roll']]['roll_number'].unique()
-        if len(invalid_rolls) > 0:
-            anomalies.append(f"Invalid roll numbers: {', '.join(invalid_rolls)}")
+        # More records on a page than the page has lectures
+        hits = np.flatnonzero(cell_records > lectures_per_page[cell_page])
+        if len(hits):
+            record('impossible_count', cell_student[hits], cell_subject[hits], pages[cell_page[hits]], cell_records[hits],
+                   [f"{n} records for {m} lectures" for n, m in zip(cell_records[hits], lectures_per_page[cell_page[hits]])])
         
-        # Check for missing names
-        missing_names = df[~df['valid_name']]['roll_number'].unique()
-        if len(missing_names) > 0:
-            anomalies.append(f"Missing/invalid names for rolls: {', '.join(missing_names)}")
+        # One roll number, several names
+        names, _ = pd.factorize(df['student_name'].to_numpy()[keep])
+        pairs = np.unique(_combine_codes([student, names + 1], [len(rolls), names.max() + 2]))
+        name_count = np.bincount(pairs // (names.max() + 2), minlength=len(rolls))
+        hits = np.flatnonzero(name_count > 1)
+        if len(hits):
+            record('conflicting_name', hits, None, None, name_count[hits], [f"{n} different names" for n in name_count[hits]])
         
-        # Check for high unclear percentage
-        unclear_percentage = (df['attendance_status'] == 'Unclear').sum() / len(df) * 100
+        # Unclear ratio per student and subject, against the other students of the subject
+        pair, pair_keys = pd.factorize(_combine_codes([student, subject], [len(rolls), len(subjects)]))
+        pair_student, pair_subject = _split_codes(pair_keys, [len(rolls), len(subjects)])
+        pair_records = np.bincount(pair, minlength=len(pair_keys))
+        ratio = np.bincount(pair, weights=unclear, minlength=len(pair_keys)) / pair_records
+        limit = np.full(len(pair_keys), unclear_ratio_limit)
+        for s in range(len(subjects)):
+            peers = pair_subject == s
+            limit[peers] = _outlier_limit(ratio[peers], unclear_ratio_limit)
+        hits = np.flatnonzero((ratio > limit) & (pair_records >= min_lectures))
+        if len(hits):
+            record('unclear_student', pair_student[hits], pair_subject[hits], None, ratio[hits],
+                   [f"{r:.0%} unclear of {n} records" for r, n in zip(ratio[hits], pair_records[hits])])
+        
+        # Unclear ratio per page, against the other pages
+        page_records = np.bincount(page, minlength=len(pages))
+        page_ratio = np.bincount(page, weights=unclear, minlength=len(pages)) / np.maximum(page_records, 1)
+        seen = page_records > 0
+        hits = np.flatnonzero(seen & (page_ratio > _outlier_limit(page_ratio[seen], unclear_ratio_limit)))
+        if len(hits):
+            record('unclear_page', None, None, pages[hits], page_ratio[hits],
+                   [f"{r:.0%} unclear of {n} records" for r, n in zip(page_ratio[hits], page_records[hits])])
+        
+        # Attendance percentage jumps between consecutive pages of a student's subject
+        cell_present = np.bincount(cell, weights=present, minlength=len(cell_keys))
+        cell_valid = cell_present + np.bincount(cell, weights=absent, minlength=len(cell_keys))
+        cell_percentage = np.divide(cell_present * 100, cell_valid, out=np.zeros(len(cell_keys)), where=cell_valid > 0)
+        order = np.argsort(cell_keys, kind='stable')
+        same_pair = np.diff(cell_keys[order] // len(pages)) == 0
+        jump = np.diff(cell_percentage[order])
+        hits = order[1:][same_pair & (np.abs(jump) >= jump_threshold)]
+        if len(hits):
+            jumps = jump[same_pair & (np.abs(jump) >= jump_threshold)]
+            record('attendance_jump', cell_student[hits], cell_subject[hits], pages[cell_page[hits]], jumps,
+                   [f"{j:+.0f} points from the previous page" for j in jumps])
+        
+        # Record-level checks, once per roll number
+        first = np.unique(student, return_index=True)[1]
+        for kind, column, detail in (('invalid_roll', 'valid_roll', "invalid roll number"),
+                                     ('missing_name', 'valid_name', "missing or invalid name")):
+            if column in df.columns:
+                invalid = np.zeros(len(rolls), dtype=bool)
+                invalid[student[~df[column].to_numpy(dtype=bool)[keep]]] = True
+                hits = np.flatnonzero(invalid)
+                if len(hits):
+                    record(kind, hits, None, None, None, detail)
+        
+        unclear_percentage = unclear.sum() / len(df) * 100
         if unclear_percentage > 20:
-            anomalies.append(f"High unclear attendance entries: {unclear_percentage:.1f}%")
+            record('unclear_overall', None, None, None, [unclear_percentage],
+                   [f"High unclear attendance entries: {unclear_percentage:.1f}%"])
+        
+        if not found:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        return pd.concat(found, ignore_index=True)[ANOMALY_COLUMNS]
+    
+    def detect_anomalies(self, df: pd.DataFrame, records: pd.DataFrame = None) -> List[str]:
+        """
+        Detect anomalies in the attendance data, one summary line per
+        anomaly type (from detect_anomaly_records, or the records given)
+        """
+        if df.empty:
+            return ["No data to analyze"]
+        
+        if records is None:
+            records = self.detect_anomaly_records(df)
+        anomalies = []
+        for kind, group in records.groupby('type', sort=False):
+            if kind == 'unclear_overall':
+                anomalies.extend(group['detail'])
+                continue
+            
+            # A few examples instead of every offending roll number or page
+            examples = (group['roll_number'] if group['roll_number'].notna().any() else group['source']).astype(str)
+            shown = ', '.join(dict.fromkeys(examples.head(ANOMALY_EXAMPLES)))
+            more = f" (+{len(group) - ANOMALY_EXAMPLES} more)" if len(group) > ANOMALY_EXAMPLES else ""
+            anomalies.append(f"{ANOMALY_TITLES[kind]} ({len(group)}): {shown}{more}")
         
-        return anomalies if anomalies else ["No anomalies detected"]
\ No newline at end of file
+        return anomalies if anomalies else ["No anomalies detected"]
@@ -4,6 +4,8 @@ import pytesseract
 import pandas as pd
 import re
 import os
+import time
+import threading
 import easyocr
 from PIL import Image
 from io import BytesIO
@@ -13,13 +15,24 @@ from imutils.contours import sort_contours
 import tensorflow as tf
 from sklearn.preprocessing import LabelBinarizer
 import logging
+from .glyph_normalizer import GlyphBatchNormalizer
+from .preprocessed_page import PreprocessedPage
+from .page_normalizer import PageNormalizer
+from .strip_tiler import StripTiler
+from .buffer_pool import BufferPool
+from .cell_occupancy import CellOccupancyAnalyzer
+from .attendance_parser import AttendanceLineParser
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EnhancedOCRProcessor:
-    def __init__(self):
+    # Pages taller than this (an A3 sheet rendered at 3x is ~5000 rows) are
+    # read band by band unless another strip tiler is given
+    TILED_PAGE_HEIGHT = 6000
+    
+    def __init__(self, strip_tiler: Optional[StripTiler] = None):
         # Initialize multiple OCR engines
         self.tesseract_available = True
         self.easyocr_reader = None
@@ -38,99 +51,72 @@ class EnhancedOCRProcessor:
         
         # Character mapping for custom model
         self.characters_list = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        self.glyph_normalizer = GlyphBatchNormalizer((28, 28))
+        
+        # One-shot orientation and skew correction for every page
+        self.page_normalizer = PageNormalizer()
+        
+        # Band-by-band processing of very tall pages
+        self.strip_tiler = strip_tiler if strip_tiler is not None else StripTiler(page_height=self.TILED_PAGE_HEIGHT)
+        
+        # Line detection runs on a downscaled pyramid level; boxes are mapped back
+        self.layout_scale = 0.5
+        
+        # Page-sized preprocessing buffers are recycled from page (and band) to page
+        self.buffer_pool = BufferPool()
+        
+        # Lines without enough ink are skipped before any engine is called
+        self.occupancy = CellOccupancyAnalyzer()
+        self.ocr_call_stats = {'performed': 0, 'skipped_blank': 0, 'retries_skipped': 0}
+        # Bands and concurrent-mode methods update the counts from several threads
+        self._stats_lock = threading.Lock()
+        
+        # Optional class roster (RosterIndex) that OCR'd roll numbers are snapped to
+        self.roster = None
+        
+        # Shared compiled attendance line parser
+        self.line_parser = AttendanceLineParser()
         
     def advanced_preprocess_image(self, image: np.ndarray, method: str = "adaptive") -> np.ndarray:
         """
         Advanced image preprocessing with multiple methods
         """
-        # Convert to grayscale if needed
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
-        
-        if method == "adaptive":
-            # Gaussian blur to reduce noise
-            blur = cv2.GaussianBlur(gray, (3, 3), 0)
-            
-            # Adaptive thresholding
-            adaptive = cv2.adaptiveThreshold(
-                blur, 255, 
-                cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                cv2.THRESH_BINARY, 11, 9
-            )
-            
-            # Invert for better OCR
-            inverted = 255 - adaptive
-            
-            # Morphological operations to clean up
-            kernel = np.ones((2, 2), np.uint8)
-            cleaned = cv2.morphologyEx(inverted, cv2.MORPH_CLOSE, kernel)
-            
-            return cleaned
-            
-        elif method == "otsu":
-            # Gaussian blur
-            blur = cv2.GaussianBlur(gray, (5, 5), 0)
-            
-            # Otsu's thresholding
-            _, thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            return thresh
-            
-        elif method == "morphological":
-            # Advanced morphological preprocessing
-            blur = cv2.GaussianBlur(gray, (3, 3), 0)
-            
-            # Adaptive threshold
-            adaptive = cv2.adaptiveThreshold(
-                blur, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 9
-            )
-            
-            # Inversion
-            inverted = 255 - adaptive
-            
-            # Dilation to connect broken characters
-            kernel = np.ones((3, 3), np.uint8)
-            dilated = cv2.dilate(inverted, kernel, iterations=1)
-            
-            # Edge detection for better character separation
-            edges = cv2.Canny(dilated, 40, 150)
-            
-            # Final dilation
-            final = cv2.dilate(edges, kernel, iterations=1)
-            
-            return final
-        
-        return gray
+        # Variants are memoized on the page, so repeated calls cost nothing
+        return PreprocessedPage.wrap(image).preprocessed(method)
     
     def detect_table_structure(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
         """
-        Detect table structure and return line bounding boxes
+        Detect table structure and return line bounding boxes.
+        
+        Runs on the layout pyramid level; sizes below are full-resolution
+        pixels scaled to that level, and the boxes are returned in
+        full-resolution coordinates.
         """
-        # Preprocess for line detection
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-        blur = cv2.GaussianBlur(gray, (3, 3), 0)
+        page = PreprocessedPage.wrap(image)
+        level = page.level(self.layout_scale)
+        scale = level.scale
         
-        # Threshold
-        _, thresh = cv2.threshold(blur, 127, 255, cv2.THRESH_BINARY_INV)
+        # Preprocess for line detection (blur + inverted fixed threshold)
+        thresh = level.fixed_threshold(127, 3, inverse=True)
         
         # Create kernel for horizontal line detection
-        kernel_height = 200  # Adjust based on your table row height
-        kernel = np.ones((5, kernel_height), np.uint8)
+        kernel_height = max(1, int(round(200 * scale)))  # Adjust based on your table row height
+        kernel = np.ones((max(1, int(round(5 * scale))), kernel_height), np.uint8)
         dilated = cv2.dilate(thresh, kernel, iterations=1)
         
         # Find contours for lines
-        contours, _ = cv2.findContours(dilated.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         sorted_contours = sorted(contours, key=lambda ctr: cv2.boundingRect(ctr)[1])
         
         line_boxes = []
-        min_h, max_h = 60, 200  # Minimum and maximum line height
+        min_h, max_h = 60 * scale, 200 * scale  # Minimum and maximum line height
+        height, width = page.shape[:2]
         
         for contour in sorted_contours:
             x, y, w, h = cv2.boundingRect(contour)
-            if min_h <= h <= max_h and w > 100:  # Filter by size
-                line_boxes.append((x, y, x + w, y + h))
+            if min_h <= h <= max_h and w > 100 * scale:  # Filter by size
+                x1, y1, x2, y2 = level.to_page(x, y, x + w, y + h)
+                line_boxes.append((x1, y1, min(x2, width), min(y2, height)))
         
         logger.info(f"Detected {len(line_boxes)} table lines")
         return line_boxes
@@ -141,13 +127,10 @@ class EnhancedOCRProcessor:
         """
         x1, y1, x2, y2 = line_box
         
-        # Extract line ROI
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-        roi = gray[y1:y2, x1:x2]
-        
-        # Preprocess ROI
-        adaptive = cv2.adaptiveThreshold(roi, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 9)
-        inverted = 255 - adaptive
+        # Line ROI of the page-level inverted adaptive threshold (unblurred)
+        page = PreprocessedPage.wrap(image)
+        gray = page.gray
+        inverted = page.region(*line_box).adaptive(0, 11, 9, True)
         dilated = cv2.dilate(inverted, np.ones((3, 3), np.uint8))
         
         # Find character contours
@@ -155,25 +138,19 @@ class EnhancedOCRProcessor:
         contours = imutils.grab_contours(contours)
         contours = sort_contours(contours, method='left-to-right')[0]
         
-        characters = []
+        boxes = []
         min_w, max_w = 10, 160
         min_h, max_h = 20, 140
         
         for contour in contours:
             (x, y, w, h) = cv2.boundingRect(contour)
             if (w >= min_w and w <= max_w) and (h >= min_h and h <= max_h):
-                # Extract character ROI
-                char_roi = gray[y1 + y:y1 + y + h, x1 + x:x1 + x + w]
-                
-                # Preprocess character
-                char_thresh = cv2.threshold(char_roi, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
-                char_resized = cv2.resize(char_thresh, (28, 28))
-                char_normalized = char_resized.astype('float32') / 255.0
-                char_normalized = np.expand_dims(char_normalized, axis=-1)
-                
-                characters.append((char_normalized, (x1 + x, y1 + y, w, h)))
+                boxes.append((x1 + x, y1 + y, w, h))
+        
+        # Normalize every character of the line into one batch tensor
+        batch = self.glyph_normalizer.normalize_boxes(gray, boxes)
         
-        return characters
+        return list(zip(batch, boxes))
     
     def extract_text_tesseract(self, image: np.ndarray, config: str = None) -> str:
         """
@@ -212,10 +189,31 @@ class EnhancedOCRProcessor:
             logger.error(f"EasyOCR failed: {e}")
             return ""
     
+    def warm_up(self, image: np.ndarray) -> Dict[str, float]:
+        """
+        Run a dummy image through every OCR engine so lazy initialization
+        (Tesseract start-up, EasyOCR model load and first inference) happens
+        ahead of the first real request. Returns seconds spent per engine.
+        """
+        timings = {}
+        
+        start = time.perf_counter()
+        self.extract_text_tesseract(image)
+        timings['tesseract'] = time.perf_counter() - start
+        
+        if self.easyocr_reader is not None:
+            start = time.perf_counter()
+            self.extract_text_easyocr(image)
+            timings['easyocr'] = time.perf_counter() - start
+        
+        return timings
+    
     def extract_text_multi_engine(self, image: np.ndarray) -> Dict[str, str]:
         """
         Extract text using multiple OCR engines and return best result
         """
+        # Share preprocessing between all engines and PSM modes
+        image = PreprocessedPage.wrap(image)
         results = {}
         
         # Try different preprocessing methods with Tesseract
@@ -230,8 +228,8 @@ class EnhancedOCRProcessor:
         # Try EasyOCR
         results["easyocr"] = self.extract_text_easyocr(image)
         
-        # Try different PSM modes
-        for psm in [6, 7, 8, 11, 12]:
+        # Try different PSM modes (no OSD mode 12: pages are normalized upfront)
+        for psm in [6, 7, 8, 11]:
             try:
                 processed = self.advanced_preprocess_image(image, "adaptive")
                 text = pytesseract.image_to_string(processed, config=f'--oem 3 --psm {psm}')
@@ -241,54 +239,156 @@ class EnhancedOCRProcessor:
         
         return results
     
-    def extract_structured_table_data(self, image: np.ndarray) -> List[Dict[str, Any]]:
+    def _read_line(self, page: PreprocessedPage, line_box: Tuple[int, int, int, int]) -> Tuple[Optional[Dict[str, Any]], str]:
         """
-        Extract structured table data using advanced OCR techniques
+        OCR one table line with every engine; returns the parsed best reading and its text
         """
+        # Extract text from entire line using multiple methods
+        line_roi = page.region(*line_box)
+        
+        # With a roster, the first Tesseract variant is tried alone: a line whose
+        # roll number snaps to the roster needs none of the other variants
+        if self.roster is not None:
+            text = self.extract_text_tesseract(line_roi, config='--oem 3 --psm 6')
+            parsed_data = self.parse_attendance_line(text) if text else None
+            if parsed_data and self.roster.snap_record(parsed_data):
+                with self._stats_lock:
+                    self.ocr_call_stats['retries_skipped'] += 1
+                return parsed_data, text
+        
+        # Get text from multiple OCR engines
+        ocr_results = self.extract_text_multi_engine(line_roi)
+        
+        # Find the best result (most complete)
+        best_text = ""
+        max_length = 0
+        
+        for method, text in ocr_results.items():
+            if len(text) > max_length and self._contains_roll_number(text):
+                max_length = len(text)
+                best_text = text
+        
+        # If no roll number found, try the longest text
+        if not best_text:
+            for method, text in ocr_results.items():
+                if len(text) > max_length:
+                    max_length = len(text)
+                    best_text = text
+        
+        # Parse the line
+        if not best_text:
+            return None, best_text
+        parsed_data = self.parse_attendance_line(best_text)
+        if parsed_data and self.roster is not None:
+            self.roster.snap_record(parsed_data)
+        return parsed_data, best_text
+    
+    def extract_structured_table_data(self, image: np.ndarray, layout=None) -> List[Dict[str, Any]]:
+        """
+        Extract structured table data using advanced OCR techniques.
+        
+        With a PageLayout of the page, its lines are read instead of being
+        detected again (and the page is not strip-tiled).
+        """
+        page = PreprocessedPage.wrap(image)
+        if layout is None and self.strip_tiler.tiles(page.shape[0]):
+            return self.extract_structured_table_data_tiled(page.image)
+        
         logger.info("Starting structured table extraction...")
         
-        # Detect table structure
-        line_boxes = self.detect_table_structure(image)
+        # Detect table structure (every line reads views of the shared page variants)
+        if layout is not None:
+            line_boxes, inked = layout.line_boxes, layout.inked_lines
+        else:
+            line_boxes = self.detect_table_structure(page)
+            inked = self.occupancy.has_ink(page.ink_integral(), line_boxes) if line_boxes else []
         
         extracted_data = []
+        skipped = 0
         
         for i, line_box in enumerate(line_boxes):
-            logger.info(f"Processing line {i+1}/{len(line_boxes)}")
-            
-            # Extract text from entire line using multiple methods
-            x1, y1, x2, y2 = line_box
-            line_roi = image[y1:y2, x1:x2]
-            
-            # Get text from multiple OCR engines
-            ocr_results = self.extract_text_multi_engine(line_roi)
-            
-            # Find the best result (most complete)
-            best_text = ""
-            max_length = 0
-            
-            for method, text in ocr_results.items():
-                if len(text) > max_length and self._contains_roll_number(text):
-                    max_length = len(text)
-                    best_text = text
+            # Blank lines (ink ratio from the page integral) never reach an engine
+            if not inked[i]:
+                skipped += 1
+                continue
             
-            # If no roll number found, try the longest text
-            if not best_text:
-                for method, text in ocr_results.items():
-                    if len(text) > max_length:
-                        max_length = len(text)
-                        best_text = text
+            logger.info(f"Processing line {i+1}/{len(line_boxes)}")
             
-            # Parse the line
-            if best_text:
-                parsed_data = self.parse_attendance_line(best_text)
-                if parsed_data:
-                    parsed_data['line_number'] = i + 1
-                    parsed_data['confidence'] = self._calculate_confidence(best_text)
-                    extracted_data.append(parsed_data)
+            parsed_data, best_text = self._read_line(page, line_box)
+            if parsed_data:
+                parsed_data['line_number'] = i + 1
+                parsed_data['confidence'] = self._calculate_confidence(best_text)
+                extracted_data.append(parsed_data)
         
+        self._count_line_reads(len(line_boxes) - skipped, skipped)
         logger.info(f"Extracted {len(extracted_data)} valid records")
         return extracted_data
     
+    def read_lines(self, image: np.ndarray, line_boxes: List[Tuple[int, int, int, int]],
+                   lines: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Records of selected lines (indices into line_boxes) of a page whose
+        structure was detected elsewhere, keyed by line index
+        """
+        page = PreprocessedPage.wrap(image)
+        records = {}
+        for i in lines:
+            parsed_data, best_text = self._read_line(page, line_boxes[i])
+            if parsed_data:
+                parsed_data['confidence'] = self._calculate_confidence(best_text)
+                records[i] = parsed_data
+        self._count_line_reads(len(lines), 0)
+        return records
+    
+    def _count_line_reads(self, performed: int, skipped: int):
+        """Record line reads made and skipped as blank"""
+        with self._stats_lock:
+            self.ocr_call_stats['performed'] += performed
+            self.ocr_call_stats['skipped_blank'] += skipped
+        logger.info(f"Read {performed} lines, skipped {skipped} blank lines without OCR")
+    
+    def extract_structured_table_data_tiled(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Strip-tiled structured extraction for very large pages.
+        
+        Line detection, preprocessing and OCR run per band (in parallel), on
+        band-sized variants only. Each line is read by the band whose core
+        holds its centre, so lines in band overlaps are not read twice.
+        """
+        logger.info("Starting strip-tiled structured table extraction...")
+        
+        def process_band(band_image, band):
+            band_page = PreprocessedPage(band_image, pool=self.buffer_pool)
+            owned = [box for box in self.detect_table_structure(band_page)
+                     if self.strip_tiler.owns(band, band[0] + (box[1] + box[3]) / 2)]
+            inked = self.occupancy.has_ink(band_page.ink_integral(), owned) if owned else []
+            lines = []
+            for box, has_ink in zip(owned, inked):
+                # Blank lines keep their place in the numbering but are not read
+                read = self._read_line(band_page, box) if has_ink else (None, "")
+                lines.append((band[0] + box[1], has_ink) + read)
+            band_page.release()
+            return lines
+        
+        # Lines of all bands in page order, numbered as the untiled pass numbers them
+        lines = []
+        for _, band_lines in self.strip_tiler.map_bands(image, process_band):
+            lines.extend(band_lines)
+        lines.sort(key=lambda line: line[0])
+        
+        skipped = sum(1 for line in lines if not line[1])
+        self._count_line_reads(len(lines) - skipped, skipped)
+        
+        extracted_data = []
+        for i, (_, _, parsed_data, best_text) in enumerate(lines):
+            if parsed_data:
+                parsed_data['line_number'] = i + 1
+                parsed_data['confidence'] = self._calculate_confidence(best_text)
+                extracted_data.append(parsed_data)
+        
+        logger.info(f"Extracted {len(extracted_data)} valid records from {len(lines)} lines")
+        return extracted_data
+    
     def _contains_roll_number(self, text: str) -> bool:
         """Check if text contains a valid roll number pattern"""
         return bool(re.search(r'\b23\d{6}\b', text))
@@ -318,54 +418,7 @@ class EnhancedOCRProcessor:
         """
         Parse a single attendance line into structured data
         """
-        # Clean the text
-        text = re.sub(r'[|_\[\]()]+', ' ', text)
-        text = ' '.join(text.split())
-        
-        # Extract roll number
-        roll_match = re.search(r'\b(23\d{6})\b', text)
-        if not roll_match:
-            return None
-        
-        roll_number = roll_match.group(1)
-        
-        # Extract name (words after roll number, before attendance markers)
-        name_pattern = r'23\d{6}\s+([A-Za-z\s]+?)(?:\s+[PA✓✗XY01-]|$)'
-        name_match = re.search(name_pattern, text)
-        name = name_match.group(1).strip() if name_match else ""
-        
-        # Clean name
-        name = re.sub(r'\s+', ' ', name)
-        name = ' '.join([word.capitalize() for word in name.split() if len(word) > 1])
-        
-        # Extract attendance data
-        attendance_pattern = r'[PA✓✗XY01-]'
-        attendance_marks = re.findall(attendance_pattern, text)
-        
-        # Count attendance
-        present_count = 0
-        absent_count = 0
-        total_classes = len(attendance_marks)
-        
-        for mark in attendance_marks:
-            if mark.upper() in ['P', '✓', 'Y', '1']:
-                present_count += 1
-            elif mark.upper() in ['A', '✗', 'X', '0', '-']:
-                absent_count += 1
-        
-        # Calculate percentage
-        attendance_percentage = (present_count / total_classes * 100) if total_classes > 0 else 0
-        
-        return {
-            'roll_number': roll_number,
-            'name': name,
-            'present_count': present_count,
-            'absent_count': absent_count,
-            'total_classes': total_classes,
-            'attendance_percentage': round(attendance_percentage, 2),
-            'attendance_marks': attendance_marks,
-            'raw_text': text
-        }
+        return self.line_parser.parse_line(text)
     
     def process_pdf_enhanced(self, pdf_path: str) -> List[Dict[str, Any]]:
         """
@@ -393,8 +446,13 @@ class EnhancedOCRProcessor:
                 image = Image.open(io.BytesIO(img_data))
                 image_array = np.array(image)
                 
-                # Extract structured data
-                page_data = self.extract_structured_table_data(image_array)
+                # Upright and deskewed before line detection
+                image_array, _ = self.page_normalizer.normalize(image_array)
+                
+                # Extract structured data; the page's buffers serve the next page
+                image_page = PreprocessedPage(image_array, pool=self.buffer_pool)
+                page_data = self.extract_structured_table_data(image_page)
+                image_page.release()
                 
                 # Add page information
                 for record in page_data:
@@ -418,6 +476,7 @@ class EnhancedOCRProcessor:
             if image is None:
                 raise ValueError(f"Could not load image: {image_path}")
             
+            image, _ = self.page_normalizer.normalize(image)
             return self.extract_structured_table_data(image)
             
         except Exception as e:
@@ -0,0 +1,81 @@
+import cv2
+import numpy as np
+from typing import Sequence, Tuple, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class GlyphBatchNormalizer:
+    """
+    Batch preprocessing of character glyphs for the CNN models.
+
+    Every glyph goes through the same steps as before (grayscale, inverted
+    Otsu threshold, resize, scale to [0, 1]) but the results are written
+    straight into one preallocated float32 tensor of shape (N, H, W, 1).
+    Grayscale conversion happens once per page instead of once per glyph and
+    the float conversion is a single vectorized pass over the whole batch.
+    """
+
+    def __init__(self, size: Tuple[int, int] = (28, 28)):
+        self.size = size  # (width, height), as expected by cv2.resize
+
+    @staticmethod
+    def to_gray(image: np.ndarray) -> np.ndarray:
+        """Return a grayscale view of the image (no copy if already gray)"""
+        if len(image.shape) == 3:
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return image
+
+    def allocate(self, count: int) -> np.ndarray:
+        """Allocate an uninitialized output tensor for `count` glyphs"""
+        width, height = self.size
+        return np.empty((count, height, width, 1), dtype=np.float32)
+
+    def to_tensor(self, binary: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Scale a (N, H, W) uint8 batch into a float32 (N, H, W, 1) tensor in one pass"""
+        if out is None:
+            out = self.allocate(len(binary))
+        np.divide(binary, np.float32(255.0), out=out[..., 0], dtype=np.float32)
+        return out
+
+    def binarize(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Threshold and resize a list of glyph crops into a (N, H, W) uint8 batch
+        """
+        width, height = self.size
+        binary = np.empty((len(images), height, width), dtype=np.uint8)
+
+        for i, glyph in enumerate(images):
+            _, thresh = cv2.threshold(self.to_gray(glyph), 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+            cv2.resize(thresh, self.size, dst=binary[i])
+
+        return binary
+
+    def binarize_boxes(self, image: np.ndarray, boxes: Sequence[Tuple[int, int, int, int]]) -> np.ndarray:
+        """
+        Threshold and resize (x, y, w, h) boxes of one page into a (N, H, W) uint8 batch.
+
+        The page is converted to grayscale once and every glyph is cropped as
+        a view, so no per-glyph copies are made before thresholding.
+        """
+        width, height = self.size
+        binary = np.empty((len(boxes), height, width), dtype=np.uint8)
+        gray = self.to_gray(image)
+
+        for i, (x, y, w, h) in enumerate(boxes):
+            _, thresh = cv2.threshold(gray[y:y + h, x:x + w], 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+            cv2.resize(thresh, self.size, dst=binary[i])
+
+        return binary
+
+    def normalize(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Normalize a list of glyph crops into a (N, H, W, 1) float32 tensor
+        """
+        return self.to_tensor(self.binarize(images))
+
+    def normalize_boxes(self, image: np.ndarray, boxes: Sequence[Tuple[int, int, int, int]]) -> np.ndarray:
+        """
+        Normalize glyphs given as (x, y, w, h) boxes on a single page or line
+        """
+        return self.to_tensor(self.binarize_boxes(image, boxes))
@@ -8,13 +8,19 @@ from PIL import Image, ImageEnhance, ImageFilter
 from typing import List, Tuple, Dict, Any, Optional
 import logging
 import fitz  # PyMuPDF
+from .denoise import TieredDenoiser
+from .preprocessed_page import PreprocessedPage
+from .buffer_pool import BufferPool
+from .attendance_parser import AttendanceLineParser
+from .page_normalizer import PageNormalizer
+from .strip_tiler import StripTiler
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ImprovedOCRProcessor:
-    def __init__(self):
+    def __init__(self, strip_tiler: Optional[StripTiler] = None):
         # Set Tesseract path for Windows
         if os.name == 'nt':  # Windows
             pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
@@ -27,6 +33,21 @@ class ImprovedOCRProcessor:
             r'\b\d{8}\b',  # 8 digit numbers
         ]
         
+        # Noise-adaptive denoising instead of full-resolution non-local means on every page
+        self.denoiser = TieredDenoiser()
+        
+        # One-shot orientation and skew correction for every page
+        self.page_normalizer = PageNormalizer()
+        
+        # Optional band-by-band processing so preprocessing variants stay band-sized
+        self.strip_tiler = strip_tiler
+        
+        # Page-sized preprocessing buffers are recycled from page (and band) to page
+        self.buffer_pool = BufferPool()
+        
+        # Shared compiled parser, with this processor's roll formats
+        self.line_parser = AttendanceLineParser(self.roll_patterns)
+        
     def extract_high_quality_images_from_pdf(self, pdf_path: str) -> List[np.ndarray]:
         """Extract high-quality images from PDF using PyMuPDF"""
         images = []
@@ -59,43 +80,38 @@ class ImprovedOCRProcessor:
         preprocessed_images = []
         
         # Convert to grayscale
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
-        
-        # Method 1: High contrast with denoising
-        denoised = cv2.fastNlMeansDenoising(gray)
-        enhanced = cv2.convertScaleAbs(denoised, alpha=2.0, beta=50)
-        _, thresh1 = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        page = PreprocessedPage.wrap(image)
+        gray = page.gray
+        
+        # Method 1: High contrast with denoising (tier chosen from the page noise level)
+        # Each method writes into page buffers, thresholding in place
+        denoised = self.denoiser.denoise(gray)
+        enhanced = cv2.convertScaleAbs(denoised, page.buffer(), alpha=2.0, beta=50)
+        _, thresh1 = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, enhanced)
         preprocessed_images.append(("high_contrast_denoised", thresh1))
         
         # Method 2: Adaptive threshold with larger block size
-        adaptive = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 21, 10
-        )
+        adaptive = page.adaptive(0, 21, 10)
         preprocessed_images.append(("adaptive_large", adaptive))
         
         # Method 3: Morphological operations to connect broken characters
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 1))
-        morph = cv2.morphologyEx(adaptive, cv2.MORPH_CLOSE, kernel)
+        morph = cv2.morphologyEx(adaptive, cv2.MORPH_CLOSE, kernel, page.buffer())
         preprocessed_images.append(("morphological_close", morph))
         
         # Method 4: Bilateral filter for edge preservation
-        bilateral = cv2.bilateralFilter(gray, 15, 80, 80)
-        _, thresh_bilateral = cv2.threshold(bilateral, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        bilateral = cv2.bilateralFilter(gray, 15, 80, 80, page.buffer())
+        _, thresh_bilateral = cv2.threshold(bilateral, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, bilateral)
         preprocessed_images.append(("bilateral_filtered", thresh_bilateral))
         
         # Method 5: Histogram equalization + contrast
-        equalized = cv2.equalizeHist(gray)
-        enhanced_eq = cv2.convertScaleAbs(equalized, alpha=1.8, beta=30)
-        _, thresh_eq = cv2.threshold(enhanced_eq, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        equalized = cv2.equalizeHist(gray, page.buffer())
+        enhanced_eq = cv2.convertScaleAbs(equalized, equalized, alpha=1.8, beta=30)
+        _, thresh_eq = cv2.threshold(enhanced_eq, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, enhanced_eq)
         preprocessed_images.append(("histogram_enhanced", thresh_eq))
         
         # Method 6: Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (3, 3), 0)
-        _, thresh_blur = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        preprocessed_images.append(("gaussian_blur", thresh_blur))
+        preprocessed_images.append(("gaussian_blur", page.otsu(3)))
         
         return preprocessed_images
     
@@ -111,7 +127,6 @@ class ImprovedOCRProcessor:
             'single_line': '--oem 3 --psm 7',
             'single_word': '--oem 3 --psm 8',
             'sparse_text': '--oem 3 --psm 11',
-            'sparse_text_osd': '--oem 3 --psm 12',
         }
         
         # Character whitelist configurations
@@ -211,54 +226,29 @@ class ImprovedOCRProcessor:
         """
         Extract student data from OCR text using improved pattern matching
         """
-        students = []
-        lines = text.split('\n')
+        return self.line_parser.extract_students(text, self.score_ocr_result)
+    
+    def _process_band(self, band_image: np.ndarray, band: Tuple[int, int, int, int]) -> List[Dict[str, Any]]:
+        """Run the full multi-config OCR on one band and extract its students"""
+        band_page = PreprocessedPage(band_image, pool=self.buffer_pool)
+        all_results = self.extract_text_with_multiple_configs(band_page)
+        band_page.release()
+        best_method, best_text = self.find_best_ocr_result(all_results)
+        if not best_text:
+            return []
         
-        for line_num, line in enumerate(lines):
-            line = line.strip()
-            if not line or len(line) < 5:  # Skip very short lines
-                continue
-            
-            # Try to find roll number
-            roll_number = None
-            for pattern in self.roll_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    roll_number = match.group()
-                    break
-            
-            if roll_number:
-                # Extract name (clean up the line)
-                name_text = line
-                
-                # Remove roll number
-                name_text = re.sub(r'\b' + re.escape(roll_number) + r'\b', '', name_text)
-                
-                # Remove common non-name patterns
-                name_text = re.sub(r'\b[PA]\b', '', name_text)  # Remove P/A markers
-                name_text = re.sub(r'\d+', '', name_text)  # Remove other numbers
-                name_text = re.sub(r'[^\w\s]', ' ', name_text)  # Remove special chars
-                name_text = ' '.join(name_text.split())  # Clean whitespace
-                
-                # Extract attendance status
-                attendance_status = "Unknown"
-                if re.search(r'\bP\b|\bpresent\b', line, re.IGNORECASE):
-                    attendance_status = "Present"
-                elif re.search(r'\bA\b|\babsent\b', line, re.IGNORECASE):
-                    attendance_status = "Absent"
-                
-                # Only add if we have a reasonable name
-                if name_text and len(name_text) > 2:
-                    students.append({
-                        'roll_number': roll_number,
-                        'name': name_text.title(),
-                        'attendance': attendance_status,
-                        'line_number': line_num + 1,
-                        'raw_line': line,
-                        'confidence': self.score_ocr_result(line)
-                    })
-        
-        return students
+        band_students = self.extract_student_data_from_text(best_text)
+        for student in band_students:
+            student['extraction_method'] = best_method
+        return band_students
+    
+    def extract_students_tiled(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Strip-tiled extraction: every band is preprocessed and read on its
+        own, and students read twice in a band overlap are merged by roll number
+        """
+        band_results = self.strip_tiler.map_bands(image, self._process_band)
+        return self.strip_tiler.merge_by_key([students for _, students in band_results], 'roll_number')
     
     def process_attendance_pdf(self, pdf_path: str) -> List[Dict[str, Any]]:
         """
@@ -278,8 +268,21 @@ class ImprovedOCRProcessor:
         for page_num, image in enumerate(images):
             logger.info(f"Processing page {page_num + 1}/{len(images)}")
             
-            # Get all OCR results
-            all_results = self.extract_text_with_multiple_configs(image)
+            # Orientation and skew are fixed once per page instead of per OCR config
+            image, _ = self.page_normalizer.normalize(image)
+            
+            if self.strip_tiler is not None and self.strip_tiler.tiles(image.shape[0]):
+                page_students = self.extract_students_tiled(image)
+                for student in page_students:
+                    student['page'] = page_num + 1
+                all_students.extend(page_students)
+                logger.info(f"Found {len(page_students)} students on page {page_num + 1} (strip-tiled)")
+                continue
+            
+            # Get all OCR results; the preprocessing buffers go back to the pool afterwards
+            page = PreprocessedPage(image, pool=self.buffer_pool)
+            all_results = self.extract_text_with_multiple_configs(page)
+            page.release()
             
             # Find best result
             best_method, best_text = self.find_best_ocr_result(all_results)
@@ -3,11 +3,19 @@ import numpy as np
 import pandas as pd
 import re
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Callable
 import logging
 from .enhanced_ocr_processor import EnhancedOCRProcessor
 from .tabular_ocr_integration import TabularOCRIntegration
-from .custom_cnn_model import CustomCNNModel
+from .custom_cnn_model import CustomCNNModel, AttendanceMarkClassifier
+from .preprocessed_page import PreprocessedPage
+from .page_layout import PageLayout
+from .page_normalizer import PageNormalizer
+from .attendance_matrix import AttendanceMatrix
+from .roster_index import RosterIndex
 
 logger = logging.getLogger(__name__)
 
@@ -16,17 +24,179 @@ class IntegratedOCRManager:
     Integrated OCR manager that combines multiple OCR approaches for best results
     """
     
-    def __init__(self):
-        # Initialize all OCR components
+    # Escalation mode: methods from cheapest to most expensive per line
+    ESCALATION_ORDER = ['custom_cnn', 'enhanced_ocr', 'tabular_ocr']
+    
+    # Order results are merged in, whichever method finishes first
+    METHOD_ORDER = ['enhanced_ocr', 'tabular_ocr', 'custom_cnn']
+    METHOD_NAMES = {'enhanced_ocr': "Enhanced OCR", 'tabular_ocr': "Tabular OCR", 'custom_cnn': "Custom CNN"}
+    
+    def __init__(self, warm_up: bool = False, mode: str = 'comprehensive',
+                 roster: Optional[RosterIndex] = None, mark_detection: str = 'auto'):
+        # Initialize all OCR components; mark_detection is how the tabular
+        # method reads attendance cells ('ink' for signature/tick registers,
+        # see TabularOCRIntegration)
         self.enhanced_ocr = EnhancedOCRProcessor()
-        self.tabular_ocr = TabularOCRIntegration()
+        self.mark_classifier = AttendanceMarkClassifier()
+        self.tabular_ocr = TabularOCRIntegration(mark_classifier=self.mark_classifier,
+                                                 mark_detection=mark_detection)
         self.custom_cnn = CustomCNNModel()
         
+        # Pages are made upright and deskewed once, before any method sees them
+        self.page_normalizer = PageNormalizer()
+        
+        # One buffer pool for every method, so page buffers are recycled across pages
+        self.buffer_pool = self.enhanced_ocr.buffer_pool
+        
         # Configuration
         self.confidence_threshold = 0.6
         self.min_roll_number_confidence = 0.8
         
+        # 'comprehensive' runs every method on the whole page, one after another;
+        # 'concurrent' runs them in parallel threads (OpenCV, Tesseract and
+        # TensorFlow release the GIL); 'escalation' runs the cheapest method
+        # first and the others only on the lines it failed
+        if mode not in ('comprehensive', 'concurrent', 'escalation'):
+            raise ValueError(f"Unknown processing mode: {mode}")
+        self.mode = mode
+        self.workers = len(self.METHOD_ORDER)
+        self.escalation_order = list(self.ESCALATION_ORDER)
+        self.escalation_stats = self._empty_escalation_stats()
+        
+        # Optional class roster: roll numbers are snapped to it and only its
+        # entries are valid
+        self.roster = None
+        if roster is not None:
+            self.set_roster(roster)
+        
+        # Readiness state: set once every engine has processed a dummy page.
+        # Waiters are released when a warm-up attempt ends, even a failed one.
+        self._ready = threading.Event()
+        self._warmup_done = threading.Event()
+        self._warmup_thread = None
+        self.warmup_seconds = None
+        self.warmup_timings = {}
+        self.warmup_error = None
+        
         logger.info("Integrated OCR Manager initialized")
+        
+        if warm_up:
+            self.warm_up()
+    
+    def set_roster(self, roster: Optional[RosterIndex]):
+        """
+        Use a class roster (or None for none): OCR'd roll numbers snap to the
+        nearest roster entry, and enhanced OCR skips its retry variants on
+        lines whose roll number snaps
+        """
+        self.roster = roster
+        self.enhanced_ocr.roster = roster
+        if roster is not None:
+            logger.info(f"Validating roll numbers against a roster of {len(roster)} students")
+    
+    @property
+    def is_ready(self) -> bool:
+        """True once warm-up has completed successfully"""
+        return self._ready.is_set()
+    
+    @property
+    def warmup_failed(self) -> bool:
+        """True if the last warm-up attempt raised"""
+        return self.warmup_error is not None
+    
+    def readiness(self) -> Dict[str, Any]:
+        """Readiness report for health checks of long-lived services"""
+        return {
+            'ready': self.is_ready,
+            'warming_up': self._warmup_thread is not None and self._warmup_thread.is_alive(),
+            'failed': self.warmup_failed,
+            'warmup_seconds': self.warmup_seconds,
+            'engine_timings': dict(self.warmup_timings),
+            'error': self.warmup_error
+        }
+    
+    def _make_warmup_page(self) -> np.ndarray:
+        """Small synthetic attendance table used to exercise every engine"""
+        page = np.full((400, 900, 3), 255, dtype=np.uint8)
+        for y in range(40, 361, 80):
+            cv2.line(page, (40, y), (860, y), (0, 0, 0), 2)
+        for x in (40, 260, 620, 700, 780, 860):
+            cv2.line(page, (x, 40), (x, 360), (0, 0, 0), 2)
+        for row, roll in enumerate(['23000001', '23000002', '23000003', '23000004']):
+            y = 95 + row * 80
+            cv2.putText(page, roll, (55, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+            cv2.putText(page, 'WARM UP', (275, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+            for x, mark in zip((640, 720, 800), 'PAP'):
+                cv2.putText(page, mark, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+        return page
+    
+    def _run_warm_up(self):
+        """Run a dummy page through every enabled engine and record timings"""
+        start = time.perf_counter()
+        page = self._make_warmup_page()
+        timings = {}
+        
+        try:
+            timings.update(self.enhanced_ocr.warm_up(page))
+            
+            step = time.perf_counter()
+            self.custom_cnn.warm_up()
+            timings['custom_cnn'] = time.perf_counter() - step
+            
+            step = time.perf_counter()
+            self.mark_classifier.warm_up()
+            timings['mark_classifier'] = time.perf_counter() - step
+            
+            # Full pipeline pass for layout detection and first-call overheads
+            step = time.perf_counter()
+            self._process_image_array(page)
+            timings['pipeline'] = time.perf_counter() - step
+        except Exception as e:
+            self.warmup_error = str(e)
+            logger.error(f"Warm-up failed: {e}")
+        
+        self.warmup_timings = timings
+        self.warmup_seconds = time.perf_counter() - start
+        if not self.warmup_failed:
+            self._ready.set()
+            logger.info(f"OCR engines warmed up in {self.warmup_seconds:.2f}s: "
+                        + ', '.join(f"{name}={seconds:.2f}s" for name, seconds in timings.items()))
+        self._warmup_done.set()
+    
+    def warm_up(self, background: bool = False):
+        """
+        Warm up every engine before serving requests.
+        
+        With `background=True` the warm-up runs in a daemon thread and
+        process_document waits for it instead of serving a cold request.
+        A failed warm-up leaves the manager not ready (see readiness()) and
+        can be tried again.
+        """
+        if self.is_ready:
+            return
+        
+        # One attempt at a time; a foreground call waits for a running one
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            if not background:
+                self._warmup_done.wait()
+            return
+        
+        self.warmup_error = None
+        self._warmup_done.clear()
+        if background:
+            self._warmup_thread = threading.Thread(target=self._run_warm_up, name='ocr-warm-up', daemon=True)
+            self._warmup_thread.start()
+            return
+        
+        self._run_warm_up()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the warm-up attempt has finished; returns the readiness
+        state, which is False if it failed or the timeout ran out
+        """
+        self._warmup_done.wait(timeout)
+        return self.is_ready
     
     def process_document(self, file_path: str) -> List[Dict[str, Any]]:
         """
@@ -34,92 +204,63 @@ class IntegratedOCRManager:
         """
         logger.info(f"Processing document: {file_path}")
         
+        # Never race a background warm-up that is still running
+        if self._warmup_thread is not None and not self.wait_until_ready():
+            logger.warning(f"Processing without a completed warm-up: {self.warmup_error}")
+        
         # Determine file type
         file_ext = os.path.splitext(file_path)[1].lower()
         
         if file_ext == '.pdf':
+            if self.mode == 'escalation':
+                return self._process_pdf_escalating(file_path)
             return self._process_pdf_comprehensive(file_path)
         elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
             return self._process_image_comprehensive(file_path)
         else:
             raise ValueError(f"Unsupported file format: {file_ext}")
     
-    def _process_pdf_comprehensive(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """
-        Comprehensive PDF processing using multiple methods
-        """
-        all_results = []
-        
-        # Method 1: Enhanced OCR with multiple engines
-        logger.info("Method 1: Enhanced OCR processing...")
-        try:
-            enhanced_results = self.enhanced_ocr.process_pdf_enhanced(pdf_path)
-            logger.info(f"Enhanced OCR found {len(enhanced_results)} records")
-            all_results.extend(self._tag_results(enhanced_results, "enhanced_ocr"))
-        except Exception as e:
-            logger.error(f"Enhanced OCR failed: {e}")
-        
-        # Method 2: Process each page as image with tabular OCR
-        logger.info("Method 2: Tabular OCR processing...")
-        try:
-            tabular_results = self._process_pdf_with_tabular_ocr(pdf_path)
-            logger.info(f"Tabular OCR found {len(tabular_results)} records")
-            all_results.extend(self._tag_results(tabular_results, "tabular_ocr"))
-        except Exception as e:
-            logger.error(f"Tabular OCR failed: {e}")
-        
-        # Method 3: Custom CNN processing
-        logger.info("Method 3: Custom CNN processing...")
-        try:
-            cnn_results = self._process_pdf_with_cnn(pdf_path)
-            logger.info(f"Custom CNN found {len(cnn_results)} records")
-            all_results.extend(self._tag_results(cnn_results, "custom_cnn"))
-        except Exception as e:
-            logger.error(f"Custom CNN failed: {e}")
-        
-        # Combine and validate results
-        final_results = self._combine_and_validate_results(all_results)
-        logger.info(f"Final combined results: {len(final_results)} records")
-        
-        return final_results
-    
     def _process_image_comprehensive(self, image_path: str) -> List[Dict[str, Any]]:
         """
         Comprehensive image processing using multiple methods
         """
-        all_results = []
-        
         # Load image
         image = cv2.imread(image_path)
         if image is None:
             raise ValueError(f"Could not load image: {image_path}")
         
-        # Method 1: Enhanced OCR
-        logger.info("Method 1: Enhanced OCR processing...")
-        try:
-            enhanced_results = self.enhanced_ocr.extract_structured_table_data(image)
-            logger.info(f"Enhanced OCR found {len(enhanced_results)} records")
-            all_results.extend(self._tag_results(enhanced_results, "enhanced_ocr"))
-        except Exception as e:
-            logger.error(f"Enhanced OCR failed: {e}")
+        if self.mode == 'escalation':
+            image, _ = self.page_normalizer.normalize(image)
+            page = PreprocessedPage(image, pool=self.buffer_pool)
+            results = self._escalate_page(page)
+            page.release()
+            return self._combine_and_validate_results(results)
         
-        # Method 2: Tabular OCR
-        logger.info("Method 2: Tabular OCR processing...")
-        try:
-            tabular_results = self.tabular_ocr.process_table_with_structure(image, self.enhanced_ocr)
-            logger.info(f"Tabular OCR found {len(tabular_results)} records")
-            all_results.extend(self._tag_results(tabular_results, "tabular_ocr"))
-        except Exception as e:
-            logger.error(f"Tabular OCR failed: {e}")
+        return self._process_image_array(image)
+    
+    def _process_image_array(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Run every OCR method on an already loaded image and combine the results
+        """
+        all_results = []
         
-        # Method 3: Custom CNN
-        logger.info("Method 3: Custom CNN processing...")
-        try:
-            cnn_results = self._process_image_with_cnn(image)
-            logger.info(f"Custom CNN found {len(cnn_results)} records")
-            all_results.extend(self._tag_results(cnn_results, "custom_cnn"))
-        except Exception as e:
-            logger.error(f"Custom CNN failed: {e}")
+        # One normalized page, one set of preprocessed variants and one layout
+        # analysis shared by all three methods
+        image, _ = self.page_normalizer.normalize(image)
+        image = PreprocessedPage(image, pool=self.buffer_pool)
+        layout = self._page_layout(image)
+        
+        # The three methods read the same page (in parallel in concurrent mode)
+        results = self._run_methods({
+            'enhanced_ocr': lambda: self.enhanced_ocr.extract_structured_table_data(image, self._enhanced_layout(image, layout)),
+            'tabular_ocr': lambda: self.tabular_ocr.process_table_with_structure(image, self.enhanced_ocr, layout=layout),
+            'custom_cnn': lambda: self._process_image_with_cnn(image, layout)
+        })
+        for method in self.METHOD_ORDER:
+            all_results.extend(self._tag_results(results[method], method))
+        
+        # Records hold no arrays; the page's buffers go back to the pool
+        image.release()
         
         # Combine and validate results
         final_results = self._combine_and_validate_results(all_results)
@@ -127,93 +268,108 @@ class IntegratedOCRManager:
         
         return final_results
     
-    def _process_pdf_with_tabular_ocr(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Process PDF using tabular OCR approach"""
-        results = []
-        
-        try:
-            import fitz
-            doc = fitz.open(pdf_path)
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                
-                # Convert to high-resolution image
-                mat = fitz.Matrix(3.0, 3.0)
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("ppm")
-                
-                # Convert to numpy array
-                from PIL import Image
-                import io
-                image = Image.open(io.BytesIO(img_data))
-                image_array = np.array(image)
-                
-                # Process with tabular OCR
-                page_results = self.tabular_ocr.process_table_with_structure(image_array, self.enhanced_ocr)
-                
-                # Add page information
-                for record in page_results:
-                    record['page_number'] = page_num + 1
-                
-                results.extend(page_results)
-            
-            doc.close()
-            
-        except Exception as e:
-            logger.error(f"Error in tabular OCR processing: {e}")
-        
-        return results
+    def _page_layout(self, page: PreprocessedPage) -> PageLayout:
+        """The layout analysis every method reading this page shares"""
+        return PageLayout(page, self.enhanced_ocr, self.tabular_ocr)
     
-    def _process_pdf_with_cnn(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Process PDF using custom CNN approach"""
-        results = []
+    def _enhanced_layout(self, page: PreprocessedPage, layout: PageLayout) -> Optional[PageLayout]:
+        """
+        The shared layout for the enhanced processor, or None for pages its
+        strip tiler reads band by band (so their variants stay band-sized)
+        """
+        return None if self.enhanced_ocr.strip_tiler.tiles(page.shape[0]) else layout
+    
+    def _run_methods(self, tasks: Dict[str, Callable[[], List[Dict[str, Any]]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Run each method's task, on a thread per method in concurrent mode;
+        a failed method contributes no records
+        """
+        def run(method):
+            logger.info(f"{self.METHOD_NAMES[method]} processing...")
+            try:
+                records = tasks[method]()
+                logger.info(f"{self.METHOD_NAMES[method]} found {len(records)} records")
+                return records
+            except Exception as e:
+                logger.error(f"{self.METHOD_NAMES[method]} failed: {e}")
+                return []
+        
+        methods = [method for method in self.METHOD_ORDER if method in tasks]
+        if self.mode != 'concurrent':
+            return {method: run(method) for method in methods}
+        
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ocr-method') as executor:
+            futures = {method: executor.submit(run, method) for method in methods}
+            return {method: futures[method].result() for method in methods}
+    
+    def _render_pdf_page(self, pdf_page, zoom: float) -> np.ndarray:
+        """A PDF page rendered at `zoom`, upright and deskewed"""
+        import fitz
+        from PIL import Image
+        import io
+        
+        pix = pdf_page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        image_array = np.array(Image.open(io.BytesIO(pix.tobytes("ppm"))))
+        image_array, _ = self.page_normalizer.normalize(image_array)
+        return image_array
+    
+    def _process_pdf_comprehensive(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """
+        Comprehensive PDF processing: every page is rendered and normalized
+        on this thread (PyMuPDF is not thread safe) and analyzed once, then
+        the three methods read it (in parallel in concurrent mode)
+        """
+        per_method = {method: [] for method in self.METHOD_ORDER}
         
         try:
             import fitz
             doc = fitz.open(pdf_path)
             
             for page_num in range(len(doc)):
-                page = doc[page_num]
+                # Enhanced and tabular OCR read the 3x render, the CNN a 2x copy
+                # of the same normalized page, so the 3x layout's lines map onto it
+                page = PreprocessedPage(self._render_pdf_page(doc[page_num], 3.0), pool=self.buffer_pool)
+                cnn_page = PreprocessedPage(cv2.resize(page.image, None, fx=2 / 3, fy=2 / 3,
+                                                       interpolation=cv2.INTER_AREA), pool=self.buffer_pool)
+                layout = self._page_layout(page)
                 
-                # Convert to image
-                mat = fitz.Matrix(2.0, 2.0)
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("ppm")
-                
-                # Convert to numpy array
-                from PIL import Image
-                import io
-                image = Image.open(io.BytesIO(img_data))
-                image_array = np.array(image)
-                
-                # Process with CNN
-                page_results = self._process_image_with_cnn(image_array)
-                
-                # Add page information
-                for record in page_results:
-                    record['page_number'] = page_num + 1
+                results = self._run_methods({
+                    'enhanced_ocr': lambda: self.enhanced_ocr.extract_structured_table_data(page, self._enhanced_layout(page, layout)),
+                    'tabular_ocr': lambda: self.tabular_ocr.process_table_with_structure(page, self.enhanced_ocr, layout=layout),
+                    'custom_cnn': lambda: self._process_image_with_cnn(cnn_page, layout.scaled(cnn_page))
+                })
+                page.release()
+                cnn_page.release()
                 
-                results.extend(page_results)
+                for method, records in results.items():
+                    for record in records:
+                        record['page_number'] = page_num + 1
+                    per_method[method].extend(records)
             
             doc.close()
             
         except Exception as e:
-            logger.error(f"Error in CNN processing: {e}")
+            logger.error(f"Error in PDF processing: {e}")
         
-        return results
+        all_results = []
+        for method in self.METHOD_ORDER:
+            all_results.extend(self._tag_results(per_method[method], method))
+        
+        final_results = self._combine_and_validate_results(all_results)
+        logger.info(f"Final combined results: {len(final_results)} records")
+        return final_results
     
-    def _process_image_with_cnn(self, image: np.ndarray) -> List[Dict[str, Any]]:
-        """Process image using custom CNN model"""
+    def _process_image_with_cnn(self, image: np.ndarray, layout: Optional[PageLayout] = None) -> List[Dict[str, Any]]:
+        """Process image using custom CNN model (on the layout's lines when given)"""
         results = []
         
         try:
             # Detect table lines
-            line_boxes = self.enhanced_ocr.detect_table_structure(image)
+            page = PreprocessedPage.wrap(image)
+            line_boxes = layout.line_boxes if layout is not None else self.enhanced_ocr.detect_table_structure(page)
             
             for i, line_box in enumerate(line_boxes):
-                x1, y1, x2, y2 = line_box
-                line_roi = image[y1:y2, x1:x2]
+                line_roi = page.region(*line_box)
                 
                 # Extract text using CNN
                 text = self.custom_cnn.detect_and_recognize_text(line_roi)
@@ -231,6 +387,191 @@ class IntegratedOCRManager:
         
         return results
     
+    def _empty_escalation_stats(self) -> Dict[str, Any]:
+        return {
+            'lines': 0,
+            'methods': {method: {'attempted': 0, 'accepted': 0} for method in self.ESCALATION_ORDER},
+            'unresolved': 0
+        }
+    
+    def _process_pdf_escalating(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """
+        Escalation-mode PDF processing: every page is rendered once and
+        escalated line by line
+        """
+        results = []
+        
+        try:
+            import fitz
+            doc = fitz.open(pdf_path)
+            
+            for page_num in range(len(doc)):
+                image_page = PreprocessedPage(self._render_pdf_page(doc[page_num], 3.0), pool=self.buffer_pool)
+                page_results = self._escalate_page(image_page)
+                image_page.release()
+                
+                for record in page_results:
+                    record['page_number'] = page_num + 1
+                results.extend(page_results)
+            
+            doc.close()
+            
+        except Exception as e:
+            logger.error(f"Error in escalating PDF processing: {e}")
+        
+        final_results = self._combine_and_validate_results(results)
+        logger.info(f"Final escalated results: {len(final_results)} records")
+        return final_results
+    
+    def _escalate_page(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Read a page method by method, cheapest first. A line whose record
+        passes the roll, name and marks checks is kept; only the remaining
+        lines go to the next method. Lines no method reads confidently keep
+        the best of their candidates.
+        """
+        page = PreprocessedPage.wrap(image)
+        layout = self._page_layout(page)
+        if not layout.line_boxes:
+            return []
+        
+        # Blank lines never reach a method
+        inked = layout.inked_lines
+        pending = [i for i, has_ink in enumerate(inked) if has_ink]
+        candidates: Dict[int, List[Dict[str, Any]]] = {i: [] for i in pending}
+        accepted: Dict[int, Dict[str, Any]] = {}
+        expected_marks = None
+        
+        stats = self.escalation_stats
+        stats['lines'] += len(pending)
+        
+        for method in self.escalation_order:
+            if not pending:
+                break
+            
+            try:
+                records = self._read_lines(method, layout, pending)
+            except Exception as e:
+                logger.error(f"{method} failed during escalation: {e}")
+                records = {}
+            
+            # The lecture count most lines agree on, once a method has read some
+            if expected_marks is None:
+                expected_marks = self._expected_mark_count(list(records.values()) + list(accepted.values()))
+            
+            failed = []
+            for i in pending:
+                record = records.get(i)
+                if record is None:
+                    failed.append(i)
+                    continue
+                record['line_number'] = i + 1
+                record['extraction_method'] = method
+                if self.roster is not None:
+                    self.roster.snap_record(record)
+                record['row_confidence'] = self._row_confidence(record, expected_marks)
+                if self._row_passes(record['row_confidence']):
+                    accepted[i] = record
+                else:
+                    candidates[i].append(record)
+                    failed.append(i)
+            
+            stats['methods'][method]['attempted'] += len(pending)
+            stats['methods'][method]['accepted'] += len(pending) - len(failed)
+            logger.info(f"Escalation {method}: accepted {len(pending) - len(failed)} of {len(pending)} lines")
+            pending = failed
+        
+        # Lines no method read confidently keep their best candidate
+        stats['unresolved'] += len(pending)
+        for i in pending:
+            best = self._select_best_result(candidates[i])
+            if best:
+                accepted[i] = best
+        
+        return [accepted[i] for i in sorted(accepted)]
+    
+    def _read_lines(self, method: str, layout: PageLayout, lines: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Records read by one method for the given line indices of the layout"""
+        page, line_boxes = layout.page, layout.line_boxes
+        records = {}
+        
+        if method == 'custom_cnn':
+            for i in lines:
+                text = self.custom_cnn.detect_and_recognize_text(page.region(*line_boxes[i]))
+                record = self.enhanced_ocr.parse_attendance_line(text) if text else None
+                if record:
+                    records[i] = record
+        
+        elif method == 'enhanced_ocr':
+            records = self.enhanced_ocr.read_lines(page, line_boxes, lines)
+        
+        elif method == 'tabular_ocr':
+            # Only the table rows under the failed lines are read; each row
+            # record carries the number of the layout line holding it
+            spans = [(line_boxes[i][1], line_boxes[i][3]) for i in lines]
+            pending = set(lines)
+            for record in self.tabular_ocr.process_table_with_structure(page, self.enhanced_ocr, row_spans=spans,
+                                                                        layout=layout):
+                record.pop('row_span')
+                i = record.get('line_number', 0) - 1
+                if i in pending and i not in records:
+                    records[i] = record
+        
+        else:
+            raise ValueError(f"Unknown OCR method: {method}")
+        
+        return records
+    
+    def _expected_mark_count(self, records: List[Dict[str, Any]]) -> Optional[int]:
+        """Most common mark count among records with a valid roll number"""
+        counts = [r.get('total_classes', 0) for r in records
+                  if r.get('total_classes', 0) > 0 and self._is_valid_roll_number(r.get('roll_number', ''))]
+        if not counts:
+            return None
+        values, frequency = np.unique(counts, return_counts=True)
+        return int(values[np.argmax(frequency)])
+    
+    def _row_confidence(self, record: Dict[str, Any], expected_marks: Optional[int]) -> Dict[str, float]:
+        """
+        Per-field confidence of one row: roll number format, share of
+        letters in the name, and mark count against the page's usual count
+        """
+        roll = 1.0 if self._is_valid_roll_number(record.get('roll_number', '')) else 0.0
+        
+        name = record.get('name', '').replace(' ', '')
+        name_confidence = sum(c.isalpha() for c in name) / len(name) if len(name) > 2 else 0.0
+        
+        marks = record.get('total_classes', 0)
+        if marks == 0:
+            marks_confidence = 0.0
+        elif expected_marks is None:
+            marks_confidence = 1.0
+        else:
+            marks_confidence = min(marks, expected_marks) / max(marks, expected_marks)
+        
+        return {'roll': roll, 'name': name_confidence, 'marks': marks_confidence}
+    
+    def _row_passes(self, confidence: Dict[str, float]) -> bool:
+        """True if a row needs no further method"""
+        return (confidence['roll'] >= self.min_roll_number_confidence
+                and confidence['name'] >= self.confidence_threshold
+                and confidence['marks'] >= self.confidence_threshold)
+    
+    def get_escalation_statistics(self) -> Dict[str, Any]:
+        """
+        Lines each method read and accepted in escalation mode, and the
+        line reads saved against running every method on every line
+        """
+        stats = self.escalation_stats
+        attempted = sum(m['attempted'] for m in stats['methods'].values())
+        return {
+            'lines': stats['lines'],
+            'methods': {method: dict(counts) for method, counts in stats['methods'].items()},
+            'unresolved': stats['unresolved'],
+            'line_reads': attempted,
+            'line_reads_saved': stats['lines'] * len(self.escalation_order) - attempted
+        }
+    
     def _tag_results(self, results: List[Dict[str, Any]], method: str) -> List[Dict[str, Any]]:
         """Tag results with extraction method"""
         for result in results:
@@ -244,6 +585,16 @@ class IntegratedOCRManager:
         if not all_results:
             return []
         
+        # Candidates in method order, whatever order the methods finished in
+        rank = {method: i for i, method in enumerate(self.METHOD_ORDER)}
+        all_results = sorted(all_results, key=lambda r: rank.get(r.get('extraction_method', ''), len(rank)))
+        
+        # Misread roll numbers are snapped to the roster, so they join their
+        # student instead of becoming phantom students
+        if self.roster is not None:
+            unmatched = sum(not self.roster.snap_record(result) for result in all_results)
+            logger.info(f"Roster: {len(all_results) - unmatched} of {len(all_results)} records matched")
+        
         # Group results by roll number
         roll_number_groups = {}
         
@@ -268,7 +619,9 @@ class IntegratedOCRManager:
         return final_results
     
     def _is_valid_roll_number(self, roll_number: str) -> bool:
-        """Validate roll number format"""
+        """Validate roll number format (roster membership when there is a roster)"""
+        if self.roster is not None:
+            return roll_number in self.roster
         return bool(re.match(r'^23\d{6}$', roll_number))
     
     def _select_best_result(self, candidates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
@@ -339,11 +692,18 @@ class IntegratedOCRManager:
                     break
         
         # Add information about multiple extractions
-        merged_result['extraction_methods'] = list(set(c.get('extraction_method', '') for c in candidates))
+        merged_result['extraction_methods'] = sorted(set(c.get('extraction_method', '') for c in candidates))
         merged_result['candidate_count'] = len(candidates)
         
         return merged_result
     
+    def to_attendance_matrix(self, results: List[Dict[str, Any]], subject: str = "Unknown",
+                             date: str = "Unknown") -> AttendanceMatrix:
+        """
+        Students x lectures matrix of the results' attendance marks
+        """
+        return AttendanceMatrix.from_records(results, subject, date)
+    
     def export_results_to_excel(self, results: List[Dict[str, Any]], output_path: str):
         """
         Export results to Excel with enhanced formatting
@@ -357,7 +717,7 @@ class IntegratedOCRManager:
         
         # Reorder columns for better readability
         column_order = [
-            'roll_number', 'name', 'present_count', 'absent_count', 
+            'roll_number', 'ocr_roll_number', 'name', 'present_count', 'absent_count', 
             'total_classes', 'attendance_percentage', 'extraction_method',
             'page_number', 'line_number', 'confidence', 'candidate_count'
         ]
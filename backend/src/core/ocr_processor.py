@@ -9,6 +9,10 @@ from PIL import Image
 from io import BytesIO
 from typing import List, Tuple, Dict, Any, Optional
 from ..config import Config
+from .preprocessed_page import PreprocessedPage
+from .page_normalizer import PageNormalizer
+from .buffer_pool import BufferPool
+from .attendance_parser import AttendanceLineParser
 
 # Try to import additional OCR engines
 try:
@@ -45,77 +49,33 @@ class OCRProcessor:
         # OCR engine preferences
         self.ocr_engines = ['tesseract', 'easyocr'] if EASYOCR_AVAILABLE else ['tesseract']
         
+        # One-shot orientation and skew correction for every page
+        self.page_normalizer = PageNormalizer()
+        
+        # Page-sized preprocessing buffers are recycled from page to page
+        self.buffer_pool = BufferPool()
+        
+        # Shared compiled attendance line parser
+        self.line_parser = AttendanceLineParser()
+        
     def preprocess_image(self, image: np.ndarray, method: str = "adaptive") -> np.ndarray:
         """
         Enhanced image preprocessing with multiple methods
         """
-        # Convert to grayscale if needed
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
+        # Variants are memoized on the page, so repeated calls cost nothing
+        page = PreprocessedPage.wrap(image)
         
-        if method == "adaptive":
-            # Gaussian blur to reduce noise
-            blur = cv2.GaussianBlur(gray, (3, 3), 0)
-            
-            # Adaptive thresholding
-            adaptive = cv2.adaptiveThreshold(
-                blur, 255, 
-                cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                cv2.THRESH_BINARY, 11, 9
-            )
-            
-            # Invert for better OCR
-            inverted = 255 - adaptive
-            
-            # Morphological operations to clean up
-            kernel = np.ones((2, 2), np.uint8)
-            cleaned = cv2.morphologyEx(inverted, cv2.MORPH_CLOSE, kernel)
-            
-            return cleaned
-            
-        elif method == "otsu":
-            # Gaussian blur
-            blur = cv2.GaussianBlur(gray, (5, 5), 0)
-            
-            # Otsu's thresholding
-            _, thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            return thresh
-            
-        elif method == "morphological":
-            # Advanced morphological preprocessing
-            blur = cv2.GaussianBlur(gray, (3, 3), 0)
-            
-            # Adaptive threshold
-            adaptive = cv2.adaptiveThreshold(
-                blur, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 9
-            )
-            
-            # Inversion
-            inverted = 255 - adaptive
-            
-            # Dilation to connect broken characters
-            kernel = np.ones((3, 3), np.uint8)
-            dilated = cv2.dilate(inverted, kernel, iterations=1)
-            
-            # Edge detection for better character separation
-            edges = cv2.Canny(dilated, 40, 150)
-            
-            # Final dilation
-            final = cv2.dilate(edges, kernel, iterations=1)
-            
-            return final
+        if method in ("adaptive", "otsu", "morphological"):
+            return page.preprocessed(method)
         
         # Default fallback
-        blurred = cv2.GaussianBlur(gray, self.config.GAUSSIAN_BLUR_KERNEL, 0)
         thresh = cv2.adaptiveThreshold(
-            blurred, 255, 
+            page.blur(self.config.GAUSSIAN_BLUR_KERNEL[0]), 255, 
             cv2.ADAPTIVE_THRESH_MEAN_C, 
             cv2.THRESH_BINARY,
             self.config.ADAPTIVE_THRESHOLD_BLOCK_SIZE,
-            self.config.ADAPTIVE_THRESHOLD_C
+            self.config.ADAPTIVE_THRESHOLD_C,
+            page.buffer()
         )
         return thresh
     
@@ -123,6 +83,9 @@ class OCRProcessor:
         """
         Extract text using multiple OCR engines for better accuracy
         """
+        # Share preprocessing between all engines and PSM modes
+        image = PreprocessedPage.wrap(image)
+        
         if engine == "auto":
             # Try multiple engines and return the best result
             results = {}
@@ -149,8 +112,9 @@ class OCRProcessor:
                 except:
                     results["easyocr"] = ""
             
-            # Try different PSM modes with Tesseract
-            for psm in [6, 7, 8, 11, 12]:
+            # Try different PSM modes with Tesseract (pages are normalized
+            # upfront, so the OSD mode 12 is not needed)
+            for psm in [6, 7, 8, 11]:
                 try:
                     processed = self.preprocess_image(image, "adaptive")
                     text = pytesseract.image_to_string(processed, config=f'--oem 3 --psm {psm}')
@@ -204,12 +168,8 @@ class OCRProcessor:
         """
         Detect table structure and return line bounding boxes
         """
-        # Preprocess for line detection
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-        blur = cv2.GaussianBlur(gray, (3, 3), 0)
-        
-        # Threshold
-        _, thresh = cv2.threshold(blur, 127, 255, cv2.THRESH_BINARY_INV)
+        # Preprocess for line detection (blur + inverted fixed threshold)
+        thresh = PreprocessedPage.wrap(image).fixed_threshold(127, 3, inverse=True)
         
         # Create kernel for horizontal line detection
         kernel_height = 200  # Adjust based on your table row height
@@ -237,8 +197,11 @@ class OCRProcessor:
         """
         logger.info("Starting structured table extraction...")
         
+        # Preprocess the page once; every line reads views of the shared variants
+        page = PreprocessedPage.wrap(image)
+        
         # Detect table structure
-        line_boxes = self.detect_table_structure(image)
+        line_boxes = self.detect_table_structure(page)
         
         extracted_data = []
         
@@ -246,8 +209,7 @@ class OCRProcessor:
             logger.info(f"Processing line {i+1}/{len(line_boxes)}")
             
             # Extract text from entire line using multiple methods
-            x1, y1, x2, y2 = line_box
-            line_roi = image[y1:y2, x1:x2]
+            line_roi = page.region(*line_box)
             
             # Get text using enhanced OCR
             text = self.extract_text_from_image(line_roi, engine="auto")
@@ -289,8 +251,13 @@ class OCRProcessor:
                 image = Image.open(io.BytesIO(img_data))
                 image_array = np.array(image)
                 
-                # Extract structured data
-                page_data = self.extract_structured_table_data(image_array)
+                # Upright and deskewed before line detection
+                image_array, _ = self.page_normalizer.normalize(image_array)
+                
+                # Extract structured data; the page's buffers serve the next page
+                image_page = PreprocessedPage(image_array, pool=self.buffer_pool)
+                page_data = self.extract_structured_table_data(image_page)
+                image_page.release()
                 
                 # Add page information
                 for record in page_data:
@@ -310,54 +277,7 @@ class OCRProcessor:
         """
         Enhanced parsing of a single attendance line into structured data
         """
-        # Clean the text
-        text = re.sub(r'[|_\[\]()]+', ' ', text)
-        text = ' '.join(text.split())
-        
-        # Extract roll number
-        roll_match = re.search(r'\b(23\d{6})\b', text)
-        if not roll_match:
-            return None
-        
-        roll_number = roll_match.group(1)
-        
-        # Extract name (words after roll number, before attendance markers)
-        name_pattern = r'23\d{6}\s+([A-Za-z\s]+?)(?:\s+[PA✓✗XY01-]|$)'
-        name_match = re.search(name_pattern, text)
-        name = name_match.group(1).strip() if name_match else ""
-        
-        # Clean name
-        name = re.sub(r'\s+', ' ', name)
-        name = ' '.join([word.capitalize() for word in name.split() if len(word) > 1])
-        
-        # Extract attendance data
-        attendance_pattern = r'[PA✓✗XY01-]'
-        attendance_marks = re.findall(attendance_pattern, text)
-        
-        # Count attendance
-        present_count = 0
-        absent_count = 0
-        total_classes = len(attendance_marks)
-        
-        for mark in attendance_marks:
-            if mark.upper() in ['P', '✓', 'Y', '1']:
-                present_count += 1
-            elif mark.upper() in ['A', '✗', 'X', '0', '-']:
-                absent_count += 1
-        
-        # Calculate percentage
-        attendance_percentage = (present_count / total_classes * 100) if total_classes > 0 else 0
-        
-        return {
-            'roll_number': roll_number,
-            'name': name,
-            'present_count': present_count,
-            'absent_count': absent_count,
-            'total_classes': total_classes,
-            'attendance_percentage': round(attendance_percentage, 2),
-            'attendance_marks': attendance_marks,
-            'raw_text': text
-        }
+        return self.line_parser.parse_line(text)
 
     def _calculate_confidence(self, text: str) -> float:
         """Calculate confidence score based on text quality"""
@@ -384,47 +304,9 @@ class OCRProcessor:
         """
         Parse OCR text into table format - improved for attendance sheets
         """
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        table = []
-        
-        for line in lines:
-            # Skip lines that are mostly noise (repeated characters)
-            if len(re.sub(r'[^A-Za-z0-9]', '', line)) < 3:
-                continue
-                
-            # Look for lines with roll numbers (8-digit numbers starting with 23)
-            if re.search(r'\b23\d{6}\b', line):
-                # Split by multiple spaces, tabs, or special characters
-                columns = re.split(r'\s{2,}|\t|[|_\[\]]+', line)
-                # Clean up columns
-                clean_columns = []
-                for col in columns:
-                    col = col.strip('|_[]() ').strip()
-                    if col and len(col) > 0:
-                        clean_columns.append(col)
-                
-                if len(clean_columns) >= 2:  # At least roll number and name
-                    table.append(clean_columns)
-            
-            # Also look for lines with just roll numbers (for cases where they're on separate lines)
-            elif re.search(r'^\s*23\d{6}\s*$', line):
-                roll_num = re.search(r'23\d{6}', line).group()
-                table.append([roll_num, ""])  # Empty name, might be filled later
-            
-            # Also look for lines with names (capitalized words)
-            elif re.search(r'\b[A-Z]{2,}[A-Z\s]*\b', line) and not re.search(r'^[E\s]+$', line):
-                columns = re.split(r'\s{2,}|\t|[|_\[\]]+', line)
-                clean_columns = []
-                for col in columns:
-                    col = col.strip('|_[]() ').strip()
-                    if col and len(col) > 1 and not re.match(r'^[E\s]+$', col):
-                        clean_columns.append(col)
-                
-                if len(clean_columns) >= 2:
-                    table.append(clean_columns)
-                
+        table = self.line_parser.split_table_lines(text)
         logger.info(f"Parsed {len(table)} potential table rows from text")
-        return table if len(table) > 0 else []
+        return table
     
     def extract_from_image_file(self, image_path: str) -> str:
         """
@@ -444,6 +326,7 @@ class OCRProcessor:
             if image is None:
                 raise ValueError(f"Could not load image: {image_path}")
             
+            image, _ = self.page_normalizer.normalize(image)
             return self.extract_structured_table_data(image)
             
         except Exception as e:
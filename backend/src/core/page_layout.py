@@ -0,0 +1,97 @@
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Union, Callable
+import logging
+
+import numpy as np
+
+from .preprocessed_page import PreprocessedPage
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]
+
+
+class PageLayout:
+    """
+    One layout analysis of a page, shared by every recognition method.
+
+    Holds the text line boxes (with their blank-line flags) and the table
+    regions with their cell grids and row spans. Each part is computed on
+    first use by the detectors the methods already own (the enhanced OCR
+    line detector and the tabular OCR table analysis), and computed once:
+    methods that read the same page, in parallel threads too, skip the
+    morphology and contour passes another method already made.
+
+    Every method numbers its records by the same line list (line_index()
+    maps a table row to its line), so their outputs line up row by row.
+    """
+
+    PARTS = ('line_boxes', 'inked_lines', 'tables')
+
+    def __init__(self, image: Union[np.ndarray, PreprocessedPage], line_detector, table_analyzer=None):
+        self.page = PreprocessedPage.wrap(image)
+        # EnhancedOCRProcessor-like: detect_table_structure() and occupancy
+        self.line_detector = line_detector
+        # TabularOCRIntegration-like: analyze_tables()
+        self.table_analyzer = table_analyzer
+        self._parts: Dict[str, Any] = {}
+        # One lock per part, so one thread detecting lines does not hold up another's tables
+        self._locks = {name: threading.Lock() for name in self.PARTS}
+
+    def _part(self, name: str, compute: Callable[[], Any]) -> Any:
+        if name not in self._parts:
+            with self._locks[name]:
+                if name not in self._parts:
+                    self._parts[name] = compute()
+        return self._parts[name]
+
+    @property
+    def line_boxes(self) -> List[Box]:
+        """Text line boxes (x1, y1, x2, y2) in page coordinates, top to bottom"""
+        return self._part('line_boxes', lambda: self.line_detector.detect_table_structure(self.page))
+
+    @property
+    def inked_lines(self) -> np.ndarray:
+        """Per line, whether it holds enough ink to be worth reading"""
+        def compute():
+            if not self.line_boxes:
+                return np.zeros(0, dtype=bool)
+            return self.line_detector.occupancy.has_ink(self.page.ink_integral(), self.line_boxes)
+        return self._part('inked_lines', compute)
+
+    @property
+    def tables(self) -> List[Dict[str, Any]]:
+        """
+        Table regions with their structure, cells keyed by (row, column) in
+        page coordinates and the page y range of every row
+        """
+        def compute():
+            if self.table_analyzer is None:
+                raise ValueError("This layout has no table analyzer")
+            return self.table_analyzer.analyze_tables(self.page)
+        return self._part('tables', compute)
+
+    def line_index(self, span: Tuple[int, int]) -> Optional[int]:
+        """Index of the first line whose y range holds the centre of a y span"""
+        centre = (span[0] + span[1]) / 2
+        for i, (_, y1, _, y2) in enumerate(self.line_boxes):
+            if y1 <= centre < y2:
+                return i
+        return None
+
+    def scaled(self, image: Union[np.ndarray, PreprocessedPage]) -> 'PageLayout':
+        """
+        This layout's lines mapped onto another render of the same page (a
+        different zoom), so methods reading it number the same lines.
+        Tables are not mapped; they stay with this page.
+        """
+        scaled = PageLayout(image, self.line_detector)
+        sy = scaled.page.shape[0] / self.page.shape[0]
+        sx = scaled.page.shape[1] / self.page.shape[1]
+        height, width = scaled.page.shape[:2]
+        scaled._parts['line_boxes'] = [
+            (int(round(x1 * sx)), int(round(y1 * sy)),
+             min(int(round(x2 * sx)), width), min(int(round(y2 * sy)), height))
+            for x1, y1, x2, y2 in self.line_boxes
+        ]
+        return scaled
@@ -0,0 +1,229 @@
+import cv2
+import numpy as np
+import pytesseract
+import time
+from typing import Dict, Tuple, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PageNormalizer:
+    """
+    One-shot deskew and orientation normalization.
+
+    Orientation and skew are estimated on a small binarized proxy of the
+    page, then the full-resolution page is corrected with a single warp
+    (or a lossless cv2.rotate when there is no skew to remove), so table
+    line detection sees horizontal rows the first time.
+
+    Skew: the angle whose rotated row profile of the ink pixels is the most
+    peaked (text lines and rulings collapse into narrow bins), searched
+    coarse-to-fine within +/- max_skew degrees.
+
+    Orientation: the same search is run on the page turned by 90 degrees,
+    which lines up the page for either reading direction. Ruling lines are
+    then removed from the deskewed proxy (in a register they run both ways,
+    and long vertical rulings would outweigh the text), the letters of the
+    remaining text are joined along each axis, and the page is turned only
+    if they join up top to bottom more than left to right. A single
+    Tesseract OSD call on the proxy, when available, then settles upright
+    vs upside down.
+    """
+
+    def __init__(self, proxy_size: int = 1024, max_skew: float = 10.0, min_skew: float = 0.1,
+                 use_osd: bool = True):
+        # Long side of the proxy image used for all estimates
+        self.proxy_size = proxy_size
+        self.max_skew = max_skew
+        # Smaller skews are left alone (not worth an interpolating warp)
+        self.min_skew = min_skew
+        self.use_osd = use_osd
+
+        # Cap on ink pixels used by the skew search
+        self.max_points = 100000
+        # Ink runs longer than this fraction of the proxy's long side are rulings
+        self.ruling_fraction = 1 / 15
+
+    def _proxy(self, image: np.ndarray) -> np.ndarray:
+        """Grayscale proxy with its long side at most proxy_size"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+        scale = self.proxy_size / max(gray.shape[:2])
+        if scale >= 1.0:
+            return gray
+        return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    def _ink_points(self, binary: np.ndarray) -> np.ndarray:
+        """(N, 2) float32 array of ink pixel (x, y) coordinates, subsampled to max_points"""
+        ys, xs = np.nonzero(binary)
+        step = max(1, len(xs) // self.max_points)
+        return np.stack([xs[::step], ys[::step]], axis=1).astype(np.float32)
+
+    def _profile_energy(self, coordinates: np.ndarray) -> float:
+        """Sum of squared bin counts of a 1D coordinate histogram; higher means more peaked"""
+        if len(coordinates) == 0:
+            return 0.0
+        bins = np.round(coordinates - coordinates.min()).astype(np.int64)
+        counts = np.bincount(bins).astype(np.float64)
+        return float(np.dot(counts, counts))
+
+    def _skew_energy(self, points: np.ndarray, angle: float) -> float:
+        """Row profile energy of the points after undoing a rotation by `angle` degrees"""
+        theta = np.deg2rad(angle)
+        rows = points[:, 1] * np.cos(theta) + points[:, 0] * np.sin(theta)
+        return self._profile_energy(rows)
+
+    def _best_skew(self, points: np.ndarray) -> Tuple[float, float]:
+        """Coarse-to-fine search for the skew angle; returns (angle, energy)"""
+        coarse = np.arange(-self.max_skew, self.max_skew + 1e-6, 0.5)
+        best = max(coarse, key=lambda angle: self._skew_energy(points, angle))
+        fine = np.arange(best - 0.5, best + 0.5 + 1e-6, 0.05)
+        energies = [self._skew_energy(points, angle) for angle in fine]
+        index = int(np.argmax(energies))
+        return float(round(fine[index], 2)), energies[index]
+
+    def estimate_skew(self, binary: np.ndarray) -> float:
+        """
+        Skew of a binarized page in degrees, in the cv2.getRotationMatrix2D
+        convention (positive = the content was rotated counter-clockwise)
+        """
+        points = self._ink_points(binary)
+        if len(points) < 100:
+            return 0.0
+        return self._best_skew(points - points.mean(axis=0))[0]
+
+    def _text_ink(self, binary: np.ndarray, skew: float) -> np.ndarray:
+        """Deskewed binary proxy, thickened by a pixel, with horizontal and vertical ruling lines removed"""
+        height, width = binary.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -skew, 1.0)
+        deskewed = cv2.warpAffine(binary, matrix, (width, height), flags=cv2.INTER_NEAREST)
+
+        # Thin rulings and strokes come out of the warp broken into steps;
+        # thickened by a pixel each way they are unbroken again
+        thick = cv2.dilate(deskewed, np.ones((3, 3), np.uint8))
+        length = max(3, int(max(height, width) * self.ruling_fraction))
+        rulings = cv2.morphologyEx(thick, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (length, 1)))
+        rulings |= cv2.morphologyEx(thick, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, length)))
+        # Slightly wider than the rulings found, which miss the steps of a line
+        rulings = cv2.dilate(rulings, np.ones((3, 3), np.uint8))
+        return cv2.bitwise_and(thick, cv2.bitwise_not(rulings))
+
+    def _text_is_vertical(self, text: np.ndarray) -> bool:
+        """
+        Whether deskewed text runs top to bottom: closing gaps of half a
+        letter joins the letters of words along the reading direction, while
+        the gaps between text lines are wider and stay open
+        """
+        count, _, stats, _ = cv2.connectedComponentsWithStats(text, connectivity=8)
+        sizes = np.maximum(stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT])
+        sizes = sizes[sizes >= 3]
+        if len(sizes) < 10:
+            return False
+        gap = max(2, int(np.median(sizes)) // 2)
+
+        merged = {}
+        for direction, shape in (('across', (1, gap)), ('down', (gap, 1))):
+            closed = cv2.morphologyEx(text, cv2.MORPH_CLOSE, np.ones(shape, np.uint8))
+            merged[direction] = count - cv2.connectedComponents(closed, connectivity=8)[0]
+        return merged['down'] > merged['across']
+
+    def _osd_rotation(self, proxy: np.ndarray) -> Optional[int]:
+        """Clockwise rotation (0/90/180/270) reported by Tesseract OSD, None if unavailable"""
+        if not self.use_osd:
+            return None
+        try:
+            osd = pytesseract.image_to_osd(proxy, output_type=pytesseract.Output.DICT)
+            return int(osd.get('rotate', 0)) % 360
+        except Exception as e:
+            logger.debug(f"OSD unavailable, orientation from line direction only: {e}")
+            return None
+
+    def estimate(self, image: np.ndarray) -> Dict[str, Any]:
+        """
+        Estimate the clockwise rotation (multiple of 90) and the residual skew
+        needed to bring the page upright
+        """
+        proxy = self._proxy(image)
+        _, binary = cv2.threshold(proxy, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+        points = self._ink_points(binary)
+        if len(points) < 100:
+            return {'rotation': 0, 'skew': 0.0, 'osd': False}
+        points -= points.mean(axis=0)
+
+        # Best deskewed profile as is and turned 90 degrees clockwise ((x, y) -> (-y, x)).
+        # Rulings and text lines are perpendicular or parallel, so the better
+        # of the two skews lines up all of them.
+        skew, energy = self._best_skew(points)
+        turned_skew, turned_energy = self._best_skew(np.stack([-points[:, 1], points[:, 0]], axis=1))
+
+        # Reading direction from the text alone. A page with no text
+        # besides its rulings is left as it is.
+        text = self._text_ink(binary, turned_skew if turned_energy > energy else skew)
+        rotation = 0
+        if self._text_is_vertical(text):
+            rotation, skew = 90, turned_skew
+            proxy = cv2.rotate(proxy, cv2.ROTATE_90_CLOCKWISE)
+
+        # OSD only settles upright vs upside down; line direction was decided above.
+        # A half turn does not change the skew angle.
+        osd_rotation = self._osd_rotation(proxy)
+        if osd_rotation == 180:
+            rotation = (rotation + 180) % 360
+
+        return {
+            'rotation': rotation,
+            'skew': skew,
+            'osd': osd_rotation is not None
+        }
+
+    def _warp_matrix(self, width: int, height: int, rotation: int, skew: float) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """
+        Single affine matrix for a clockwise quarter-turn rotation followed by
+        deskewing about the centre of the rotated page, and the output size
+        """
+        if rotation == 90:
+            turn = np.array([[0, -1, height - 1], [1, 0, 0], [0, 0, 1]], dtype=np.float64)
+            size = (height, width)
+        elif rotation == 180:
+            turn = np.array([[-1, 0, width - 1], [0, -1, height - 1], [0, 0, 1]], dtype=np.float64)
+            size = (width, height)
+        elif rotation == 270:
+            turn = np.array([[0, 1, 0], [-1, 0, width - 1], [0, 0, 1]], dtype=np.float64)
+            size = (height, width)
+        else:
+            turn = np.eye(3)
+            size = (width, height)
+
+        deskew = np.vstack([cv2.getRotationMatrix2D((size[0] / 2, size[1] / 2), -skew, 1.0), [0, 0, 1]])
+        return (deskew @ turn)[:2], size
+
+    def normalize(self, image: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Return the upright, deskewed page and what was done to it
+        """
+        start = time.perf_counter()
+        info = self.estimate(image)
+        rotation, skew = info['rotation'], info['skew']
+
+        if abs(skew) < self.min_skew:
+            skew = 0.0
+            if rotation == 0:
+                normalized = image
+            else:
+                codes = {90: cv2.ROTATE_90_CLOCKWISE, 180: cv2.ROTATE_180, 270: cv2.ROTATE_90_COUNTERCLOCKWISE}
+                normalized = cv2.rotate(image, codes[rotation])
+        else:
+            height, width = image.shape[:2]
+            matrix, size = self._warp_matrix(width, height, rotation, skew)
+            border = (255,) * image.shape[2] if len(image.shape) == 3 else 255
+            normalized = cv2.warpAffine(image, matrix, size, flags=cv2.INTER_LINEAR,
+                                        borderMode=cv2.BORDER_CONSTANT, borderValue=border)
+
+        info['skew'] = skew
+        info['applied'] = normalized is not image
+        info['seconds'] = time.perf_counter() - start
+
+        if info['applied']:
+            logger.info(f"Normalized page: rotated {rotation} degrees, deskewed {skew:.2f} degrees "
+                        f"in {info['seconds']:.3f}s")
+        return normalized, info
@@ -0,0 +1,288 @@
+import cv2
+import numpy as np
+import threading
+from typing import Dict, List, Tuple, Any, Union, Optional
+import logging
+
+from .buffer_pool import BufferPool
+
+logger = logging.getLogger(__name__)
+
+class PreprocessedPage:
+    """
+    Lazily evaluated image variants of one page.
+
+    Every derived variant (grayscale, blur, adaptive / Otsu / fixed
+    thresholds and the OCR preprocessing pipelines built from them) is
+    computed on first use and memoized, so the processors and layout
+    passes working on the same page share the work instead of recomputing
+    the same pixels. region() hands out views into these variants instead
+    of copies (Otsu-based variants excepted, see PageRegion), and level()
+    gives downscaled pyramid levels for layout analysis whose coordinates
+    map back with to_page().
+
+    With a BufferPool, variants are written in place into pooled buffers
+    and release() hands them back once the page is done, so a document's
+    pages reuse the same arrays instead of allocating new ones.
+
+    Cached arrays are shared: callers must treat them as read-only, and
+    must not keep them past release(). Methods running in parallel threads
+    can share one page; each variant is still computed only once.
+    """
+
+    def __init__(self, image: np.ndarray, scale: float = 1.0, pool: Optional[BufferPool] = None):
+        self.image = image
+        # Resolution relative to the page this pyramid level was taken from
+        self.scale = scale
+        self.pool = pool
+        self._cache: Dict[Tuple[Any, ...], np.ndarray] = {}
+        self._levels: Dict[float, 'PreprocessedPage'] = {}
+        # Pooled buffers owned by this page
+        self._buffers: List[np.ndarray] = []
+        # Re-entrant: variants are computed from other variants
+        self._lock = threading.RLock()
+
+    @classmethod
+    def wrap(cls, image: Union[np.ndarray, 'PreprocessedPage']) -> 'PreprocessedPage':
+        """Return the page itself, or a new page around a plain image"""
+        if isinstance(image, PreprocessedPage):
+            return image
+        return cls(image)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.image.shape
+
+    def variant(self, name: str, *params) -> np.ndarray:
+        """Return the memoized variant `name` computed with `params`"""
+        key = (name,) + params
+        result = self._cache.get(key)
+        if result is None:
+            with self._lock:
+                result = self._cache.get(key)
+                if result is None:
+                    result = getattr(self, f"_compute_{name}")(*params)
+                    self._cache[key] = result
+        return result
+
+    def region(self, x1: int, y1: int, x2: int, y2: int) -> 'PageRegion':
+        """A view of part of the page whose variants are views of the page variants"""
+        return PageRegion(self, x1, y1, x2, y2)
+
+    def level(self, scale: float) -> 'PreprocessedPage':
+        """
+        The grayscale page downscaled by `scale` (memoized), for layout and
+        geometry passes whose cost grows with the pixel count
+        """
+        if scale >= 1.0:
+            return self
+        level = self._levels.get(scale)
+        if level is None:
+            with self._lock:
+                level = self._levels.get(scale)
+                if level is None:
+                    height, width = self.gray.shape[:2]
+                    size = (int(round(width * scale)), int(round(height * scale)))
+                    small = cv2.resize(self.gray, size, self.buffer(size[::-1]), interpolation=cv2.INTER_AREA)
+                    level = PreprocessedPage(small, scale, self.pool)
+                    self._levels[scale] = level
+        return level
+
+    def buffer(self, shape: Optional[Tuple[int, ...]] = None, dtype=np.uint8) -> np.ndarray:
+        """
+        Scratch array owned by the page (grayscale page shape by default),
+        from the pool when there is one; given back on release()
+        """
+        shape = self.image.shape[:2] if shape is None else shape
+        if self.pool is None:
+            return np.empty(shape, dtype=dtype)
+        buffer = self.pool.acquire(shape, dtype)
+        with self._lock:
+            self._buffers.append(buffer)
+        return buffer
+
+    def recycle(self, buffer: np.ndarray):
+        """Give a page-owned scratch buffer back to the pool early"""
+        with self._lock:
+            if self.pool is not None and any(owned is buffer for owned in self._buffers):
+                self._buffers = [owned for owned in self._buffers if owned is not buffer]
+                self.pool.release(buffer)
+
+    def release(self):
+        """Drop all variants and return their buffers (and the levels') to the pool"""
+        with self._lock:
+            for level in self._levels.values():
+                level.release()
+            if self.pool is not None:
+                self.pool.release(*self._buffers)
+            self._buffers = []
+            self._cache.clear()
+            self._levels.clear()
+
+    def to_page(self, *values: float) -> Tuple[int, ...]:
+        """Map coordinates of this level to coordinates of the page it was taken from"""
+        return tuple(int(round(value / self.scale)) for value in values)
+
+    def from_page(self, *values: float) -> Tuple[int, ...]:
+        """Map coordinates of the source page to coordinates of this level"""
+        return tuple(int(round(value * self.scale)) for value in values)
+
+    # Public accessors
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self.variant('gray')
+
+    def blur(self, ksize: int) -> np.ndarray:
+        """Gaussian blur of the grayscale page (ksize 0 means no blur)"""
+        return self.variant('blur', ksize)
+
+    def adaptive(self, ksize: int = 3, block_size: int = 11, c: int = 9, inverse: bool = False) -> np.ndarray:
+        """Gaussian adaptive threshold of the blurred page"""
+        return self.variant('adaptive', ksize, block_size, c, inverse)
+
+    def otsu(self, ksize: int = 5, inverse: bool = False) -> np.ndarray:
+        """Otsu threshold of the blurred page"""
+        return self.variant('otsu', ksize, inverse)
+
+    def fixed_threshold(self, value: int = 127, ksize: int = 3, inverse: bool = True) -> np.ndarray:
+        """Fixed-level threshold of the blurred page"""
+        return self.variant('fixed_threshold', value, ksize, inverse)
+
+    def edges(self, low: int = 50, high: int = 150) -> np.ndarray:
+        """Canny edge map of the grayscale page"""
+        return self.variant('edges', low, high)
+
+    def horizontal_lines(self, length: int = 40) -> np.ndarray:
+        """Horizontal ruling lines: inverted Otsu opened with a (length x 1) kernel"""
+        return self.variant('horizontal_lines', length)
+
+    def vertical_lines(self, length: int = 40) -> np.ndarray:
+        """Vertical ruling lines: inverted Otsu opened with a (1 x length) kernel"""
+        return self.variant('vertical_lines', length)
+
+    def ink_integral(self) -> np.ndarray:
+        """
+        (H + 1, W + 1) int32 integral image of the Otsu ink mask (ink = 1),
+        so the ink in any box is four lookups
+        """
+        return self.variant('ink_integral')
+
+    def preprocessed(self, method: str = "adaptive") -> np.ndarray:
+        """
+        The OCR preprocessing pipelines shared by OCRProcessor and
+        EnhancedOCRProcessor ('adaptive', 'otsu', 'morphological')
+        """
+        return self.variant('preprocessed', method)
+
+    # Variant implementations
+
+    # Every variant is written into a buffer() destination, so with a pool
+    # no page-sized array is allocated once the pool is warm
+
+    def _compute_gray(self) -> np.ndarray:
+        if len(self.image.shape) == 3:
+            return cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY, self.buffer())
+        return self.image
+
+    def _compute_blur(self, ksize: int) -> np.ndarray:
+        if not ksize:
+            return self.gray
+        return cv2.GaussianBlur(self.gray, (ksize, ksize), 0, self.buffer())
+
+    def _compute_adaptive(self, ksize: int, block_size: int, c: int, inverse: bool) -> np.ndarray:
+        if inverse:
+            return cv2.bitwise_not(self.adaptive(ksize, block_size, c, False), self.buffer())
+        return cv2.adaptiveThreshold(
+            self.blur(ksize), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, c,
+            self.buffer()
+        )
+
+    def _compute_otsu(self, ksize: int, inverse: bool) -> np.ndarray:
+        mode = cv2.THRESH_BINARY_INV if inverse else cv2.THRESH_BINARY
+        _, thresh = cv2.threshold(self.blur(ksize), 0, 255, mode + cv2.THRESH_OTSU, self.buffer())
+        return thresh
+
+    def _compute_fixed_threshold(self, value: int, ksize: int, inverse: bool) -> np.ndarray:
+        mode = cv2.THRESH_BINARY_INV if inverse else cv2.THRESH_BINARY
+        _, thresh = cv2.threshold(self.blur(ksize), value, 255, mode, self.buffer())
+        return thresh
+
+    def _compute_edges(self, low: int, high: int) -> np.ndarray:
+        return cv2.Canny(self.gray, low, high, self.buffer())
+
+    def _compute_horizontal_lines(self, length: int) -> np.ndarray:
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (length, 1))
+        return cv2.morphologyEx(self.otsu(0, True), cv2.MORPH_OPEN, kernel, self.buffer())
+
+    def _compute_vertical_lines(self, length: int) -> np.ndarray:
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, length))
+        return cv2.morphologyEx(self.otsu(0, True), cv2.MORPH_OPEN, kernel, self.buffer())
+
+    def _compute_ink_integral(self) -> np.ndarray:
+        ink = self.buffer()
+        cv2.threshold(self.otsu(0, True), 0, 1, cv2.THRESH_BINARY, ink)
+        height, width = ink.shape[:2]
+        integral = cv2.integral(ink, self.buffer((height + 1, width + 1), np.int32), cv2.CV_32S)
+        self.recycle(ink)
+        return integral
+
+    def _compute_preprocessed(self, method: str) -> np.ndarray:
+        if method == "adaptive":
+            # Inverted adaptive threshold, closed to clean up
+            kernel = np.ones((2, 2), np.uint8)
+            return cv2.morphologyEx(self.adaptive(3, 11, 9, True), cv2.MORPH_CLOSE, kernel, self.buffer())
+
+        if method == "otsu":
+            return self.otsu(5)
+
+        if method == "morphological":
+            # Dilate to connect broken characters, then edges for character separation.
+            # The intermediate goes straight back to the pool.
+            kernel = np.ones((3, 3), np.uint8)
+            dilated = cv2.dilate(self.adaptive(3, 11, 9, True), kernel, self.buffer(), iterations=1)
+            edges = cv2.Canny(dilated, 40, 150, self.buffer())
+            self.recycle(dilated)
+            return cv2.dilate(edges, kernel, edges, iterations=1)
+
+        return self.gray
+
+
+class PageRegion(PreprocessedPage):
+    """
+    Rectangular view of a PreprocessedPage.
+
+    Variants are computed once on the whole parent page and sliced, so any
+    number of regions of the same page share a single computation. Otsu
+    thresholds are the exception: a region gets the threshold of its own
+    pixels, as when the region was cut out and thresholded on its own, so
+    Otsu and the variants built on it are computed on the region and
+    memoized per region.
+    """
+
+    # Variants that depend on the region's own Otsu threshold
+    LOCAL_VARIANTS = ('otsu', 'horizontal_lines', 'vertical_lines', 'ink_integral')
+
+    def __init__(self, parent: PreprocessedPage, x1: int, y1: int, x2: int, y2: int):
+        self.parent = parent
+        self.box = (x1, y1, x2, y2)
+        self._slice = (slice(y1, y2), slice(x1, x2))
+        super().__init__(parent.image[self._slice], parent.scale, parent.pool)
+
+    def variant(self, name: str, *params) -> np.ndarray:
+        if name in self.LOCAL_VARIANTS or (name, *params) == ('preprocessed', 'otsu'):
+            return super().variant(name, *params)
+        return self.parent.variant(name, *params)[self._slice]
+
+    def buffer(self, shape: Optional[Tuple[int, ...]] = None, dtype=np.uint8) -> np.ndarray:
+        # Region variants live as long as the region, which is never released
+        shape = self.image.shape[:2] if shape is None else shape
+        return np.empty(shape, dtype=dtype)
+
+    def release(self):
+        # Sliced variants belong to the parent page
+        pass
+
+    def region(self, x1: int, y1: int, x2: int, y2: int) -> 'PageRegion':
+        ox, oy = self.box[0], self.box[1]
+        return PageRegion(self.parent, ox + x1, oy + y1, ox + x2, oy + y2)
@@ -0,0 +1,193 @@
+import pandas as pd
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Sequence
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Marks a one-edit variant shared by several roster entries
+_AMBIGUOUS = object()
+
+
+def _deletions(word: str, depth: int) -> set:
+    """The word and every string left by deleting up to `depth` of its characters"""
+    variants = frontier = {word}
+    for _ in range(depth):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants = variants | frontier
+    return variants
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance (insertions, deletions and substitutions)"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+class RosterIndex:
+    """
+    Class roster of roll numbers indexed for snapping OCR readings.
+
+    Three lookups, cheapest first:
+    - exact matches from a hash map of the roster;
+    - single misread or dropped characters (the usual OCR digit confusion)
+      from a precomputed map of every one-edit variant of every roll
+      number, so they too are one dict lookup; a stray extra character is
+      found by deleting each character of the reading;
+    - anything else within max_distance edits (two misreads, a misread
+      and a dropped character) from a symmetric deletion index: two
+      strings within k edits share a string left by deleting at most k
+      characters from each, so the reading's deletions look up a handful
+      of candidates and only those are compared.
+
+    A BK-tree does not fit here: roll numbers of one class are dense
+    digit strings whose distances bunch together, so a tree search ends
+    up visiting nearly every node.
+
+    A reading snaps only to a unique nearest roll number: a one-edit variant
+    shared by two roster entries, or two deletion-index candidates at the
+    same smallest distance, is not a confident match.
+    """
+
+    def __init__(self, roll_numbers: Iterable[str], names: Optional[Sequence[str]] = None,
+                 max_distance: int = 2):
+        roll_numbers = [str(roll).strip().upper() for roll in roll_numbers]
+        names = list(names) if names is not None else [''] * len(roll_numbers)
+        if len(names) != len(roll_numbers):
+            raise ValueError("One name is needed per roster roll number")
+        self.max_distance = max_distance
+
+        # Exact lookup, with the roster name of every roll number
+        self.names: Dict[str, str] = {}
+        for roll, name in zip(roll_numbers, names):
+            if roll and roll not in self.names:
+                self.names[roll] = '' if pd.isna(name) else str(name).strip()
+
+        # One-substitution (over the characters roll numbers use) and
+        # one-deletion variants
+        alphabet = sorted(set(''.join(self.names)))
+        self._lengths = {len(roll) for roll in self.names}
+        self._neighbours: Dict[str, Any] = {}
+        for roll in self.names:
+            for position, original in enumerate(roll):
+                prefix, suffix = roll[:position], roll[position + 1:]
+                variants = [prefix + char + suffix for char in alphabet if char != original]
+                variants.append(prefix + suffix)
+                for variant in variants:
+                    if self._neighbours.setdefault(variant, roll) is not roll:
+                        self._neighbours[variant] = _AMBIGUOUS
+
+        # Deletion index: every string left by deleting up to max_distance
+        # characters, with the roll numbers it comes from
+        self._deletion_index: Dict[str, List[str]] = {}
+        for roll in self.names:
+            for variant in _deletions(roll, max_distance):
+                self._deletion_index.setdefault(variant, []).append(roll)
+
+        logger.info(f"Roster index built for {len(self.names)} roll numbers "
+                    f"({len(self._neighbours)} one-edit variants, "
+                    f"{len(self._deletion_index)} deletion variants)")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, roll_column: str = 'roll_number',
+                   name_column: Optional[str] = 'name', max_distance: int = 2) -> 'RosterIndex':
+        """Roster from a DataFrame column of roll numbers (and names)"""
+        df = df.dropna(subset=[roll_column])
+        rolls = df[roll_column]
+        # Spreadsheet readers turn numeric roll numbers into floats
+        if pd.api.types.is_float_dtype(rolls):
+            rolls = rolls.astype('int64')
+        names = df[name_column].tolist() if name_column and name_column in df.columns else None
+        return cls(rolls.astype(str).tolist(), names, max_distance)
+
+    @classmethod
+    def from_file(cls, file_path: str, roll_column: str = 'roll_number',
+                  name_column: Optional[str] = 'name', max_distance: int = 2) -> 'RosterIndex':
+        """Roster from a CSV or Excel file"""
+        if os.path.splitext(file_path)[1].lower() in ('.xlsx', '.xls'):
+            df = pd.read_excel(file_path)
+        else:
+            df = pd.read_csv(file_path)
+        return cls.from_frame(df, roll_column, name_column, max_distance)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, roll_number: str) -> bool:
+        return roll_number in self.names
+
+    def nearest(self, candidate: str) -> List[Tuple[str, int]]:
+        """Every roll number within max_distance edits of the candidate, nearest first"""
+        candidates = set()
+        for variant in _deletions(candidate, self.max_distance):
+            candidates.update(self._deletion_index.get(variant, ()))
+
+        matches = []
+        for roll in candidates:
+            distance = edit_distance(candidate, roll)
+            if distance <= self.max_distance:
+                matches.append((roll, distance))
+        return sorted(matches, key=lambda match: (match[1], match[0]))
+
+    def snap(self, candidate: str) -> Optional[Tuple[str, int]]:
+        """
+        The roster roll number an OCR reading stands for and its edit
+        distance, or None when there is no unique nearest entry in range
+        """
+        if candidate in self.names:
+            return candidate, 0
+
+        if self.max_distance < 1:
+            return None
+        neighbour = self._neighbours.get(candidate)
+        if neighbour is _AMBIGUOUS:
+            return None
+        # A stray extra character (only possible one character over a roster length)
+        if len(candidate) - 1 in self._lengths:
+            one_edit = {variant for variant in (candidate[:i] + candidate[i + 1:] for i in range(len(candidate)))
+                        if variant in self.names}
+            if neighbour is not None:
+                one_edit.add(neighbour)
+            if len(one_edit) == 1:
+                return one_edit.pop(), 1
+            if one_edit:
+                return None
+        elif neighbour is not None:
+            return neighbour, 1
+        if self.max_distance < 2:
+            return None
+
+        matches = self.nearest(candidate)
+        if not matches or (len(matches) > 1 and matches[1][1] == matches[0][1]):
+            return None
+        return matches[0]
+
+    def snap_record(self, record: Dict[str, Any]) -> bool:
+        """
+        Snap a record's roll_number to the roster in place. A corrected
+        record keeps its reading as 'ocr_roll_number', gets 'roll_distance',
+        and an empty name is filled from the roster. False if it did not snap.
+        """
+        reading = record.get('roll_number') or ''
+        match = self.snap(reading)
+        if match is None:
+            return False
+
+        roll, distance = match
+        if roll != reading:
+            record['ocr_roll_number'] = reading
+            record['roll_number'] = roll
+            record['roll_distance'] = distance
+        else:
+            # A record snapped earlier keeps the distance of its correction
+            record.setdefault('roll_distance', 0)
+        if not record.get('name') and self.names[roll]:
+            record['name'] = self.names[roll]
+        return True
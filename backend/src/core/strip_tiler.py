@@ -0,0 +1,102 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Callable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (y0, y1, core_y0, core_y1): band rows and the rows the band owns at its seams
+Band = Tuple[int, int, int, int]
+
+class StripTiler:
+    """
+    Splits very large pages into overlapping horizontal bands.
+
+    Bands are views of the page, so only the per-band preprocessing
+    variants are materialized and peak memory is bounded by band size
+    times the number of workers instead of by page size. Consecutive bands
+    overlap; the seam between them is the middle of the overlap, and each
+    band owns the rows between its seams (its core). A table line whose
+    centre falls in a band's core lies entirely inside that band as long as
+    the overlap is at least the tallest line, so every line is reported by
+    exactly one band.
+    """
+
+    def __init__(self, band_height: int = 2048, overlap: int = 256, workers: int = 2,
+                 page_height: Optional[int] = None):
+        if overlap >= band_height:
+            raise ValueError("Band overlap must be smaller than the band height")
+        self.band_height = band_height
+        self.overlap = overlap
+        self.workers = workers
+        # Pages up to this many rows are processed whole
+        self.page_height = page_height if page_height is not None else band_height
+
+    def tiles(self, height: int) -> bool:
+        """True if a page of `height` rows is processed band by band"""
+        return height > self.page_height
+
+    def bands(self, height: int) -> List[Band]:
+        """Bands covering `height` rows, with their cores partitioning the page"""
+        if height <= self.band_height:
+            return [(0, height, 0, height)]
+
+        step = self.band_height - self.overlap
+        starts = [0]
+        while starts[-1] + self.band_height < height:
+            starts.append(starts[-1] + step)
+        ends = [min(start + self.band_height, height) for start in starts]
+
+        # Seams sit in the middle of each overlap
+        seams = [(starts[i + 1] + ends[i]) // 2 for i in range(len(starts) - 1)]
+        cores = zip([0] + seams, seams + [height])
+
+        return [(y0, y1, c0, c1) for y0, y1, (c0, c1) in zip(starts, ends, cores)]
+
+    def owns(self, band: Band, y_center: float) -> bool:
+        """True if a row centred at page row `y_center` belongs to this band"""
+        return band[2] <= y_center < band[3]
+
+    def map_bands(self, image: np.ndarray, func: Callable[[np.ndarray, Band], Any],
+                  workers: Optional[int] = None) -> List[Tuple[Band, Any]]:
+        """
+        Apply func(band_image, band) to every band, in parallel when
+        workers > 1; results are returned in band order
+        """
+        bands = self.bands(image.shape[0])
+        workers = min(workers or self.workers, len(bands))
+        logger.info(f"Processing {image.shape[1]}x{image.shape[0]} page in {len(bands)} bands "
+                    f"of {self.band_height} rows ({self.overlap} overlap, {workers} workers)")
+
+        if workers <= 1:
+            return [(band, func(image[band[0]:band[1]], band)) for band in bands]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(func, image[band[0]:band[1]], band) for band in bands]
+            return [(band, future.result()) for band, future in zip(bands, futures)]
+
+    def merge_by_key(self, band_rows: List[List[Dict[str, Any]]], key: str,
+                     score: str = 'confidence') -> List[Dict[str, Any]]:
+        """
+        Stitch per-band rows that carry no coordinates, deduplicating rows
+        with the same key that were read twice in the overlap of two
+        neighbouring bands (the higher scoring copy is kept)
+        """
+        merged = []
+        previous = {}
+        for rows in band_rows:
+            current = {}
+            for row in rows:
+                value = row.get(key)
+                duplicate = previous.get(value) if value else None
+                if duplicate is not None:
+                    if row.get(score, 0) > duplicate.get(score, 0):
+                        duplicate.clear()
+                        duplicate.update(row)
+                    current[value] = duplicate
+                    continue
+                merged.append(row)
+                if value:
+                    current[value] = row
+            previous = current
+        return merged
@@ -0,0 +1,162 @@
+import cv2
+import numpy as np
+import os
+import glob
+from typing import List, Tuple, Sequence, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Symbols that are drawn as strokes instead of rendered with putText
+TICK = '✓'
+CROSS = '✗'
+BLANK = ''
+SIGNATURE = 'signature'
+
+class SyntheticGlyphGenerator:
+    """
+    Renders synthetic attendance glyphs (digits, letters, P/A marks, ticks,
+    crosses, signatures and empty cells) with varied fonts, stroke widths,
+    skew and noise.
+
+    Glyphs are returned as tight grayscale crops, dark ink on a light
+    background, exactly like the crops cut from scanned sheets, so they go
+    through the same GlyphBatchNormalizer as real data.
+    """
+
+    FONTS = [
+        cv2.FONT_HERSHEY_SIMPLEX,
+        cv2.FONT_HERSHEY_PLAIN,
+        cv2.FONT_HERSHEY_DUPLEX,
+        cv2.FONT_HERSHEY_COMPLEX,
+        cv2.FONT_HERSHEY_TRIPLEX,
+        cv2.FONT_HERSHEY_COMPLEX_SMALL,
+        cv2.FONT_HERSHEY_SCRIPT_SIMPLEX,
+        cv2.FONT_HERSHEY_SCRIPT_COMPLEX,
+    ]
+
+    def __init__(self, labels: Sequence[str], canvas_size: int = 64, crop_to_ink: bool = True):
+        self.labels = list(labels)
+        self.canvas_size = canvas_size
+        # Character glyphs are cut at their ink box; table cells are cut at the cell box
+        self.crop_to_ink = crop_to_ink
+
+    def _draw_tick(self, canvas: np.ndarray, color: int, thickness: int, rng: np.random.Generator):
+        """Draw a hand-drawn looking tick mark"""
+        s = self.canvas_size
+        start = (int(s * rng.uniform(0.15, 0.3)), int(s * rng.uniform(0.45, 0.6)))
+        bottom = (int(s * rng.uniform(0.35, 0.5)), int(s * rng.uniform(0.7, 0.85)))
+        end = (int(s * rng.uniform(0.7, 0.85)), int(s * rng.uniform(0.15, 0.3)))
+        cv2.polylines(canvas, [np.array([start, bottom, end], np.int32)], False, color, thickness, cv2.LINE_AA)
+
+    def _draw_cross(self, canvas: np.ndarray, color: int, thickness: int, rng: np.random.Generator):
+        """Draw a hand-drawn looking cross mark"""
+        s = self.canvas_size
+        lo = lambda: int(s * rng.uniform(0.15, 0.3))
+        hi = lambda: int(s * rng.uniform(0.7, 0.85))
+        cv2.line(canvas, (lo(), lo()), (hi(), hi()), color, thickness, cv2.LINE_AA)
+        cv2.line(canvas, (hi(), lo()), (lo(), hi()), color, thickness, cv2.LINE_AA)
+
+    def _draw_signature(self, canvas: np.ndarray, color: int, thickness: int, rng: np.random.Generator):
+        """Draw a short cursive-like scribble spanning most of the cell width"""
+        s = self.canvas_size
+        xs = np.linspace(s * rng.uniform(0.05, 0.2), s * rng.uniform(0.8, 0.95), int(rng.integers(20, 40)))
+        phase = rng.uniform(0, 2 * np.pi)
+        loops = rng.uniform(2, 5)
+        ys = s / 2 + s * rng.uniform(0.1, 0.25) * np.sin(np.linspace(0, loops * 2 * np.pi, len(xs)) + phase)
+        ys += rng.normal(0, s * 0.03, len(xs))
+        points = np.stack([xs, ys], axis=1).astype(np.int32)
+        cv2.polylines(canvas, [points], False, color, thickness, cv2.LINE_AA)
+
+    def _draw_text(self, canvas: np.ndarray, label: str, color: int, thickness: int, rng: np.random.Generator):
+        """Render a character with a random Hershey font, centred with jitter"""
+        s = self.canvas_size
+        font = self.FONTS[rng.integers(len(self.FONTS))]
+        (w, h), _ = cv2.getTextSize(label, font, 1.0, thickness)
+        scale = s * rng.uniform(0.45, 0.7) / max(w, h, 1)
+        (w, h), _ = cv2.getTextSize(label, font, scale, thickness)
+        x = (s - w) // 2 + int(rng.integers(-s // 10, s // 10 + 1))
+        y = (s + h) // 2 + int(rng.integers(-s // 10, s // 10 + 1))
+        cv2.putText(canvas, label, (x, y), font, scale, color, thickness, cv2.LINE_AA)
+
+    def draw(self, label: str, canvas: np.ndarray, rng: np.random.Generator):
+        """Draw a single label onto a blank canvas"""
+        color = int(rng.integers(0, 90))
+        thickness = int(rng.integers(1, 4))
+
+        if label == BLANK:
+            return
+        if label == TICK:
+            self._draw_tick(canvas, color, thickness + 1, rng)
+        elif label == CROSS:
+            self._draw_cross(canvas, color, thickness + 1, rng)
+        elif label == SIGNATURE:
+            self._draw_signature(canvas, color, thickness, rng)
+        else:
+            self._draw_text(canvas, label, color, thickness, rng)
+
+    def _distort(self, canvas: np.ndarray, background: int, rng: np.random.Generator) -> np.ndarray:
+        """Apply one random rotation + shear warp, optional blur and noise"""
+        s = self.canvas_size
+        angle = rng.uniform(-12, 12)
+        shear = rng.uniform(-0.25, 0.25)
+        matrix = cv2.getRotationMatrix2D((s / 2, s / 2), angle, rng.uniform(0.85, 1.1))
+        matrix[0, 1] += shear
+        matrix[0, 2] -= shear * s / 2
+        warped = cv2.warpAffine(canvas, matrix, (s, s), borderMode=cv2.BORDER_CONSTANT, borderValue=background)
+
+        if rng.random() < 0.3:
+            warped = cv2.GaussianBlur(warped, (3, 3), 0)
+
+        if rng.random() < 0.2:
+            return warped
+
+        noise = rng.normal(0, rng.uniform(2, 18), warped.shape)
+        return np.clip(warped + noise, 0, 255).astype(np.uint8)
+
+    def _crop(self, glyph: np.ndarray, background: int, rng: np.random.Generator) -> np.ndarray:
+        """Crop to the ink bounding box (or a jittered cell box) with a small random margin"""
+        if not self.crop_to_ink:
+            s = self.canvas_size
+            x1, y1 = rng.integers(0, s // 8, size=2)
+            x2, y2 = s - rng.integers(0, s // 8, size=2)
+            return glyph[y1:y2, x1:x2]
+
+        ys, xs = np.nonzero(glyph < background - 60)
+        if len(xs) == 0:
+            return glyph
+
+        margin = int(rng.integers(1, 5))
+        x1, x2 = max(0, xs.min() - margin), min(glyph.shape[1], xs.max() + margin + 1)
+        y1, y2 = max(0, ys.min() - margin), min(glyph.shape[0], ys.max() + margin + 1)
+        return glyph[y1:y2, x1:x2]
+
+    def render(self, label: str, rng: np.random.Generator) -> np.ndarray:
+        """Render one distorted glyph crop for the given label"""
+        background = int(rng.integers(180, 256))
+        canvas = np.full((self.canvas_size, self.canvas_size), background, dtype=np.uint8)
+        self.draw(label, canvas, rng)
+        glyph = self._distort(canvas, background, rng)
+        return self._crop(glyph, background, rng)
+
+    def generate(self, count: int, rng: np.random.Generator) -> Tuple[List[np.ndarray], np.ndarray]:
+        """Generate `count` glyph crops with uniformly sampled label indices"""
+        label_indices = rng.integers(0, len(self.labels), size=count)
+        glyphs = [self.render(self.labels[idx], rng) for idx in label_indices]
+        return glyphs, label_indices.astype(np.int64)
+
+def write_glyph_shard(path: str, images: np.ndarray, labels: np.ndarray):
+    """Write one shard of normalized uint8 glyphs and their label indices"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.savez(path, images=images, labels=labels)
+
+def read_glyph_shard(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Read a shard written by write_glyph_shard"""
+    with np.load(path) as data:
+        return data['images'], data['labels']
+
+def list_glyph_shards(directory: Optional[str]) -> List[str]:
+    """List shard files in a directory, in a stable order"""
+    if not directory:
+        return []
+    return sorted(glob.glob(os.path.join(directory, 'shard_*.npz')))
@@ -0,0 +1,154 @@
+import cv2
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RulingGridExtractor:
+    """
+    Builds the cell lattice of a ruled table from its line masks.
+
+    Connected components of the horizontal and vertical ruling-line masks
+    are clustered into line bands; the gaps between consecutive bands are
+    the rows and columns of the lattice. A lattice edge whose ruling line is
+    missing (not covered by the mask for most of its length) joins the two
+    cells on either side, so merged cells come out as one cell with a row
+    and column span instead of several empty fragments. Joined cells that
+    do not fill their bounding box are split into rectangles.
+    """
+
+    def __init__(self, min_cell_size: int = 8, min_coverage: float = 0.6):
+        # Bands closer than this are one (thick or doubled) line
+        self.min_cell_size = min_cell_size
+        # Fraction of a lattice edge that must be ruled for it to separate two cells
+        self.min_coverage = min_coverage
+
+    def _line_bands(self, mask: np.ndarray, horizontal: bool) -> List[Tuple[int, int]]:
+        """
+        Half-open (start, end) extents of ruling lines across the mask,
+        y extents for horizontal lines and x extents for vertical ones
+        """
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if count <= 1:
+            return []
+
+        if horizontal:
+            starts = stats[1:, cv2.CC_STAT_TOP]
+            ends = starts + stats[1:, cv2.CC_STAT_HEIGHT]
+        else:
+            starts = stats[1:, cv2.CC_STAT_LEFT]
+            ends = starts + stats[1:, cv2.CC_STAT_WIDTH]
+
+        # Merge overlapping or nearly touching extents into bands
+        order = np.argsort(starts, kind='stable')
+        bands = []
+        for start, end in zip(starts[order].tolist(), ends[order].tolist()):
+            if bands and start - bands[-1][1] < self.min_cell_size:
+                bands[-1][1] = max(bands[-1][1], end)
+            else:
+                bands.append([start, end])
+
+        return [tuple(band) for band in bands]
+
+    def _edge_coverage(self, mask: np.ndarray, band: Tuple[int, int], spans: List[Tuple[int, int]],
+                       horizontal: bool) -> np.ndarray:
+        """
+        Fraction of every span along one line band that is covered by the mask
+        """
+        start, end = band
+        if horizontal:
+            profile = mask[start:end, :].max(axis=0) > 0
+        else:
+            profile = mask[:, start:end].max(axis=1) > 0
+
+        cumulative = np.concatenate(([0], np.cumsum(profile, dtype=np.int64)))
+        bounds = np.asarray(spans, dtype=np.int64)
+        lengths = np.maximum(bounds[:, 1] - bounds[:, 0], 1)
+        return (cumulative[bounds[:, 1]] - cumulative[bounds[:, 0]]) / lengths
+
+    def extract(self, horizontal_lines: np.ndarray, vertical_lines: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Extract the cell lattice of one table from its line masks.
+
+        Returns None when there are not enough ruling lines to form a grid.
+        Otherwise returns a dict with:
+            rows, columns - (start, end) extents of the lattice rows / columns
+            cells         - rows x columns grid of (x1, y1, x2, y2) boxes; a merged
+                            cell's box is stored at its top-left position and the
+                            positions it covers hold None
+            spans         - {(row, col): (row_span, col_span)} for merged cells
+        """
+        row_bands = self._line_bands(horizontal_lines, horizontal=True)
+        column_bands = self._line_bands(vertical_lines, horizontal=False)
+        if len(row_bands) < 2 or len(column_bands) < 2:
+            return None
+
+        rows = [(row_bands[i][1], row_bands[i + 1][0]) for i in range(len(row_bands) - 1)]
+        columns = [(column_bands[j][1], column_bands[j + 1][0]) for j in range(len(column_bands) - 1)]
+        num_rows, num_columns = len(rows), len(columns)
+
+        # Union-find over lattice cells; a missing edge joins its two neighbours
+        parent = list(range(num_rows * num_columns))
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        def union(a, b):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        for j in range(1, num_columns):
+            coverage = self._edge_coverage(vertical_lines, column_bands[j], rows, horizontal=False)
+            for i in np.flatnonzero(coverage < self.min_coverage).tolist():
+                union(i * num_columns + j - 1, i * num_columns + j)
+
+        for i in range(1, num_rows):
+            coverage = self._edge_coverage(horizontal_lines, row_bands[i], columns, horizontal=True)
+            for j in np.flatnonzero(coverage < self.min_coverage).tolist():
+                union((i - 1) * num_columns + j, i * num_columns + j)
+
+        # Cover every group with rectangles in row-major order: the first
+        # free cell of a group takes the run of its group to the right, then
+        # every row below that continues the run. A group that fills its
+        # bounding box is one rectangle; one that does not (an L-shaped gap in
+        # the rulings) is split, so no merged box overlaps another cell.
+        labels = [[find(i * num_columns + j) for j in range(num_columns)] for i in range(num_rows)]
+        taken = [[False] * num_columns for _ in range(num_rows)]
+        cells = [[None] * num_columns for _ in range(num_rows)]
+        spans = {}
+        pieces = {}
+        for r0 in range(num_rows):
+            for c0 in range(num_columns):
+                if taken[r0][c0]:
+                    continue
+                group = labels[r0][c0]
+                c1 = c0
+                while c1 + 1 < num_columns and labels[r0][c1 + 1] == group and not taken[r0][c1 + 1]:
+                    c1 += 1
+                r1 = r0
+                while r1 + 1 < num_rows and all(labels[r1 + 1][c] == group and not taken[r1 + 1][c]
+                                                for c in range(c0, c1 + 1)):
+                    r1 += 1
+
+                for i in range(r0, r1 + 1):
+                    taken[i][c0:c1 + 1] = [True] * (c1 - c0 + 1)
+                cells[r0][c0] = (columns[c0][0], rows[r0][0], columns[c1][1], rows[r1][1])
+                if r1 > r0 or c1 > c0:
+                    spans[(r0, c0)] = (r1 - r0 + 1, c1 - c0 + 1)
+                pieces[group] = pieces.get(group, 0) + 1
+
+        split = sum(1 for count in pieces.values() if count > 1)
+        if split:
+            logger.debug(f"Split {split} non-rectangular merged cell groups")
+
+        return {
+            'rows': rows,
+            'columns': columns,
+            'cells': cells,
+            'spans': spans
+        }
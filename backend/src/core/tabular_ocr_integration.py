@@ -3,9 +3,15 @@ import numpy as np
 import pandas as pd
 import re
 import os
+import threading
 from typing import List, Dict, Any, Optional, Tuple
 import logging
 from PIL import Image
+from .cell_occupancy import CellOccupancyAnalyzer
+from .denoise import TieredDenoiser
+from .preprocessed_page import PreprocessedPage
+from .attendance_parser import AttendanceLineParser
+from .table_grid import RulingGridExtractor
 
 logger = logging.getLogger(__name__)
 
@@ -14,9 +20,46 @@ class TabularOCRIntegration:
     Integration with TabularOCR for enhanced table extraction
     """
     
-    def __init__(self):
+    MARK_DETECTION_MODES = ('auto', 'ink', 'ocr')
+    
+    def __init__(self, mark_classifier=None, mark_detection: str = 'auto'):
         self.tabular_ocr = None
         self._initialize_tabular_ocr()
+        
+        # How attendance mark cells are read:
+        #   'auto' - mark classifier when a trained one is available, OCR otherwise
+        #   'ink'  - ink density only (signature/tick registers: mark = present, empty = absent)
+        #   'ocr'  - always OCR every cell
+        if mark_detection not in self.MARK_DETECTION_MODES:
+            raise ValueError(f"Unknown mark detection mode: {mark_detection}")
+        self.mark_detection = mark_detection
+        
+        # Optional AttendanceMarkClassifier for single-symbol attendance cells
+        self.mark_classifier = mark_classifier
+        self.mark_confidence_threshold = 0.8
+        
+        # Integral-image ink analysis for OCR-free mark detection
+        self.occupancy = CellOccupancyAnalyzer()
+        
+        # Noise-adaptive denoising for enhance_image_for_ocr
+        self.denoiser = TieredDenoiser()
+        
+        # Columns narrower than this many row heights are treated as mark columns
+        self.mark_column_max_aspect = 1.5
+        
+        # Cell lattice from the ruling lines; projections are the fallback for unruled tables
+        self.grid_extractor = RulingGridExtractor()
+        self.ruling_line_length = 40
+        
+        # Layout (regions, lattice, projections) runs on a downscaled pyramid level
+        self.layout_scale = 0.5
+        
+        # Cell OCR calls made and skipped as blank, across all processed tables
+        self.ocr_call_stats = {'performed': 0, 'skipped_blank': 0}
+        self._stats_lock = threading.Lock()
+        
+        # Shared compiled parser for OCR'd rows
+        self.line_parser = AttendanceLineParser()
     
     def _initialize_tabular_ocr(self):
         """Initialize TabularOCR if available"""
@@ -29,23 +72,27 @@ class TabularOCRIntegration:
         except ImportError:
             logger.warning("TabularOCR not available, using fallback methods")
     
+    def _level_line_length(self, level: PreprocessedPage) -> int:
+        """Minimum ruling line length in pixels of a layout pyramid level"""
+        return max(3, int(round(self.ruling_line_length * level.scale)))
+    
     def detect_table_regions(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
         """
-        Detect table regions in the image using computer vision
-        """
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+        Detect table regions in the image using computer vision.
         
-        # Apply threshold
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        Runs on the layout pyramid level; regions are returned in
+        full-resolution coordinates.
+        """
+        # Ruling line masks, kept on the level for extract_table_structure
+        page = PreprocessedPage.wrap(image)
+        level = page.level(self.layout_scale)
+        line_length = self._level_line_length(level)
         
         # Detect horizontal lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-        horizontal_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel)
+        horizontal_lines = level.horizontal_lines(line_length)
         
         # Detect vertical lines
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
-        vertical_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel)
+        vertical_lines = level.vertical_lines(line_length)
         
         # Combine lines
         table_mask = cv2.addWeighted(horizontal_lines, 0.5, vertical_lines, 0.5, 0.0)
@@ -53,93 +100,119 @@ class TabularOCRIntegration:
         # Find contours
         contours, _ = cv2.findContours(table_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
+        height, width = page.shape[:2]
         table_regions = []
         for contour in contours:
             x, y, w, h = cv2.boundingRect(contour)
             # Filter by size - tables should be reasonably large
-            if w > 200 and h > 100:
-                table_regions.append((x, y, x + w, y + h))
+            if w > 200 * level.scale and h > 100 * level.scale:
+                x1, y1, x2, y2 = level.to_page(x, y, x + w, y + h)
+                table_regions.append((x1, y1, min(x2, width), min(y2, height)))
         
         return table_regions
     
     def extract_table_structure(self, image: np.ndarray, table_region: Tuple[int, int, int, int]) -> Dict[str, Any]:
         """
-        Extract table structure from a detected table region
+        Extract table structure from a detected table region.
+        
+        Ruled tables get an exact cell lattice (with merged cells) from their
+        ruling lines; tables without enough lines fall back to ink projections.
+        Both run on the layout pyramid level and the structure is mapped back
+        to full-resolution coordinates relative to the region.
         """
+        page = PreprocessedPage.wrap(image)
+        level = page.level(self.layout_scale)
+        level_region = level.from_page(*table_region)
+        table_level = level.region(*level_region)
+        line_length = self._level_line_length(level)
+        
+        structure = self.grid_extractor.extract(
+            table_level.horizontal_lines(line_length),
+            table_level.vertical_lines(line_length)
+        )
+        if structure is not None:
+            structure['source'] = 'ruling_lines'
+        else:
+            # The table gets its own page so its Otsu level is computed from the
+            # table alone, once, and shared by the row and column passes
+            table = PreprocessedPage(table_level.gray)
+            
+            # Detect rows and columns
+            rows = self._detect_rows(table)
+            columns = self._detect_columns(table)
+            
+            structure = {
+                'rows': rows,
+                'columns': columns,
+                'cells': self._create_cell_grid(rows, columns),
+                'spans': {},
+                'source': 'projection'
+            }
+        
+        structure['region'] = table_region
+        return self._structure_to_page(structure, level, level_region, table_region)
+    
+    def _structure_to_page(self, structure: Dict[str, Any], level: PreprocessedPage,
+                           level_region: Tuple[int, int, int, int],
+                           table_region: Tuple[int, int, int, int]) -> Dict[str, Any]:
+        """
+        Map rows, columns and cells found on a pyramid level (relative to the
+        table on that level) to full resolution, relative to the table region
+        """
+        if level.scale >= 1.0:
+            return structure
+        
         x1, y1, x2, y2 = table_region
-        table_roi = image[y1:y2, x1:x2]
         
-        # Convert to grayscale
-        gray = cv2.cvtColor(table_roi, cv2.COLOR_BGR2GRAY) if len(table_roi.shape) == 3 else table_roi
-        
-        # Detect rows and columns
-        rows = self._detect_rows(gray)
-        columns = self._detect_columns(gray)
-        
-        return {
-            'region': table_region,
-            'rows': rows,
-            'columns': columns,
-            'cells': self._create_cell_grid(rows, columns)
-        }
+        def to_x(value):
+            return min(max(level.to_page(level_region[0] + value)[0] - x1, 0), x2 - x1)
+        
+        def to_y(value):
+            return min(max(level.to_page(level_region[1] + value)[0] - y1, 0), y2 - y1)
+        
+        structure['rows'] = [(to_y(start), to_y(end)) for start, end in structure['rows']]
+        structure['columns'] = [(to_x(start), to_x(end)) for start, end in structure['columns']]
+        structure['cells'] = [
+            [None if cell is None else (to_x(cell[0]), to_y(cell[1]), to_x(cell[2]), to_y(cell[3])) for cell in row]
+            for row in structure['cells']
+        ]
+        return structure
+    
+    def _projection_spans(self, projection: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+        """
+        Half-open (start, end) runs where the projection is above the threshold.
+        
+        Run boundaries are the nonzero steps of the padded mask, so the spans
+        come out of a few array operations instead of a Python loop.
+        """
+        mask = np.empty(len(projection) + 2, dtype=np.int8)
+        mask[0] = mask[-1] = 0
+        mask[1:-1] = projection > threshold
+        
+        edges = np.flatnonzero(np.diff(mask))
+        return list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
     
     def _detect_rows(self, gray_image: np.ndarray) -> List[Tuple[int, int]]:
         """Detect table rows"""
         # Apply threshold
-        _, thresh = cv2.threshold(gray_image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        thresh = PreprocessedPage.wrap(gray_image).otsu(0, inverse=True)
         
         # Horizontal projection to find row separators
         horizontal_projection = np.sum(thresh, axis=1)
         
-        # Find peaks (row separators)
-        rows = []
-        in_row = False
-        start_y = 0
-        
-        for y, intensity in enumerate(horizontal_projection):
-            if intensity > np.mean(horizontal_projection) * 0.5:  # Threshold for row detection
-                if not in_row:
-                    start_y = y
-                    in_row = True
-            else:
-                if in_row:
-                    rows.append((start_y, y))
-                    in_row = False
-        
-        # Add last row if needed
-        if in_row:
-            rows.append((start_y, len(horizontal_projection)))
-        
-        return rows
+        # Rows are runs above half the mean intensity
+        return self._projection_spans(horizontal_projection, np.mean(horizontal_projection) * 0.5)
     
     def _detect_columns(self, gray_image: np.ndarray) -> List[Tuple[int, int]]:
         """Detect table columns"""
         # Apply threshold
-        _, thresh = cv2.threshold(gray_image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        thresh = PreprocessedPage.wrap(gray_image).otsu(0, inverse=True)
         
         # Vertical projection to find column separators
         vertical_projection = np.sum(thresh, axis=0)
         
-        # Find valleys (column separators)
-        columns = []
-        in_column = False
-        start_x = 0
-        
-        for x, intensity in enumerate(vertical_projection):
-            if intensity > np.mean(vertical_projection) * 0.3:  # Threshold for column detection
-                if not in_column:
-                    start_x = x
-                    in_column = True
-            else:
-                if in_column:
-                    columns.append((start_x, x))
-                    in_column = False
-        
-        # Add last column if needed
-        if in_column:
-            columns.append((start_x, len(vertical_projection)))
-        
-        return columns
+        # Columns are runs above 30% of the mean intensity
+        return self._projection_spans(vertical_projection, np.mean(vertical_projection) * 0.3)
     
     def _create_cell_grid(self, rows: List[Tuple[int, int]], columns: List[Tuple[int, int]]) -> List[List[Tuple[int, int, int, int]]]:
         """Create a grid of cell coordinates"""
@@ -166,9 +239,11 @@ class TabularOCRIntegration:
         x2 = min(image.shape[1], x2 + padding)
         y2 = min(image.shape[0], y2 + padding)
         
-        cell_roi = image[y1:y2, x1:x2]
+        # A region of the page, so the engine's preprocessing is a view of the
+        # page-level variants instead of being recomputed for every cell
+        cell_roi = PreprocessedPage.wrap(image).region(x1, y1, x2, y2)
         
-        if cell_roi.size == 0:
+        if cell_roi.image.size == 0:
             return ""
         
         # Extract text using the provided OCR engine
@@ -178,99 +253,220 @@ class TabularOCRIntegration:
         except:
             return ""
     
-    def process_table_with_structure(self, image: np.ndarray, ocr_engine) -> List[Dict[str, Any]]:
+    def _find_mark_columns(self, table_structure: Dict[str, Any]) -> List[int]:
         """
-        Process image using table structure detection
+        Return indices of narrow columns that hold single attendance marks.
+        
+        Marks follow the roll number and name columns, so narrow columns
+        left of the first wide column (Sr. No., section) are not marks; read
+        from ink they would all come out as present.
         """
-        results = []
+        rows, columns = table_structure['rows'], table_structure['columns']
+        if not rows or not columns:
+            return []
+        
+        row_height = float(np.median([end - start for start, end in rows]))
+        max_width = row_height * self.mark_column_max_aspect
+        narrow = [end - start <= max_width for start, end in columns]
+        
+        # A table of narrow columns only has no identity columns to skip
+        first_wide = narrow.index(False) if False in narrow else -1
+        return [idx for idx, is_narrow in enumerate(narrow) if is_narrow and idx > first_wide]
+    
+    def _classify_mark_cells(self, image: np.ndarray, cells: Dict[Tuple[int, int], Tuple[int, int, int, int]]) -> Dict[Tuple[int, int], Optional[str]]:
+        """
+        Classify all mark cells of a table in one batch, keeping confident predictions only
+        """
+        if self.mark_classifier is None or not self.mark_classifier.is_trained or not cells:
+            return {}
+        
+        keys = list(cells.keys())
+        predictions = self.mark_classifier.classify_cells(image, [cells[key] for key in keys])
+        
+        marks = {}
+        for key, (label, confidence) in zip(keys, predictions):
+            if confidence >= self.mark_confidence_threshold:
+                marks[key] = self.mark_classifier.MARK_SYMBOLS[label]
+        
+        logger.info(f"Mark classifier resolved {len(marks)}/{len(keys)} mark cells")
+        return marks
+    
+    def _ink_marks(self, integral: np.ndarray, cells: Dict[Tuple[int, int], Tuple[int, int, int, int]]) -> Dict[Tuple[int, int], Optional[str]]:
+        """
+        Read all mark cells of a table from ink density in one vectorized pass
+        """
+        keys = list(cells.keys())
+        symbols = self.occupancy.marks_for_cells(integral, [cells[key] for key in keys])
+        return dict(zip(keys, symbols))
+    
+    def analyze_tables(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Table layout of a page: every detected region with its structure,
+        its cells keyed by (row, column) in page coordinates and the page
+        y range of every row
+        """
+        page = PreprocessedPage.wrap(image)
         
         # Detect table regions
-        table_regions = self.detect_table_regions(image)
+        table_regions = self.detect_table_regions(page)
         logger.info(f"Detected {len(table_regions)} table regions")
         
-        for i, region in enumerate(table_regions):
-            logger.info(f"Processing table region {i+1}")
-            
+        tables = []
+        for region in table_regions:
             # Extract table structure
-            table_structure = self.extract_table_structure(image, region)
+            table_structure = self.extract_table_structure(page, region)
             
-            # Extract content from each cell
-            table_data = []
+            # Adjust cell coordinates to global image coordinates
+            global_cells = {}
             for row_idx, cell_row in enumerate(table_structure['cells']):
-                row_data = []
-                for col_idx, cell_coords in enumerate(cell_row):
-                    # Adjust coordinates to global image coordinates
-                    x1, y1, x2, y2 = cell_coords
-                    global_coords = (
+                for col_idx, cell in enumerate(cell_row):
+                    # Positions covered by a merged cell have no box of their own
+                    if cell is None:
+                        continue
+                    x1, y1, x2, y2 = cell
+                    global_cells[(row_idx, col_idx)] = (
                         region[0] + x1,
                         region[1] + y1,
                         region[0] + x2,
                         region[1] + y2
                     )
+            
+            tables.append({
+                'region': region,
+                'structure': table_structure,
+                'cells': global_cells,
+                # Page y range of every table row
+                'rows': [(region[1] + start, region[1] + end) for start, end in table_structure['rows']]
+            })
+        
+        return tables
+    
+    def process_table_with_structure(self, image: np.ndarray, ocr_engine,
+                                     row_spans: Optional[List[Tuple[int, int]]] = None,
+                                     layout=None) -> List[Dict[str, Any]]:
+        """
+        Process image using table structure detection.
+        
+        With `row_spans` (page y ranges) only the table rows whose centre
+        lies in one of them are read, and every record carries the page
+        y range of its row as 'row_span'.
+        
+        With a PageLayout of the page, its tables are used instead of being
+        detected again, and every record whose row lies on one of the
+        layout's text lines gets that line's 'line_number'.
+        """
+        results = []
+        
+        # Every layout pass, classifier and OCR call below shares this page's variants
+        page = PreprocessedPage.wrap(image)
+        tables = layout.tables if layout is not None else self.analyze_tables(page)
+        
+        for i, table in enumerate(tables):
+            logger.info(f"Processing table region {i+1}")
+            table_structure = table['structure']
+            global_cells = table['cells']
+            page_rows = table['rows']
+            
+            logger.info(f"Table {i+1}: {len(table_structure['rows'])}x{len(table_structure['columns'])} "
+                        f"{table_structure['source']} grid, {len(global_cells)} cells "
+                        f"({len(table_structure['spans'])} merged)")
+            
+            # Read every attendance mark cell of the grid in one batch (merged cells are never marks)
+            mark_columns = set(self._find_mark_columns(table_structure))
+            mark_cells = {key: coords for key, coords in global_cells.items()
+                          if key[1] in mark_columns and key not in table_structure['spans']}
+            
+            if self.mark_detection == 'ink' and mark_cells:
+                classified_marks = self._ink_marks(page.ink_integral(), mark_cells)
+            elif self.mark_detection == 'auto':
+                classified_marks = self._classify_mark_cells(page.gray, mark_cells)
+            else:
+                classified_marks = {}
+            
+            # Remaining cells with too little ink for OCR are answered from the
+            # page-wide ink integral (four lookups each) without calling an engine
+            ocr_keys = [key for key in global_cells if key not in classified_marks]
+            inked = {}
+            if ocr_keys:
+                flags = self.occupancy.has_ink(page.ink_integral(), [global_cells[key] for key in ocr_keys])
+                inked = dict(zip(ocr_keys, flags.tolist()))
+            performed = skipped = 0
+            
+            # Extract content from the remaining cells
+            table_data = []
+            for row_idx, cell_row in enumerate(table_structure['cells']):
+                row_data = []
+                if row_spans is not None and not self._row_in_spans(page_rows[row_idx], row_spans):
+                    # Not asked for: no cell of this row is read
+                    table_data.append(row_data)
+                    continue
+                for col_idx in range(len(cell_row)):
+                    key = (row_idx, col_idx)
+                    if key not in global_cells:
+                        row_data.append("")
+                        continue
+                    if key in classified_marks:
+                        # In its own column, so marks stay in lecture order
+                        # next to the ones OCR reads
+                        row_data.append(classified_marks[key] or "")
+                        continue
                     
-                    cell_content = self.extract_cell_content(image, global_coords, ocr_engine)
+                    if not inked[key]:
+                        row_data.append("")
+                        skipped += 1
+                        continue
+                    
+                    cell_content = self.extract_cell_content(page, global_cells[key], ocr_engine)
                     row_data.append(cell_content)
+                    performed += 1
                 
                 table_data.append(row_data)
             
+            with self._stats_lock:
+                self.ocr_call_stats['performed'] += performed
+                self.ocr_call_stats['skipped_blank'] += skipped
+            logger.info(f"Table {i+1}: OCR on {performed} cells, skipped {skipped} blank cells")
+            
             # Convert to structured attendance data
-            structured_data = self._convert_table_to_attendance_data(table_data)
+            line_numbers = None
+            if layout is not None:
+                # Numbered by the layout's text lines, like the other methods' records
+                line_numbers = [None if line is None else line + 1 for line in map(layout.line_index, page_rows)]
+            structured_data = self._convert_table_to_attendance_data(
+                table_data, page_rows if row_spans is not None else None, line_numbers
+            )
             results.extend(structured_data)
         
         return results
     
-    def _convert_table_to_attendance_data(self, table_data: List[List[str]]) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _row_in_spans(row: Tuple[int, int], spans: List[Tuple[int, int]]) -> bool:
+        """True if the row's centre lies in one of the y spans"""
+        centre = (row[0] + row[1]) / 2
+        return any(y1 <= centre < y2 for y1, y2 in spans)
+    
+    def _convert_table_to_attendance_data(self, table_data: List[List[str]],
+                                          row_spans: Optional[List[Tuple[int, int]]] = None,
+                                          line_numbers: Optional[List[Optional[int]]] = None) -> List[Dict[str, Any]]:
         """
-        Convert raw table data to structured attendance records
+        Convert raw table data to structured attendance records.
+        
+        Mark cells recognized without OCR hold their symbol in `table_data`
+        like OCR'd cells do. `row_spans` and `line_numbers`, when given, are stored with each
+        row's record (a None line number is left out).
         """
         attendance_records = []
         
-        for row in table_data:
+        for row_idx, row in enumerate(table_data):
             if len(row) < 2:  # Need at least roll number and name
                 continue
             
-            # Try to find roll number in the row
-            roll_number = None
-            name = ""
-            attendance_marks = []
-            
-            for cell in row:
-                # Check for roll number
-                roll_match = re.search(r'\b(23\d{6})\b', cell)
-                if roll_match:
-                    roll_number = roll_match.group(1)
-                    continue
-                
-                # Check for name (alphabetic characters)
-                if re.search(r'^[A-Za-z\s]+$', cell.strip()) and len(cell.strip()) > 2:
-                    if not name:  # Take the first name found
-                        name = cell.strip()
-                    continue
-                
-                # Check for attendance marks
-                if re.search(r'^[PA✓✗XY01-]+$', cell.strip()):
-                    attendance_marks.extend(list(cell.strip()))
-            
-            # Create record if we have at least a roll number
-            if roll_number:
-                # Count attendance
-                present_count = sum(1 for mark in attendance_marks if mark.upper() in ['P', '✓', 'Y', '1'])
-                absent_count = sum(1 for mark in attendance_marks if mark.upper() in ['A', '✗', 'X', '0', '-'])
-                total_classes = len(attendance_marks)
-                
-                attendance_percentage = (present_count / total_classes * 100) if total_classes > 0 else 0
-                
-                record = {
-                    'roll_number': roll_number,
-                    'name': name.title() if name else "",
-                    'present_count': present_count,
-                    'absent_count': absent_count,
-                    'total_classes': total_classes,
-                    'attendance_percentage': round(attendance_percentage, 2),
-                    'attendance_marks': attendance_marks,
-                    'raw_row': row
-                }
-                
+            record = self.line_parser.parse_row(row)
+            if record:
+                if row_spans is not None:
+                    record['row_span'] = row_spans[row_idx]
+                if line_numbers is not None and line_numbers[row_idx] is not None:
+                    record['line_number'] = line_numbers[row_idx]
                 attendance_records.append(record)
         
         return attendance_records
@@ -280,10 +476,10 @@ class TabularOCRIntegration:
         Enhance image specifically for table OCR
         """
         # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+        gray = PreprocessedPage.wrap(image).gray
         
-        # Noise reduction
-        denoised = cv2.fastNlMeansDenoising(gray)
+        # Noise reduction (tier chosen from the page noise level)
+        denoised = self.denoiser.denoise(gray)
         
         # Contrast enhancement
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Attendance Matrix Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from src.core.attendance_matrix import AttendanceMatrix
+from src.core.data_processor import DataProcessor
+
+P, A, U, M = AttendanceMatrix.PRESENT, AttendanceMatrix.ABSENT, AttendanceMatrix.UNCLEAR, AttendanceMatrix.MISSING
+
+def test_records_to_matrix_and_queries():
+    """OCR records become uint8 rows; percentages and defaulters are per row"""
+    records = [
+        {'roll_number': '23000001', 'name': 'Asha', 'attendance_marks': ['P', '✓', 'A', 'p']},
+        {'roll_number': '23000002', 'name': 'Ravi', 'attendance_marks': ['X', '?']},
+        {'roll_number': '', 'name': 'noise', 'attendance_marks': ['P']},
+    ]
+
+    matrix = AttendanceMatrix.from_records(records, subject="Maths", date="2024")
+
+    assert matrix.codes.dtype == np.uint8
+    assert matrix.codes.tolist() == [[P, P, A, P], [A, U, M, M]]
+    assert matrix.lectures[0] == "2024_lecture_1"
+    assert np.allclose(matrix.percentages(), [75.0, 0.0])
+    assert matrix.defaulters() == ['23000002']
+    assert matrix.defaulters(threshold=80) == ['23000001', '23000002']
+    assert matrix.summary()['total_lectures'].tolist() == [4, 2]
+
+    frame = matrix.to_frame()
+    assert np.shares_memory(frame.to_numpy(), matrix.codes)
+    assert frame.loc['23000002', ('Maths', '2024_lecture_1')] == A
+
+def test_merge_pages_and_subjects():
+    """Pages add students, documents add subject blocks; recorded marks win over missing"""
+    page1 = AttendanceMatrix(np.array([[P, A], [P, M]]), ['1', '2'], ['A', ''], ['l1', 'l2'], ['Maths'] * 2)
+    page2 = AttendanceMatrix(np.array([[A, A], [M, P]]), ['3', '2'], ['C', 'B'], ['l1', 'l2'], ['Maths'] * 2)
+    physics = AttendanceMatrix(np.array([[P], [A]]), ['2', '1'], None, ['l1'], ['Physics'])
+
+    merged = AttendanceMatrix.merge([page1, physics, page2])
+
+    assert merged.roll_numbers == ['1', '2', '3']
+    assert merged.names == ['A', 'B', 'C']
+    assert merged.blocks == {'Maths': slice(0, 2), 'Physics': slice(2, 3)}
+    assert merged.codes.tolist() == [[P, A, A], [P, P, P], [A, A, M]]
+
+    maths = merged.subject('Maths')
+    assert np.shares_memory(maths.codes, merged.codes)
+    assert maths.defaulters() == ['1', '3']
+
+def test_dataframe_matrix_agrees_with_aggregation():
+    """The matrix of process_table_to_dataframe records gives aggregate_attendance's numbers"""
+    processor = DataProcessor()
+    rng = np.random.default_rng(1)
+    marks = np.array(['P', 'A', '?', 'p', 'X', ''], dtype=object)
+    table = [[f"2300{s:04d}", f"Student {s}"] + list(marks[rng.integers(len(marks), size=rng.integers(1, 9))])
+             for s in range(40)]
+    df = processor.process_table_to_dataframe(table, "Maths", "2024")
+
+    matrix = processor.to_attendance_matrix(df)
+    aggregated = processor.aggregate_attendance(df)
+
+    summary = matrix.summary().sort_values('roll_number').reset_index(drop=True)
+    pd.testing.assert_frame_equal(summary, aggregated.drop(columns=['subject', 'valid_lectures']), check_dtype=False)
+
+if __name__ == "__main__":
+    test_records_to_matrix_and_queries()
+    test_merge_pages_and_subjects()
+    test_dataframe_matrix_agrees_with_aggregation()
+    print("All attendance matrix tests passed")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Attendance Parser Test
+"""
+
+import sys
+import os
+import re
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from src.core.attendance_parser import AttendanceLineParser, _remove_word
+
+def test_line_record_counts_marks():
+    """A table line gives roll number, capitalized name and mark counts"""
+    parser = AttendanceLineParser()
+
+    record = parser.parse_line("| 23456789 | asha  verma | P | A | ✓ |")
+
+    assert record['roll_number'] == '23456789'
+    assert record['name'] == 'Asha Verma'
+    assert record['attendance_marks'] == ['P', 'A', '✓']
+    assert (record['present_count'], record['absent_count'], record['total_classes']) == (2, 1, 3)
+    assert record['attendance_percentage'] == 66.67
+    assert parser.parse_line("x_23001234 Ravi P")['roll_number'] == '23001234'
+    assert parser.parse_lines(["Roll No Name", "123001234 Ravi"]) == [None, None]
+
+def test_roll_patterns_keep_their_priority():
+    """The highest-priority pattern wins even when a lower one matches earlier"""
+    parser = AttendanceLineParser([r'\b23\d{6}\b', r'\b\d{2}[A-Z]{2}\d{4}\b', r'\b\d{8}\b'])
+
+    assert parser.find_roll("12345678 Ravi 23001234") == '23001234'
+    assert parser.find_roll("12345678 Ravi 23CS1234") == '23CS1234'
+    assert parser.find_roll("Ravi Kumar P") is None
+
+    students = parser.extract_students("1 23CS1234 ravi kumar P\nshort\n2 Meera A", score=len)
+    assert [(s['roll_number'], s['name'], s['attendance']) for s in students] == [('23CS1234', 'Ravi Kumar', 'Present')]
+
+def test_remove_word_matches_word_boundary_regex():
+    """Whole-word removal equals the word-boundary regex it replaces"""
+    rng = np.random.default_rng(3)
+    alphabet = list("ab1_ -.|") + ["23CS", "23CS1"]
+    for _ in range(2000):
+        text = ''.join(rng.choice(alphabet, size=rng.integers(0, 12)))
+        expected = re.sub(r'\b' + re.escape("23CS1") + r'\b', '', text)
+        assert _remove_word(text, "23CS1") == expected, text
+
+if __name__ == "__main__":
+    test_line_record_counts_marks()
+    test_roll_patterns_keep_their_priority()
+    test_remove_word_matches_word_boundary_regex()
+    print("All attendance parser tests passed")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Attendance Data Processor Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from src.core.data_processor import DataProcessor
+
+RAW_MARKS = ['P', 'a', ' present ', '✓', 'X', '-', '0', '1', 'YES', 'no', 'N/A', '', None,
+             float('nan'), 'P?', 'Absent', '??', 'pA', '✔', 'E']
+
+def test_column_normalization_matches_per_cell():
+    """The categorical column holds what normalize_attendance_status gives per cell"""
+    processor = DataProcessor()
+    rng = np.random.default_rng(0)
+    raw = pd.Series([RAW_MARKS[i] for i in rng.integers(len(RAW_MARKS), size=500)], dtype=object)
+
+    statuses = processor.normalize_attendance_column(raw)
+
+    assert isinstance(statuses.dtype, pd.CategoricalDtype)
+    assert list(statuses.cat.categories) == ['Present', 'Absent', 'Unclear']
+    assert statuses.tolist() == [processor.normalize_attendance_status(value) for value in raw]
+
+    rolls = pd.Series(['23001234', 'CS 12', '', None, '23-01', 'ab12'] * 3)
+    assert processor.validate_roll_column(rolls).tolist() == [processor.validate_roll_number(r) for r in rolls]
+    names = pd.Series(['Asha', 'R', ' ', None, 'Ravi Kumar'])
+    assert processor.validate_name_column(names).tolist() == [processor.validate_name(n) for n in names]
+
+def test_table_to_dataframe():
+    """One record per student x lecture with normalized status and validation"""
+    processor = DataProcessor()
+    table = [['23001234', 'Asha Verma', 'P', 'A', '✓'], ['x'], ['23-9', 'R', '?']]
+
+    df = processor.process_table_to_dataframe(table, "Maths", "2024-01-01")
+
+    assert len(df) == 4
+    assert df['attendance_status'].tolist() == ['Present', 'Absent', 'Present', 'Unclear']
+    assert df['date'].tolist() == ["2024-01-01_lecture_1", "2024-01-01_lecture_2", "2024-01-01_lecture_3",
+                                   "2024-01-01_lecture_1"]
+    assert df['lecture'].tolist() == [1, 2, 3, 1]
+    assert df['subject'].tolist() == ["Maths"] * 4
+    assert df['student_name'].tolist() == ['Asha Verma'] * 3 + ['R']
+    assert df['attendance_raw'].tolist() == ['P', 'A', '✓', '?']
+    assert df['valid_roll'].tolist() == [True, True, True, False]
+    assert df['valid_name'].tolist() == [True, True, True, False]
+
+    # Categorical subject/date keys aggregate like plain strings
+    agg = processor.aggregate_attendance(df)
+    assert agg['subject'].tolist() == ["Maths", "Maths"]
+    assert agg['total_lectures'].tolist() == [1, 3]
+
+def test_aggregate_counts_per_student():
+    """Counts, percentage and defaulter status per student and subject"""
+    processor = DataProcessor()
+    df = pd.DataFrame({
+        'roll_number': ['2', '1', '1', '1', '2', '1', None, '3'],
+        'student_name': ['B', 'A', 'A', 'A', 'B', 'A', 'C', 'D'],
+        'subject': ['Maths'] * 7 + ['Physics'],
+        'attendance_status': ['Absent', 'Present', 'Present', 'Unclear', 'Absent', 'Absent', 'Present', None]
+    })
+
+    for statuses in (df['attendance_status'], df['attendance_status'].astype('category')):
+        agg = processor.aggregate_attendance(df.assign(attendance_status=statuses))
+
+        assert agg['roll_number'].tolist() == ['1', '2', '3']
+        assert agg['total_lectures'].tolist() == [4, 2, 0]
+        assert agg['present_count'].tolist() == [2, 0, 0]
+        assert agg['absent_count'].tolist() == [1, 2, 0]
+        assert agg['unclear_count'].tolist() == [1, 0, 0]
+        assert np.allclose(agg['attendance_percentage'], [200 / 3, 0, 0])
+        assert agg['status'].tolist() == ['Defaulter', 'Defaulter', 'Defaulter']
+
+def test_anomaly_records_per_student_and_page():
+    """Students appear once per lecture and on every page without being reported; real anomalies are records"""
+    processor = DataProcessor()
+    page1 = [['23000001', 'Asha', 'P', 'P', 'P', 'P'], ['23000002', 'Ravi', 'A', '?', '?', '?'],
+             ['23000003', 'Meera', 'P', 'P', 'A', 'P'], ['23000001', 'Asha', 'P', 'P', 'P', 'P']]
+    page2 = [['23000003', 'Meera K', 'A', 'A', 'A', 'A'], ['23000005', 'Pooja', 'P', 'P', 'P', 'P'],
+             ['23000006', 'Om', 'P', 'P', 'P', 'P']]
+    df = pd.concat([processor.process_table_to_dataframe(page, "Maths", f"2024_table_{i+1}")
+                    for i, page in enumerate([page1, page2])], ignore_index=True)
+
+    records = processor.detect_anomaly_records(df)
+
+    found = {(r.type, r.roll_number, r.source) for r in records.itertuples()}
+    assert found == {
+        ('duplicate_identity', '23000001', '2024_table_1'),
+        ('impossible_count', '23000001', '2024_table_1'),
+        ('conflicting_name', '23000003', None),
+        ('unclear_student', '23000002', None),
+        ('attendance_jump', '23000003', '2024_table_2'),
+    }
+    assert records.loc[records['type'] == 'attendance_jump', 'value'].item() == -75.0
+
+    messages = processor.detect_anomalies(df, records)
+    assert len(messages) == 5
+    assert "Sudden attendance changes (1): 23000003" in messages
+
+    clean = processor.process_table_to_dataframe(page2[1:], "Maths", "2024")
+    assert processor.detect_anomalies(clean) == ["No anomalies detected"]
+
+def test_anomalies_without_roll_numbers():
+    """A page where no roll number was read has nothing to report"""
+    processor = DataProcessor()
+    df = processor.process_table_to_dataframe([[None, 'A', 'P', 'A'], [None, 'B', 'P', 'P']])
+
+    assert processor.detect_anomaly_records(df).empty
+    assert processor.detect_anomalies(df) == ["No anomalies detected"]
+
+if __name__ == "__main__":
+    test_column_normalization_matches_per_cell()
+    test_table_to_dataframe()
+    test_aggregate_counts_per_student()
+    test_anomaly_records_per_student_and_page()
+    test_anomalies_without_roll_numbers()
+    print("All data processor tests passed")
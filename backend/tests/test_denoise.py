@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tiered Denoiser Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+import numpy as np
+
+from src.core.denoise import TieredDenoiser
+
+def _noisy_page(sigma, seed=0):
+    """Grey page with a line of text and Gaussian noise of the given sigma"""
+    rng = np.random.default_rng(seed)
+    page = np.full((800, 1200), 128.0) + rng.normal(0, sigma, (800, 1200))
+    page = np.clip(page, 0, 255).round().astype(np.uint8)
+    cv2.putText(page, "23001234 Asha Verma P A P", (50, 400), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+    return page
+
+def test_select_tier_thresholds():
+    """Each tier starts at its noise threshold"""
+    denoiser = TieredDenoiser()
+    assert denoiser.select_tier(0.0) == 'none'
+    assert denoiser.select_tier(0.99) == 'none'
+    assert denoiser.select_tier(1.0) == 'fast'
+    assert denoiser.select_tier(3.99) == 'fast'
+    assert denoiser.select_tier(4.0) == 'nlm_downscaled'
+    assert denoiser.select_tier(9.99) == 'nlm_downscaled'
+    assert denoiser.select_tier(10.0) == 'nlm_full'
+    assert denoiser.select_tier(50.0) == 'nlm_full'
+
+def test_noise_estimate_recovers_gaussian_sigma():
+    """The estimate is within 10% of the sigma of added Gaussian noise, despite the text"""
+    denoiser = TieredDenoiser()
+    assert denoiser.estimate_noise(_noisy_page(0)) == 0.0
+    for sigma in (2.0, 6.0, 15.0):
+        estimate = denoiser.estimate_noise(_noisy_page(sigma))
+        assert abs(estimate - sigma) <= 0.1 * sigma, (sigma, estimate)
+
+    _, tier = denoiser.denoise_with_tier(_noisy_page(6.0))
+    assert tier == 'nlm_downscaled'
+
+def test_fixed_tier_is_used_without_estimate():
+    """A fixed tier is applied whatever the noise; 'none' passes the page through"""
+    noisy = _noisy_page(15.0)
+
+    passthrough, tier = TieredDenoiser(tier='none').denoise_with_tier(noisy)
+    assert tier == 'none' and passthrough is noisy
+
+    filtered, tier = TieredDenoiser(tier='fast').denoise_with_tier(noisy)
+    assert tier == 'fast'
+    assert np.array_equal(filtered, cv2.medianBlur(noisy, 3))
+
+    # A per-call tier overrides the configured one
+    assert TieredDenoiser(tier='fast').denoise(noisy, tier='none') is noisy
+
+    try:
+        TieredDenoiser(tier='strong')
+        assert False, "unknown tier accepted"
+    except ValueError:
+        pass
+
+def test_timing_report_counts_calls_per_tier():
+    """Calls and seconds are accumulated per tier, unused tiers report zero"""
+    denoiser = TieredDenoiser()
+    denoiser.denoise(_noisy_page(0))
+    denoiser.denoise(_noisy_page(0))
+    denoiser.denoise(_noisy_page(2.0))
+
+    report = denoiser.timing_report()
+    assert list(report) == TieredDenoiser.TIERS
+    assert [report[tier]['calls'] for tier in TieredDenoiser.TIERS] == [2, 1, 0, 0]
+    for stats in report.values():
+        assert stats['total_seconds'] >= 0.0
+        expected_mean = stats['total_seconds'] / stats['calls'] if stats['calls'] else 0.0
+        assert stats['mean_seconds'] == expected_mean
+    assert report['nlm_full'] == {'calls': 0, 'total_seconds': 0.0, 'mean_seconds': 0.0}
+
+if __name__ == "__main__":
+    test_select_tier_thresholds()
+    test_noise_estimate_recovers_gaussian_sigma()
+    test_fixed_tier_is_used_without_estimate()
+    test_timing_report_counts_calls_per_tier()
+    print("All tiered denoiser tests passed")
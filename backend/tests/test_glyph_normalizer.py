@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Glyph Batch Normalizer Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+import numpy as np
+
+from src.core.glyph_normalizer import GlyphBatchNormalizer
+
+def _reference_preprocess(image):
+    """Per-glyph pipeline the batch normalizer replaces"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image.copy()
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    resized = cv2.resize(thresh, (28, 28))
+    return np.expand_dims(resized.astype('float32') / 255.0, axis=-1)
+
+def test_batch_matches_per_glyph_pipeline():
+    """Batch output must be identical to the per-glyph pipeline"""
+    rng = np.random.default_rng(7)
+    glyphs = [rng.integers(0, 256, (int(rng.integers(15, 90)), int(rng.integers(10, 90)), 3), dtype=np.uint8)
+              for _ in range(40)]
+
+    batch = GlyphBatchNormalizer().normalize(glyphs)
+    expected = np.stack([_reference_preprocess(g) for g in glyphs])
+
+    assert batch.dtype == np.float32
+    assert batch.shape == (40, 28, 28, 1)
+    assert np.array_equal(batch, expected)
+
+def test_boxes_match_crops():
+    """Normalizing boxes on a page equals normalizing the cropped glyphs"""
+    rng = np.random.default_rng(11)
+    page = rng.integers(0, 256, (200, 300), dtype=np.uint8)
+    boxes = [(5, 10, 20, 30), (50, 40, 35, 25), (120, 100, 60, 80)]
+
+    batch = GlyphBatchNormalizer().normalize_boxes(page, boxes)
+    expected = np.stack([_reference_preprocess(page[y:y + h, x:x + w]) for x, y, w, h in boxes])
+
+    assert np.array_equal(batch, expected)
+
+def test_empty_batch():
+    """An empty glyph list yields an empty tensor"""
+    assert GlyphBatchNormalizer().normalize([]).shape == (0, 28, 28, 1)
+
+if __name__ == "__main__":
+    test_batch_matches_per_glyph_pipeline()
+    test_boxes_match_crops()
+    test_empty_batch()
+    print("All glyph normalizer tests passed")
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Integrated OCR Manager Test
+"""
+
+import sys
+import os
+import time
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+import numpy as np
+
+from src.core.integrated_ocr_manager import IntegratedOCRManager
+from src.core.attendance_parser import count_marks
+
+def _manager_with_engines(fail=False, gate=None):
+    """Manager whose engine warm-ups are instant, optionally failing or held until `gate` is set"""
+    manager = IntegratedOCRManager()
+
+    def cnn_warm_up():
+        if gate is not None:
+            gate.wait(5)
+        if fail:
+            raise RuntimeError("model weights missing")
+
+    manager.enhanced_ocr.warm_up = lambda page: {'tesseract': 0.0}
+    manager.custom_cnn.warm_up = cnn_warm_up
+    manager.mark_classifier.warm_up = lambda: None
+    manager._process_image_array = lambda page: []
+    return manager
+
+def test_foreground_warm_up():
+    """A foreground warm-up makes the manager ready before returning"""
+    manager = _manager_with_engines()
+    assert not manager.is_ready
+
+    manager.warm_up()
+
+    assert manager.is_ready and manager.wait_until_ready(0)
+    readiness = manager.readiness()
+    assert readiness['ready'] and not readiness['warming_up'] and not readiness['failed']
+    assert set(readiness['engine_timings']) == {'tesseract', 'custom_cnn', 'mark_classifier', 'pipeline'}
+
+def test_background_warm_up():
+    """Waiters block until a background warm-up finishes"""
+    gate = threading.Event()
+    manager = _manager_with_engines(gate=gate)
+
+    manager.warm_up(background=True)
+    assert manager.readiness()['warming_up']
+    assert not manager.wait_until_ready(0.05)
+
+    gate.set()
+    assert manager.wait_until_ready(5)
+    assert manager.readiness()['ready'] and not manager.readiness()['warming_up']
+
+def test_failed_warm_up_releases_waiters_without_readiness():
+    """A failed warm-up reports its error, releases waiters and can be retried"""
+    gate = threading.Event()
+    manager = _manager_with_engines(fail=True, gate=gate)
+
+    manager.warm_up(background=True)
+    waiter = []
+    thread = threading.Thread(target=lambda: waiter.append(manager.wait_until_ready()))
+    thread.start()
+    gate.set()
+    thread.join(5)
+
+    assert waiter == [False]
+    readiness = manager.readiness()
+    assert not readiness['ready'] and readiness['failed']
+    assert readiness['error'] == "model weights missing"
+
+    # Fixed engines: a second attempt succeeds
+    manager.custom_cnn.warm_up = lambda: None
+    manager.warm_up()
+    assert manager.is_ready and not manager.warmup_failed
+
+def _record(roll_number, name, marks):
+    record = {'roll_number': roll_number, 'name': name}
+    record.update(count_marks(list(marks)))
+    record['attendance_marks'] = list(marks)
+    return record
+
+class FiveLines:
+    """Layout of five text lines, the third of them blank"""
+    page = np.full((500, 800), 255, dtype=np.uint8)
+    line_boxes = [(0, i * 100, 800, i * 100 + 80) for i in range(5)]
+    inked_lines = np.array([True, True, False, True, True])
+
+def test_row_confidence_and_pass_checks():
+    """Roll format, letter share of the name and mark count each gate a row"""
+    manager = IntegratedOCRManager()
+
+    good = manager._row_confidence(_record('23000001', 'Asha Verma', 'PAPP'), 4)
+    assert good == {'roll': 1.0, 'name': 1.0, 'marks': 1.0} and manager._row_passes(good)
+
+    short = manager._row_confidence(_record('23000001', 'Asha Verma', 'P'), 4)
+    assert short['marks'] == 0.25 and not manager._row_passes(short)
+    assert manager._row_confidence(_record('23000001', 'Asha Verma', 'P'), None)['marks'] == 1.0
+
+    garbled = manager._row_confidence(_record('23000001', 'A5#1', 'PAPP'), 4)
+    assert garbled['name'] == 0.25 and not manager._row_passes(garbled)
+
+    bad_roll = manager._row_confidence(_record('2300001', 'Asha Verma', 'PAPP'), 4)
+    assert bad_roll['roll'] == 0.0 and not manager._row_passes(bad_roll)
+
+def test_escalation_reads_only_failed_lines():
+    """Confident lines stop at the cheapest method; only failed lines go on"""
+    manager = IntegratedOCRManager(mode='escalation')
+    scripted = {
+        'custom_cnn': {0: _record('23000001', 'Asha Verma', 'PAPP'),
+                       1: _record('23000002', 'R4v1 K#', 'PAPA'),
+                       4: _record('23000005', 'Meera Iyer', 'PPPP')},
+        'enhanced_ocr': {1: _record('23000002', 'Ravi Kumar', 'PAPA'),
+                         3: _record('23000004', 'Dev Shah', 'P')},
+        'tabular_ocr': {3: _record('2300004', 'Dev Shah', 'PAAP')},
+    }
+    asked = {}
+
+    def read_lines(method, layout, lines):
+        asked[method] = list(lines)
+        return {i: dict(scripted[method][i]) for i in lines if i in scripted[method]}
+
+    manager._page_layout = lambda page: FiveLines()
+    manager._read_lines = read_lines
+
+    records = manager._escalate_page(FiveLines.page)
+
+    # The blank line is never read, and each method only sees what the one before failed
+    assert asked == {'custom_cnn': [0, 1, 3, 4], 'enhanced_ocr': [1, 3], 'tabular_ocr': [3]}
+    assert [record['line_number'] for record in records] == [1, 2, 4, 5]
+    assert [record['extraction_method'] for record in records[:2]] == ['custom_cnn', 'enhanced_ocr']
+    assert records[1]['name'] == 'Ravi Kumar'
+    assert records[3]['extraction_method'] == 'custom_cnn'
+    # No method read line 4 confidently: it keeps the better of its two candidates
+    assert records[2]['roll_number'] in ('23000004', '2300004') and records[2]['candidate_count'] == 2
+
+    assert manager.get_escalation_statistics() == {
+        'lines': 4,
+        'methods': {'custom_cnn': {'attempted': 4, 'accepted': 2},
+                    'enhanced_ocr': {'attempted': 2, 'accepted': 1},
+                    'tabular_ocr': {'attempted': 1, 'accepted': 0}},
+        'unresolved': 1,
+        'line_reads': 7,
+        'line_reads_saved': 5
+    }
+
+def _process_with_delays(manager, delays, finished):
+    """Run one page with stub methods that sleep for the given seconds before returning"""
+    def method(name, records):
+        def run(*args, **kwargs):
+            time.sleep(delays[name])
+            finished.append(name)
+            return [dict(record) for record in records]
+        return run
+
+    # Same roll numbers from every method; the enhanced and tabular readings of
+    # 23000001 score the same, so only merge order decides between them
+    manager.enhanced_ocr.extract_structured_table_data = method('enhanced_ocr', [
+        _record('23000001', '', 'PA'), _record('23000002', 'Ravi Kumar', 'PAP')])
+    manager.tabular_ocr.process_table_with_structure = method('tabular_ocr', [
+        _record('23000001', '', 'PAP'), _record('23000003', 'Meera Iyer', 'PP')])
+    manager._process_image_with_cnn = method('custom_cnn', [
+        _record('23000001', 'Asha', 'P'), _record('23000002', 'Ravi', 'PAPA')])
+    return manager._process_image_array(np.full((300, 400, 3), 255, dtype=np.uint8))
+
+def test_concurrent_merge_matches_sequential():
+    """Methods finishing in any order merge exactly as when run one after another"""
+    manager = IntegratedOCRManager()
+    finished = []
+    sequential = _process_with_delays(manager, {'enhanced_ocr': 0, 'tabular_ocr': 0, 'custom_cnn': 0}, finished)
+    assert finished == IntegratedOCRManager.METHOD_ORDER
+    assert [record['roll_number'] for record in sequential] == ['23000001', '23000002', '23000003']
+    first = sequential[0]
+    assert first['extraction_method'] == 'enhanced_ocr' and first['name'] == 'Asha' and first['total_classes'] == 3
+
+    manager.mode = 'concurrent'
+    for delays in ({'enhanced_ocr': 0.3, 'tabular_ocr': 0.15, 'custom_cnn': 0.0},
+                   {'enhanced_ocr': 0.15, 'tabular_ocr': 0.0, 'custom_cnn': 0.3}):
+        finished = []
+        start = time.perf_counter()
+        concurrent = _process_with_delays(manager, delays, finished)
+        elapsed = time.perf_counter() - start
+
+        assert finished == sorted(delays, key=delays.get)
+        assert elapsed < sum(delays.values())
+        assert concurrent == sequential
+
+class _Layout:
+    """Stand-in layout that remembers the page it was built for"""
+    def __init__(self, page):
+        self.page = page
+
+    def scaled(self, page):
+        return self
+
+def _two_page_pdf(path):
+    import fitz
+    doc = fitz.open()
+    for roll in ('23000001', '23000002'):
+        doc.new_page(width=300, height=200).insert_text((20, 50), f"{roll} Asha P A P")
+    doc.save(path)
+    doc.close()
+
+def test_pdf_pages_share_one_layout():
+    """Each PDF page is rendered and analyzed once and every method reads that analysis"""
+    import tempfile
+    manager = IntegratedOCRManager()
+    layouts, seen, renders, cnn_shapes = [], [], [], []
+    render = manager._render_pdf_page
+
+    def render_once(pdf_page, zoom):
+        renders.append(zoom)
+        return render(pdf_page, zoom)
+
+    def page_layout(page):
+        layouts.append(_Layout(page))
+        return layouts[-1]
+
+    def method(name):
+        def run(page, *args, layout=None):
+            layout = layout if layout is not None else args[-1]
+            seen.append((name, layouts.index(layout)))
+            if name == 'custom_cnn':
+                cnn_shapes.append((page.shape[:2], layout.page.shape[:2]))
+            return [_record(f"2300000{len(layouts)}", 'Asha Verma', 'PAP')]
+        return run
+
+    manager._page_layout = page_layout
+    manager._render_pdf_page = render_once
+    manager.enhanced_ocr.extract_structured_table_data = method('enhanced_ocr')
+    manager.tabular_ocr.process_table_with_structure = method('tabular_ocr')
+    manager._process_image_with_cnn = method('custom_cnn')
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'register.pdf')
+        _two_page_pdf(path)
+        records = manager.process_document(path)
+
+    assert len(layouts) == 2 and renders == [3.0, 3.0]
+    # The CNN reads a 2x copy of the 3x page the layout was built on
+    assert len(cnn_shapes) == 2
+    assert all(cnn == (round(full[0] * 2 / 3), round(full[1] * 2 / 3)) for cnn, full in cnn_shapes)
+    assert seen == [(method, page) for page in range(2) for method in IntegratedOCRManager.METHOD_ORDER]
+    assert [(record['roll_number'], record['page_number']) for record in records] == [('23000001', 1), ('23000002', 2)]
+
+def test_tall_pages_are_strip_tiled_by_default():
+    """Pages taller than the default tiler's threshold are read band by band"""
+    manager = IntegratedOCRManager()
+    tiler = manager.enhanced_ocr.strip_tiler
+    tiled, layouts = [], []
+
+    def read(page, layout=None):
+        layouts.append(layout)
+        return type(manager.enhanced_ocr).extract_structured_table_data(manager.enhanced_ocr, page, layout)
+
+    manager.enhanced_ocr.extract_structured_table_data = read
+    manager.enhanced_ocr.extract_structured_table_data_tiled = lambda image: tiled.append(image.shape[:2]) or []
+    manager.tabular_ocr.process_table_with_structure = lambda *args, **kwargs: []
+    manager._process_image_with_cnn = lambda *args: []
+
+    manager._process_image_array(np.full((tiler.page_height, 300, 3), 255, dtype=np.uint8))
+    assert tiled == [] and layouts[0] is not None
+
+    manager._process_image_array(np.full((tiler.page_height + 1, 300, 3), 255, dtype=np.uint8))
+    assert tiled == [(tiler.page_height + 1, 300)] and layouts[1] is None
+
+def test_ink_mark_detection_from_the_manager():
+    """A manager built for signature registers reads mark cells from ink density"""
+    try:
+        IntegratedOCRManager(mark_detection='ticks')
+        assert False, "unknown mark detection mode accepted"
+    except ValueError:
+        pass
+
+    manager = IntegratedOCRManager(mark_detection='ink')
+    image = np.full((400, 1300, 3), 245, dtype=np.uint8)
+    for r in range(4):
+        cv2.line(image, (100, 100 + r * 60), (920, 100 + r * 60), (0, 0, 0), 2)
+    for x in (100, 400, 800, 860, 920):
+        cv2.line(image, (x, 100), (x, 280), (0, 0, 0), 2)
+    for r in range(3):
+        cv2.putText(image, f"2300000{r + 1}", (115, 145 + r * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+        # Signed for the first lecture only
+        cv2.line(image, (815, 140 + r * 60), (845, 120 + r * 60), (0, 0, 0), 3)
+
+    def read_cell(page, cell, engine):
+        # Roll numbers by row; the name column is left empty
+        x1, y1, x2, y2 = cell
+        return f"2300000{(y1 - 100) // 60 + 1}" if x1 < 300 else ""
+
+    manager.tabular_ocr.extract_cell_content = read_cell
+    manager.enhanced_ocr.extract_structured_table_data = lambda *args: []
+    manager._process_image_with_cnn = lambda *args: []
+
+    records = manager._process_image_array(image)
+
+    assert [record['roll_number'] for record in records] == ['23000001', '23000002', '23000003']
+    assert all(record['attendance_marks'] == ['P', 'A'] for record in records)
+
+if __name__ == "__main__":
+    test_foreground_warm_up()
+    test_background_warm_up()
+    test_failed_warm_up_releases_waiters_without_readiness()
+    test_row_confidence_and_pass_checks()
+    test_escalation_reads_only_failed_lines()
+    test_concurrent_merge_matches_sequential()
+    test_pdf_pages_share_one_layout()
+    test_tall_pages_are_strip_tiled_by_default()
+    test_ink_mark_detection_from_the_manager()
+    print("All integrated OCR manager tests passed")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Page Layout Test
+"""
+
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from src.core.page_layout import PageLayout
+from src.core.tabular_ocr_integration import TabularOCRIntegration
+from src.core.cell_occupancy import CellOccupancyAnalyzer
+from tests.test_tabular_ocr import _sparse_table, CountingEngine
+
+class RowLines:
+    """Line detector giving the twelve rows of the sparse table"""
+
+    def __init__(self):
+        self.calls = 0
+        self.occupancy = CellOccupancyAnalyzer()
+
+    def detect_table_structure(self, page):
+        self.calls += 1
+        return [(100, 100 + r * 60, 1100, 160 + r * 60) for r in range(12)]
+
+def test_layout_is_analyzed_once_and_numbers_table_rows():
+    """Methods sharing a layout detect nothing again, and table rows get line numbers"""
+    tabular = TabularOCRIntegration(mark_detection='ink')
+    calls = []
+    detect = tabular.detect_table_regions
+    tabular.detect_table_regions = lambda page: calls.append(1) or detect(page)
+
+    image = _sparse_table()
+    lines = RowLines()
+    layout = PageLayout(image, lines, tabular)
+
+    # Parallel readers share one analysis of each part
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        for _ in executor.map(lambda _: (layout.tables, layout.inked_lines), range(6)):
+            pass
+    first = tabular.process_table_with_structure(layout.page, CountingEngine(), layout=layout)
+    second = tabular.process_table_with_structure(layout.page, CountingEngine(), layout=layout)
+
+    assert len(calls) == 1 and lines.calls == 1
+    assert first == second
+    assert [record['line_number'] for record in first] == list(range(1, 13))
+    assert layout.inked_lines.tolist() == [True] * 12
+
+    # Without a layout the records are the same, minus the line numbers
+    plain = tabular.process_table_with_structure(image, CountingEngine())
+    assert [{k: v for k, v in record.items() if k != 'line_number'} for record in first] == plain
+
+def test_scaled_layout_keeps_line_numbering():
+    """Lines mapped onto a smaller render keep their order and relative position"""
+    layout = PageLayout(np.zeros((900, 1300), dtype=np.uint8), RowLines())
+    scaled = layout.scaled(np.zeros((600, 867), dtype=np.uint8))
+
+    assert len(scaled.line_boxes) == 12
+    assert scaled.line_boxes[0] == (67, 67, 734, 107)
+    assert layout.line_index((280, 340)) == 3
+    assert scaled.line_index((187, 227)) == 3
+    assert layout.line_index((10, 20)) is None
+
+if __name__ == "__main__":
+    test_layout_is_analyzed_once_and_numbers_table_rows()
+    test_scaled_layout_keeps_line_numbering()
+    print("All page layout tests passed")
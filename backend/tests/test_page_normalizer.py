@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Page Normalizer Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+import numpy as np
+
+from src.core.page_normalizer import PageNormalizer
+
+def _ruled_page():
+    image = np.full((1600, 1200), 245, dtype=np.uint8)
+    for r in range(20):
+        y = 100 + r * 70
+        cv2.line(image, (80, y), (1120, y), 0, 2)
+        cv2.putText(image, f"2300{r:04d}  Student {r}  P A P", (100, y + 50), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 20, 2)
+    return image
+
+def _register_page(rows, mark_columns, width, height):
+    """Fully ruled register: roll number and name columns, then one column per lecture"""
+    image = np.full((height, width), 245, dtype=np.uint8)
+    row_height = (height - 120) // rows
+    xs = [60, 60 + width // 6, 60 + width // 2]
+    xs += [xs[-1] + (width - 60 - xs[-1]) * (c + 1) // mark_columns for c in range(mark_columns)]
+    scale = row_height / 60
+    for r in range(rows + 1):
+        cv2.line(image, (xs[0], 60 + r * row_height), (xs[-1], 60 + r * row_height), 0, 2)
+    for x in xs:
+        cv2.line(image, (x, 60), (x, 60 + rows * row_height), 0, 2)
+    for r in range(rows):
+        baseline = 60 + (r + 1) * row_height - row_height // 4
+        cv2.putText(image, f"2300{r:04d}", (xs[0] + 8, baseline), cv2.FONT_HERSHEY_SIMPLEX, scale, 20, 2)
+        cv2.putText(image, f"Student {r}", (xs[1] + 8, baseline), cv2.FONT_HERSHEY_SIMPLEX, scale, 20, 2)
+        for c in range(mark_columns):
+            cv2.putText(image, "PA"[(r + c) % 3 == 0], (xs[c + 2] + 8, baseline), cv2.FONT_HERSHEY_SIMPLEX, scale, 20, 2)
+    return image
+
+def test_skew_is_estimated_and_removed():
+    """A page rotated by a few degrees is measured and deskewed in one warp"""
+    normalizer = PageNormalizer(use_osd=False)
+    matrix = cv2.getRotationMatrix2D((600, 800), 4.0, 1.0)
+    skewed = cv2.warpAffine(_ruled_page(), matrix, (1200, 1600), borderValue=255)
+
+    normalized, info = normalizer.normalize(skewed)
+
+    assert info['rotation'] == 0
+    assert abs(info['skew'] - 4.0) <= 0.1
+    assert normalized.shape == skewed.shape
+    assert abs(normalizer.estimate(normalized)['skew']) <= 0.1
+
+def test_sideways_page_is_turned_upright():
+    """Vertical text lines are detected and the page is turned, upright pages are untouched"""
+    normalizer = PageNormalizer(use_osd=False)
+    page = _ruled_page()
+
+    normalized, info = normalizer.normalize(cv2.rotate(page, cv2.ROTATE_90_COUNTERCLOCKWISE))
+    assert info['rotation'] == 90
+    assert np.array_equal(normalized, page)
+
+    unchanged, info = normalizer.normalize(page)
+    assert unchanged is page and not info['applied']
+
+def test_ruled_register_is_not_turned_by_its_rulings():
+    """Vertical rulings of an upright register do not outweigh its rows of text"""
+    normalizer = PageNormalizer(use_osd=False)
+    for rows, mark_columns, width, height in [(30, 28, 1900, 1700), (40, 10, 980, 2500)]:
+        page = _register_page(rows, mark_columns, width, height)
+        assert normalizer.estimate(page)['rotation'] == 0
+
+        normalized, info = normalizer.normalize(cv2.rotate(page, cv2.ROTATE_90_COUNTERCLOCKWISE))
+        assert info['rotation'] == 90
+        assert np.array_equal(normalized, page)
+
+    # Rulings alone say nothing about the reading direction
+    blank = np.full((1700, 1900), 245, dtype=np.uint8)
+    for i in range(31):
+        cv2.line(blank, (60, 60 + i * 50), (1840, 60 + i * 50), 0, 2)
+        cv2.line(blank, (60 + i * 59, 60), (60 + i * 59, 1560), 0, 2)
+    assert normalizer.estimate(blank)['rotation'] == 0
+
+if __name__ == "__main__":
+    test_skew_is_estimated_and_removed()
+    test_sideways_page_is_turned_upright()
+    test_ruled_register_is_not_turned_by_its_rulings()
+    print("All page normalizer tests passed")
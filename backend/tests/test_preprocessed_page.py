@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Preprocessed Page Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+import numpy as np
+
+from src.core.preprocessed_page import PreprocessedPage
+from src.core.buffer_pool import BufferPool
+
+def _sample_page():
+    image = np.full((200, 300, 3), 235, dtype=np.uint8)
+    cv2.putText(image, "23001234 P A", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (20, 20, 20), 2)
+    cv2.line(image, (0, 100), (299, 100), (0, 0, 0), 2)
+    return image
+
+def test_variants_are_computed_once():
+    """Asking for the same variant twice returns the cached array"""
+    page = PreprocessedPage(_sample_page())
+
+    assert page.otsu(3) is page.otsu(3)
+    assert page.preprocessed("adaptive") is page.preprocessed("adaptive")
+    assert PreprocessedPage.wrap(page) is page
+
+def test_adaptive_pipeline_matches_direct_computation():
+    """The shared 'adaptive' variant equals the per-call pipeline it replaces"""
+    image = _sample_page()
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    blur = cv2.GaussianBlur(gray, (3, 3), 0)
+    adaptive = cv2.adaptiveThreshold(blur, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 9)
+    expected = cv2.morphologyEx(255 - adaptive, cv2.MORPH_CLOSE, np.ones((2, 2), np.uint8))
+
+    assert np.array_equal(PreprocessedPage(image).preprocessed("adaptive"), expected)
+
+def test_regions_are_views_of_page_variants():
+    """Region variants slice the page variants, including nested regions"""
+    page = PreprocessedPage(_sample_page())
+    region = page.region(10, 20, 210, 90)
+    nested = region.region(5, 5, 50, 30)
+
+    assert region.shape[:2] == (70, 200)
+    assert np.shares_memory(region.gray, page.gray)
+    assert np.array_equal(region.fixed_threshold(), page.fixed_threshold()[20:90, 10:210])
+    assert np.array_equal(nested.blur(5), page.blur(5)[25:50, 15:60])
+
+def test_region_otsu_uses_the_region_threshold():
+    """A region is Otsu-thresholded on its own pixels, as a cut-out ROI was"""
+    image = np.full((200, 400), 230, dtype=np.uint8)
+    # Dark right half (shadowed scan) with faint text: the page threshold
+    # sits between the halves and blackens the whole right half
+    image[:, 200:] = 120
+    cv2.putText(image, "23001234", (220, 110), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 60, 2)
+    page = PreprocessedPage(image)
+    region = page.region(210, 60, 390, 140)
+
+    blur = cv2.GaussianBlur(image[60:140, 210:390], (5, 5), 0)
+    _, expected = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    assert np.array_equal(region.otsu(5), expected)
+    assert np.array_equal(region.preprocessed("otsu"), expected)
+    assert not np.array_equal(region.otsu(5), page.otsu(5)[60:140, 210:390])
+    assert region.otsu(5) is region.otsu(5)
+
+    _, ink = cv2.threshold(image[60:140, 210:390], 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    assert np.array_equal(region.ink_integral(), cv2.integral(ink, sdepth=cv2.CV_32S))
+
+def test_pyramid_levels_map_back_to_the_page():
+    """Levels are memoized downscales whose coordinates map back to the page"""
+    page = PreprocessedPage(_sample_page())
+    level = page.level(0.5)
+
+    assert level is page.level(0.5) and page.level(1.0) is page
+    assert level.shape[:2] == (100, 150) and level.scale == 0.5
+    assert level.to_page(15, 50) == (30, 100)
+    assert level.from_page(*level.to_page(15, 50)) == (15, 50)
+    assert level.region(0, 0, 50, 50).scale == 0.5
+
+def test_pooled_pages_reuse_buffers():
+    """A released page's buffers serve the next page, with identical variants"""
+    pool = BufferPool()
+    expected = PreprocessedPage(_sample_page()).preprocessed("morphological").copy()
+
+    first = PreprocessedPage(_sample_page(), pool=pool)
+    first.preprocessed("morphological")
+    first.release()
+    allocations = pool.get_statistics()['allocations']
+
+    second = PreprocessedPage(_sample_page(), pool=pool)
+    assert np.array_equal(second.preprocessed("morphological"), expected)
+    assert pool.get_statistics()['allocations'] == allocations
+    assert pool.get_statistics()['reuses'] > 0
+
+if __name__ == "__main__":
+    test_variants_are_computed_once()
+    test_adaptive_pipeline_matches_direct_computation()
+    test_regions_are_views_of_page_variants()
+    test_region_otsu_uses_the_region_threshold()
+    test_pyramid_levels_map_back_to_the_page()
+    test_pooled_pages_reuse_buffers()
+    print("All preprocessed page tests passed")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Roster Index Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from src.core.roster_index import RosterIndex, edit_distance
+
+def test_readings_snap_to_unique_nearest_roll():
+    """Exact, misread and dropped digits snap; ties and distant readings do not"""
+    roster = RosterIndex(['23001234', '23001235', '23009876', '23CS0001'],
+                         ['Asha Verma', 'Ravi Kumar', 'Meera Iyer', None])
+
+    assert roster.snap('23001234') == ('23001234', 0)
+    assert roster.snap('23009870') == ('23009876', 1)
+    assert roster.snap('2300987') == ('23009876', 1)
+    assert roster.snap('230098766') == ('23009876', 1)
+    assert roster.snap('23C50001') == ('23CS0001', 1)
+    # One edit away from both 23001234 and 23001235
+    assert roster.snap('23001230') is None
+    assert roster.snap('230012345') is None
+    assert roster.snap('99999999') is None
+
+    record = {'roll_number': '23009370', 'name': ''}
+    assert roster.snap_record(record)
+    assert record == {'roll_number': '23009876', 'name': 'Meera Iyer',
+                      'ocr_roll_number': '23009370', 'roll_distance': 2}
+    # Snapping again keeps the correction
+    assert roster.snap_record(record) and record['roll_distance'] == 2
+    assert not roster.snap_record({'roll_number': '', 'name': 'Nobody'})
+
+def test_deletion_index_matches_brute_force():
+    """Index lookups and snaps find exactly what a full scan finds"""
+    rng = np.random.default_rng(5)
+    rolls = sorted({f"23{value:06d}" for value in rng.integers(0, 3000, size=400)})
+    roster = RosterIndex(rolls)
+
+    for _ in range(150):
+        query = list(rolls[rng.integers(len(rolls))])
+        for _ in range(rng.integers(0, 3)):
+            position = rng.integers(len(query))
+            if rng.random() < 0.5:
+                query[position] = str(rng.integers(10))
+            else:
+                del query[position]
+        query = ''.join(query)
+
+        distances = [(roll, edit_distance(query, roll)) for roll in rolls]
+        expected = sorted((match for match in distances if match[1] <= 2), key=lambda match: (match[1], match[0]))
+        assert roster.nearest(query) == expected, query
+
+        unique = expected and (len(expected) == 1 or expected[1][1] > expected[0][1])
+        assert roster.snap(query) == (expected[0] if unique else None), query
+
+if __name__ == "__main__":
+    test_readings_snap_to_unique_nearest_roll()
+    test_deletion_index_matches_brute_force()
+    print("All roster index tests passed")
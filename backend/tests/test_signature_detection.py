@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Signature Detection Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+import numpy as np
+
+from src.core.ultra_fast_ocr import UltraFastOCRProcessor
+
+def test_scribbles_are_detected_and_solid_blocks_are_not():
+    """Curvy strokes pass the edge density test, a filled block does not"""
+    image = np.full((300, 600), 245, dtype=np.uint8)
+    xs = np.linspace(50, 140, 40)
+    ys = 100 + 12 * np.sin(np.linspace(0, 18, 40))
+    cv2.polylines(image, [np.stack([xs, ys], axis=1).astype(np.int32)], False, 20, 2)
+    cv2.rectangle(image, (300, 80), (360, 130), 20, -1)
+
+    signatures = UltraFastOCRProcessor().detect_handwritten_signatures(image)
+
+    assert len(signatures) == 1
+    x, y, w, h = signatures[0]['bbox']
+    assert 40 <= x <= 60 and w > 80
+    assert signatures[0]['type'] == 'signature'
+    assert signatures[0]['edge_density'] > 0.1
+
+def _per_contour_measures(contours):
+    """Contour areas and bounding boxes from one OpenCV call per contour"""
+    area = np.array([cv2.contourArea(contour) for contour in contours])
+    boxes = np.array([cv2.boundingRect(contour) for contour in contours]).reshape(-1, 4).T
+    return area, boxes
+
+def test_vectorized_contour_measures_match_opencv():
+    """Stacked contour areas and boxes equal cv2.contourArea / boundingRect, and so do detections"""
+    rng = np.random.default_rng(2)
+    image = np.full((600, 900), 245, dtype=np.uint8)
+    for _ in range(150):
+        x, y = int(rng.integers(10, 860)), int(rng.integers(10, 560))
+        kind = rng.integers(4)
+        if kind == 0:
+            xs = np.linspace(x, x + rng.integers(20, 90), 20)
+            ys = y + rng.uniform(3, 12) * np.sin(np.linspace(0, rng.uniform(4, 12), 20))
+            cv2.polylines(image, [np.stack([xs, ys], axis=1).astype(np.int32)], False, 20, int(rng.integers(1, 4)))
+        elif kind == 1:
+            cv2.circle(image, (x, y), int(rng.integers(3, 25)), 20, int(rng.integers(1, 3)))
+        elif kind == 2:
+            # Single pixels and short lines give one- and two-point contours
+            image[y, x] = 20
+            cv2.line(image, (x + 5, y), (x + 5 + int(rng.integers(0, 8)), y), 20, 1)
+        else:
+            cv2.rectangle(image, (x, y), (x + int(rng.integers(2, 40)), y + int(rng.integers(2, 30))), 20, -1)
+
+    _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    area, boxes = UltraFastOCRProcessor._contour_measures(contours)
+    expected_area, expected_boxes = _per_contour_measures(contours)
+    assert np.array_equal(area, expected_area)
+    assert np.array_equal(boxes, expected_boxes)
+
+    processor = UltraFastOCRProcessor()
+    detected = processor.detect_handwritten_signatures(image)
+    processor._contour_measures = _per_contour_measures
+    assert detected and detected == processor.detect_handwritten_signatures(image)
+
+def _per_crop_signatures(gray):
+    """Signature boxes as the original implementation found them: a crop and Canny call per contour"""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = {}
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if 100 < cv2.contourArea(contour) < 5000 and 0.5 < w / h < 4.0:
+            boxes[(x, y, w, h)] = np.sum(cv2.Canny(gray[y:y+h, x:x+w], 50, 150) > 0) / (w * h)
+    return boxes
+
+def test_boxes_match_per_crop_implementation():
+    """Every mark the per-crop implementation finds comes back with the same box"""
+    rng = np.random.default_rng(5)
+    image = np.full((40 + 25 * 48, 1000), 245, dtype=np.uint8)
+    for r in range(25):
+        top = 40 + r * 48
+        cv2.putText(image, f"2300{r:04d}", (40, top + 32), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 25, 2)
+        for c in range(8):
+            left = 280 + c * 90
+            if rng.integers(2):
+                xs = np.linspace(left + 10, left + 80, 24)
+                ys = top + 24 + 10 * np.sin(np.linspace(0, rng.uniform(4, 10), 24)) + rng.normal(0, 2, 24)
+                cv2.polylines(image, [np.stack([xs, ys], axis=1).astype(np.int32)], False, 20, 2)
+            else:
+                points = np.array([[left + 30, top + 24], [left + 40, top + 36], [left + 60, top + 10]], np.int32)
+                cv2.polylines(image, [points], False, 20, 3)
+    image = np.clip(image + rng.normal(0, 6, image.shape), 0, 255).astype(np.uint8)
+
+    per_crop = _per_crop_signatures(image)
+    expected = {box for box, density in per_crop.items() if density > 0.1}
+    detected = {signature['bbox'] for signature in UltraFastOCRProcessor().detect_handwritten_signatures(image)}
+
+    assert len(expected) > 100 and expected <= detected
+    # A crop's Canny finds no edges on its own border, so the only extra boxes
+    # are contours whose per-crop density sits just under the threshold
+    extra = detected - expected
+    assert len(extra) <= 0.05 * len(expected)
+    assert all(0.09 < per_crop[box] <= 0.1 for box in extra)
+
+if __name__ == "__main__":
+    test_scribbles_are_detected_and_solid_blocks_are_not()
+    test_vectorized_contour_measures_match_opencv()
+    test_boxes_match_per_crop_implementation()
+    print("All signature detection tests passed")
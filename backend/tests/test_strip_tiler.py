@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Strip Tiler Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+import numpy as np
+
+from src.core.strip_tiler import StripTiler
+from src.core.tabular_ocr_integration import TabularOCRIntegration
+
+def test_band_cores_partition_the_page():
+    """Bands overlap, stay within the page, and their cores cover every row once"""
+    tiler = StripTiler(band_height=500, overlap=120)
+    bands = tiler.bands(1730)
+
+    assert bands[0][0] == 0 and bands[-1][1] == 1730
+    for (y0, y1, c0, c1), (next_y0, _, next_c0, _) in zip(bands, bands[1:]):
+        assert y1 - next_y0 == 120
+        assert c1 == next_c0 and y0 <= c0 < c1 <= y1
+    assert sum(c1 - c0 for _, _, c0, c1 in bands) == 1730
+    assert tiler.bands(300) == [(0, 300, 0, 300)]
+
+def test_tiled_rows_match_full_page_rows():
+    """Rows detected per band and kept by core ownership equal the full-page rows"""
+    image = np.full((1500, 400), 250, dtype=np.uint8)
+    for r in range(20):
+        cv2.putText(image, f"2300{r:04d} P", (10, 60 + r * 70), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+
+    tabular = TabularOCRIntegration()
+    tiler = StripTiler(band_height=400, overlap=100, workers=3)
+
+    def band_rows(band_image, band):
+        return [(band[0] + y0, band[0] + y1) for y0, y1 in tabular._detect_rows(band_image)
+                if tiler.owns(band, band[0] + (y0 + y1) / 2)]
+
+    tiled = [row for _, rows in tiler.map_bands(image, band_rows) for row in rows]
+    full = tabular._detect_rows(image)
+
+    assert len(tiled) == len(full) == 20
+    assert all(abs(a[0] - b[0]) <= 2 and abs(a[1] - b[1]) <= 2 for a, b in zip(tiled, full))
+
+def test_overlap_duplicates_are_merged_by_key():
+    """A student read in two neighbouring bands is kept once, with the better reading"""
+    tiler = StripTiler()
+    bands = [
+        [{'roll_number': '23001', 'confidence': 0.9}, {'roll_number': '23002', 'confidence': 0.4}],
+        [{'roll_number': '23002', 'confidence': 0.8}, {'roll_number': '23003', 'confidence': 0.7}],
+    ]
+
+    merged = tiler.merge_by_key(bands, 'roll_number')
+
+    assert [row['roll_number'] for row in merged] == ['23001', '23002', '23003']
+    assert merged[1]['confidence'] == 0.8
+
+if __name__ == "__main__":
+    test_band_cores_partition_the_page()
+    test_tiled_rows_match_full_page_rows()
+    test_overlap_duplicates_are_merged_by_key()
+    print("All strip tiler tests passed")
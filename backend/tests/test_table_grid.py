@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Ruling Grid Extraction Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+import numpy as np
+
+from src.core.preprocessed_page import PreprocessedPage
+from src.core.table_grid import RulingGridExtractor
+from src.core.tabular_ocr_integration import TabularOCRIntegration
+
+def _ruled_table():
+    """4 rows x 4 columns; the header cell of columns 2-3 is merged"""
+    image = np.full((260, 520), 250, dtype=np.uint8)
+    ys = [10, 70, 130, 190, 250]
+    xs = [10, 210, 370, 440, 510]
+    for y in ys:
+        cv2.line(image, (xs[0], y), (xs[-1], y), 0, 2)
+    for x in xs:
+        top = ys[1] if x == xs[3] else ys[0]
+        cv2.line(image, (x, top), (x, ys[-1]), 0, 2)
+    cv2.putText(image, "23001234", (20, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+    return image
+
+def test_lattice_with_merged_header():
+    """Ruling lines give the exact lattice and a 1x2 merged header cell"""
+    page = PreprocessedPage(_ruled_table())
+    grid = RulingGridExtractor().extract(page.horizontal_lines(40), page.vertical_lines(40))
+
+    assert len(grid['rows']) == 4
+    assert len(grid['columns']) == 4
+    assert grid['spans'] == {(0, 2): (1, 2)}
+    assert grid['cells'][0][3] is None
+    x1, y1, x2, y2 = grid['cells'][0][2]
+    assert x1 < 375 and x2 > 505 and y1 < 15 and y2 > 65
+
+    boxes = [cell for row in grid['cells'] for cell in row if cell is not None]
+    assert len(boxes) == 15
+
+def test_l_shaped_gap_is_split_into_rectangles():
+    """Cells joined around a corner are not merged into an overlapping box"""
+    image = np.full((220, 460), 250, dtype=np.uint8)
+    ys = [10, 70, 130, 190]
+    xs = [10, 150, 290, 430]
+    for y in ys:
+        if y == ys[1]:
+            # Missing under the middle of the first row: (0, 1) joins (1, 1)
+            cv2.line(image, (xs[0], y), (xs[1], y), 0, 2)
+            cv2.line(image, (xs[2], y), (xs[-1], y), 0, 2)
+        else:
+            cv2.line(image, (xs[0], y), (xs[-1], y), 0, 2)
+    for x in xs:
+        # Missing between (0, 0) and (0, 1)
+        top = ys[1] if x == xs[1] else ys[0]
+        cv2.line(image, (x, top), (x, ys[-1]), 0, 2)
+
+    page = PreprocessedPage(image)
+    grid = RulingGridExtractor().extract(page.horizontal_lines(40), page.vertical_lines(40))
+
+    assert len(grid['rows']) == 3 and len(grid['columns']) == 3
+    assert grid['spans'] == {(0, 0): (1, 2)}
+    assert grid['cells'][0][1] is None
+    assert grid['cells'][1][1] is not None
+
+    # Boxes tile the table: none overlap, and together they cover every lattice cell
+    boxes = [cell for row in grid['cells'] for cell in row if cell is not None]
+    assert len(boxes) == 8
+    for a in range(len(boxes)):
+        for b in range(a + 1, len(boxes)):
+            ax1, ay1, ax2, ay2 = boxes[a]
+            bx1, by1, bx2, by2 = boxes[b]
+            assert min(ax2, bx2) <= max(ax1, bx1) or min(ay2, by2) <= max(ay1, by1)
+    for (r_start, r_end) in grid['rows']:
+        for (c_start, c_end) in grid['columns']:
+            centre = ((c_start + c_end) / 2, (r_start + r_end) / 2)
+            assert sum(x1 <= centre[0] < x2 and y1 <= centre[1] < y2 for x1, y1, x2, y2 in boxes) == 1
+
+def test_unruled_table_falls_back_to_projections():
+    """Without ruling lines the projection grid is used"""
+    image = np.full((200, 400), 250, dtype=np.uint8)
+    for r in range(3):
+        cv2.putText(image, "2300123 P", (10, 50 + r * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+
+    structure = TabularOCRIntegration().extract_table_structure(image, (0, 0, 400, 200))
+
+    assert structure['source'] == 'projection'
+    assert len(structure['rows']) == 3
+
+if __name__ == "__main__":
+    test_lattice_with_merged_header()
+    test_l_shaped_gap_is_split_into_rectangles()
+    test_unruled_table_falls_back_to_projections()
+    print("All ruling grid tests passed")
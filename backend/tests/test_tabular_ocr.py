@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tabular OCR Integration Test
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+import numpy as np
+
+from src.core.tabular_ocr_integration import TabularOCRIntegration
+from src.core.cell_occupancy import CellOccupancyAnalyzer
+
+def test_mark_columns_are_narrow_columns():
+    """Only columns about as wide as a row is tall are mark columns"""
+    tabular = TabularOCRIntegration()
+    structure = {
+        'rows': [(0, 40), (40, 80), (80, 120)],
+        'columns': [(0, 200), (200, 600), (600, 640), (640, 680)],
+    }
+
+    assert tabular._find_mark_columns(structure) == [2, 3]
+
+def test_serial_number_column_is_not_read_as_marks():
+    """A narrow Sr. No. column left of the roll numbers gives no ink marks"""
+    tabular = TabularOCRIntegration(mark_detection='ink')
+    structure = {
+        'rows': [(0, 40), (40, 80)],
+        'columns': [(0, 40), (40, 240), (240, 640), (640, 680), (680, 720)],
+    }
+    assert tabular._find_mark_columns(structure) == [3, 4]
+
+    image = np.full((400, 1300), 245, dtype=np.uint8)
+    xs = [100, 160, 460, 860, 920, 980]
+    for r in range(4):
+        cv2.line(image, (100, 100 + r * 60), (980, 100 + r * 60), 0, 2)
+    for x in xs:
+        cv2.line(image, (x, 100), (x, 280), 0, 2)
+    for r in range(3):
+        cv2.putText(image, str(r + 1), (118, 145 + r * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+        cv2.putText(image, f"2300{r:04d}", (175, 145 + r * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+        # Signed for the first lecture only
+        cv2.line(image, (875, 140 + r * 60), (905, 120 + r * 60), 0, 3)
+
+    records = tabular.process_table_with_structure(image, CountingEngine())
+
+    assert len(records) == 3
+    assert all(record['attendance_marks'] == ['P', 'A'] for record in records)
+
+class HalfConfidentClassifier:
+    """Mark classifier sure of the 1st and 3rd lecture columns only"""
+    MARK_SYMBOLS = {'present': 'P', 'absent': 'A', 'blank': None}
+    is_trained = True
+
+    def classify_cells(self, image, boxes):
+        return [('present', 0.95) if (x1 - 800) // 60 in (0, 2) else ('absent', 0.3)
+                for x1, y1, x2, y2 in boxes]
+
+class ColumnEngine:
+    """OCR engine answering by cell width: roll numbers, names and absent marks"""
+
+    def extract_text_tesseract(self, image, config=''):
+        width = image.shape[1]
+        return "23001234" if width > 350 else "Asha Verma" if width > 100 else "A"
+
+def test_classified_and_ocr_marks_keep_column_order():
+    """Marks read by the classifier and by OCR in one row come out in lecture order"""
+    image = np.full((400, 1200), 245, dtype=np.uint8)
+    xs = [100, 500, 800, 860, 920, 980, 1040]
+    for r in range(4):
+        cv2.line(image, (100, 100 + r * 60), (1040, 100 + r * 60), 0, 2)
+    for x in xs:
+        cv2.line(image, (x, 100), (x, 280), 0, 2)
+    for r in range(3):
+        cv2.putText(image, "23001234", (115, 145 + r * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+        cv2.putText(image, "Asha Verma", (515, 145 + r * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+        for x in xs[2:-1]:
+            cv2.putText(image, "P", (x + 15, 145 + r * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+
+    tabular = TabularOCRIntegration(mark_classifier=HalfConfidentClassifier())
+    records = tabular.process_table_with_structure(image, ColumnEngine())
+
+    assert len(records) == 3
+    for record in records:
+        assert record['attendance_marks'] == ['P', 'A', 'P', 'A']
+        assert record['present_count'] == record['absent_count'] == 2
+
+def test_cell_occupancy_matches_direct_ink_count():
+    """Integral-image ink ratios equal a direct count over each inset cell"""
+    image = np.full((400, 600), 255, dtype=np.uint8)
+    cells = [(c * 50, r * 50, c * 50 + 50, r * 50 + 50) for r in range(8) for c in range(12)]
+    for x1, y1, x2, y2 in cells[::3]:
+        cv2.line(image, (x1 + 12, y1 + 20), (x2 - 12, y2 - 20), 0, 3)
+
+    analyzer = CellOccupancyAnalyzer()
+    occupied, ratios = analyzer.classify_cells(image, cells)
+
+    _, binary = cv2.threshold(image, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    expected = [binary[y1:y2, x1:x2].mean() for x1, y1, x2, y2 in analyzer._inset_cells(cells)]
+
+    assert np.allclose(ratios, expected)
+    assert occupied.tolist() == [i % 3 == 0 for i in range(len(cells))]
+
+def test_projection_spans_match_run_scan():
+    """Run-length spans equal a plain scan, including runs touching both ends"""
+    tabular = TabularOCRIntegration()
+    rng = np.random.default_rng(7)
+    projections = [
+        np.array([5, 5, 0, 0, 5, 0, 5, 5]),
+        np.zeros(6),
+        rng.integers(0, 10, size=500),
+    ]
+
+    for projection in projections:
+        threshold = projection.mean() * 0.5
+        expected = []
+        start = None
+        for i, value in enumerate(projection):
+            if value > threshold and start is None:
+                start = i
+            elif value <= threshold and start is not None:
+                expected.append((start, i))
+                start = None
+        if start is not None:
+            expected.append((start, len(projection)))
+
+        assert tabular._projection_spans(projection, threshold) == expected
+
+def _sparse_table():
+    """12 ruled rows of roll numbers; every third row has a remark, names are empty"""
+    image = np.full((900, 1300), 245, dtype=np.uint8)
+    xs = [100, 400, 800, 1100]
+    for r in range(13):
+        cv2.line(image, (100, 100 + r * 60), (1100, 100 + r * 60), 0, 2)
+    for x in xs:
+        cv2.line(image, (x, 100), (x, 820), 0, 2)
+    for r in range(12):
+        cv2.putText(image, f"2300{r:04d}", (115, 145 + r * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+        if r % 3 == 0:
+            cv2.putText(image, "Late", (815, 145 + r * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    return image
+
+class CountingEngine:
+    def __init__(self):
+        self.calls = 0
+
+    def extract_text_tesseract(self, image, config=''):
+        self.calls += 1
+        return "23001234"
+
+def test_blank_cells_skip_ocr():
+    """Empty cells are answered from the ink integral without calling the engine"""
+    engine = CountingEngine()
+    tabular = TabularOCRIntegration(mark_detection='ink')
+    tabular.process_table_with_structure(_sparse_table(), engine)
+
+    # Roll numbers (12) and the four remarks are read; empty names and remarks are not
+    assert engine.calls == tabular.ocr_call_stats['performed'] == 16
+    assert tabular.ocr_call_stats['skipped_blank'] == 20
+
+def test_row_spans_limit_reading():
+    """Only the table rows whose centre lies in a requested span are read"""
+    engine = CountingEngine()
+    tabular = TabularOCRIntegration(mark_detection='ink')
+
+    # Rows 3 and 4 (y 280-400); row 3 has a remark
+    records = tabular.process_table_with_structure(_sparse_table(), engine, row_spans=[(285, 395)])
+
+    assert engine.calls == 3
+    assert len(records) == 2
+    assert all(285 <= sum(record['row_span']) / 2 < 395 for record in records)
+
+if __name__ == "__main__":
+    test_mark_columns_are_narrow_columns()
+    test_serial_number_column_is_not_read_as_marks()
+    test_classified_and_ocr_marks_keep_column_order()
+    test_cell_occupancy_matches_direct_ink_count()
+    test_projection_spans_match_run_scan()
+    test_blank_cells_skip_ocr()
+    test_row_spans_limit_reading()
+    print("All tabular OCR tests passed")